@@ -0,0 +1,8 @@
+"""Тесты модулей без bpy: они импортируются напрямую из каталога аддона,
+минуя __init__.py пакета, которому нужен Blender."""
+import os
+import sys
+
+ADDON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "watertight_checker")
+if ADDON_DIR not in sys.path:
+    sys.path.insert(0, ADDON_DIR)
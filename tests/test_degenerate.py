@@ -0,0 +1,55 @@
+import numpy as np
+
+import degenerate
+
+
+def quads(heights, shift=0.5):
+    """Квадраты 1 x 1 на высотах heights, каждый следующий сдвинут по X на shift"""
+    coords = []
+    for number, z in enumerate(heights):
+        x = number * shift
+        coords += [(x, 0.0, z), (x + 1.0, 0.0, z), (x + 1.0, 1.0, z), (x, 1.0, z)]
+    count = len(heights)
+    loop_verts = np.arange(4 * count)
+    loop_starts = np.arange(count) * 4
+    loop_totals = np.full(count, 4)
+    edge_verts = np.column_stack((loop_verts, loop_verts + 1 - 4 * (loop_verts % 4 == 3)))
+    return np.array(coords), edge_verts, loop_verts, loop_starts, loop_totals
+
+
+def test_overlap_across_plane_bin_boundary():
+    # При шаге 1e-4 высоты лежат по разные стороны границы ячейки (1.5 шага)
+    result = degenerate.check_faces(*quads([0.000149999, 0.000150001]), tolerance=1e-4)
+    assert result["overlapping_faces"].tolist() == [0, 1]
+    # И по разные стороны целого числа шагов
+    result = degenerate.check_faces(*quads([0.000199999, 0.000200001]), tolerance=1e-4)
+    assert result["overlapping_faces"].tolist() == [0, 1]
+
+
+def test_overlap_across_normal_bin_boundary():
+    coords, edge_verts, loop_verts, loop_starts, loop_totals = quads([0.0, 0.0])
+    # Наклон нормалей по X около границы ячейки NORMAL_STEP
+    for face, slope in ((0, 0.0004999), (1, 0.0005001)):
+        corners = slice(4 * face, 4 * face + 4)
+        coords[corners, 2] = -slope * (coords[corners, 0] - 0.75)
+    result = degenerate.check_faces(coords, edge_verts, loop_verts, loop_starts, loop_totals, tolerance=1e-4)
+    assert result["overlapping_faces"].tolist() == [0, 1]
+
+
+def test_separate_planes_and_neighbours_do_not_overlap():
+    result = degenerate.check_faces(*quads([0.0, 0.01]), tolerance=1e-4)
+    assert result["overlapping_faces"].tolist() == []
+    # Соседние квадраты с общей стороной
+    result = degenerate.check_faces(*quads([0.0, 0.0], shift=1.0), tolerance=1e-4)
+    assert result["overlapping_faces"].tolist() == []
+
+
+def test_duplicates_and_degenerate_faces():
+    coords, edge_verts, loop_verts, loop_starts, loop_totals = quads([0.0])
+    loop_verts = np.concatenate((loop_verts, loop_verts[::-1], [0, 1, 1]))
+    loop_starts = np.array([0, 4, 8])
+    loop_totals = np.array([4, 4, 3])
+    result = degenerate.check_faces(coords, edge_verts, loop_verts, loop_starts, loop_totals)
+    assert result["duplicate_faces"].tolist() == [1]
+    assert result["degenerate_faces"].tolist() == [2]
+    assert result["overlapping_faces"].tolist() == []
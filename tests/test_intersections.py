@@ -0,0 +1,41 @@
+import numpy as np
+
+import intersections
+
+
+def overlapping_pairs(lo, hi):
+    a, b = np.triu_indices(len(lo), 1)
+    overlap = np.all((lo[a] <= hi[b]) & (lo[b] <= hi[a]), axis=1)
+    return set(zip(a[overlap].tolist(), b[overlap].tolist()))
+
+
+def test_grid_pairs_covers_overlaps_of_mixed_sizes():
+    rng = np.random.default_rng(5)
+    for _trial in range(50):
+        count = int(rng.integers(2, 300))
+        lo = rng.random((count, 3)) * 10.0
+        hi = lo + np.exp(rng.normal(-1.0, 1.5, (count, 3)))
+        found = set(map(tuple, intersections.grid_pairs(lo, hi).tolist()))
+        assert overlapping_pairs(lo, hi) <= found
+
+
+def test_long_boxes_pair_only_with_neighbours():
+    # Сетка мелких габаритов и длинные тонкие габариты вдоль X
+    rng = np.random.default_rng(1)
+    lo = rng.random((20000, 3))
+    hi = lo + 0.01
+    y = rng.random((64, 1))
+    long_lo = np.column_stack((np.zeros(64), y, y))
+    long_hi = np.column_stack((np.ones(64), y + 0.002, y + 0.002))
+    lo = np.concatenate((lo, long_lo))
+    hi = np.concatenate((hi, long_hi))
+
+    pairs = intersections.grid_pairs(lo, hi)
+    long_pairs = pairs[(pairs >= 20000).any(axis=1)]
+    # Квадратичная ветка дала бы 64 * 20000 пар
+    assert len(long_pairs) < 64 * 200
+    small, big = np.meshgrid(np.arange(20000), np.arange(20000, 20064), indexing="ij")
+    small, big = small.ravel(), big.ravel()
+    overlap = np.all((lo[small] <= hi[big]) & (lo[big] <= hi[small]), axis=1)
+    expected = set(zip(small[overlap].tolist(), big[overlap].tolist()))
+    assert expected <= set(map(tuple, long_pairs.tolist()))
@@ -0,0 +1,56 @@
+import numpy as np
+
+import sampling
+
+
+def coverage(points, flags, fraction, repeats=200):
+    """Доля прогонов, в которых 95% интервал накрыл истинное число"""
+    truth = int(flags.sum())
+    covered = 0
+    for seed in range(repeats):
+        sample, sample_strata, population, sampled = sampling.stratified_sample(points, fraction, seed=seed)
+        estimate, margin = sampling.estimate_count(flags[sample], sample_strata, population, sampled)
+        covered += abs(estimate - truth) <= margin
+    return covered / repeats
+
+
+def test_interval_coverage_with_sparse_strata():
+    # Около пяти элементов на страту: большинство страт дают по одному элементу выборки
+    rng = np.random.default_rng(0)
+    points = rng.random((20000, 3)).astype(np.float32)
+    uniform = rng.random(len(points)) < 0.05
+    clustered = np.linalg.norm(points - 0.5, axis=1) < 0.3
+    # Редкая проблема: в большинстве выборок нет ни одного попадания
+    rare = np.zeros(len(points), dtype=bool)
+    rare[rng.choice(len(points), 10, replace=False)] = True
+    for flags in (uniform, clustered, rare):
+        for fraction in (0.02, 0.1):
+            assert coverage(points, flags, fraction) >= 0.9
+
+
+def test_full_sample_is_exact():
+    rng = np.random.default_rng(1)
+    points = rng.random((5000, 3))
+    flags = rng.random(len(points)) < 0.1
+    sample, sample_strata, population, sampled = sampling.stratified_sample(points, 1.0)
+    estimate, margin = sampling.estimate_count(flags[sample], sample_strata, population, sampled)
+    assert len(sample) == len(points)
+    assert estimate == flags.sum()
+    assert margin == 0.0
+
+
+def test_fraction_applies_to_small_meshes():
+    rng = np.random.default_rng(2)
+    points = rng.random((2000, 3))
+    sizes = [len(sampling.stratified_sample(points, 0.01, seed=seed)[0]) for seed in range(20)]
+    # Без уменьшения сетки выборка была бы почти всем мешем (минимум по элементу на страту)
+    assert sum(sizes) / len(sizes) < 0.05 * len(points)
+
+
+def test_zero_hits_keep_an_upper_bound():
+    rng = np.random.default_rng(3)
+    points = rng.random((50000, 3))
+    sample, sample_strata, population, sampled = sampling.stratified_sample(points, 0.01)
+    estimate, margin = sampling.estimate_count(np.zeros(len(sample), dtype=bool), sample_strata, population, sampled)
+    assert estimate == 0.0
+    assert margin > 0.0
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import sys
+
+import scanner
+
+# Вместо Blender: печатает результат по каждому файлу и падает на файле с "crash" в имени
+FAKE_BLENDER = """#!{python}
+import json, os, sys
+for path in sys.argv[sys.argv.index("--worker") + 1:]:
+    if "crash" in os.path.basename(path):
+        sys.exit(3)
+    print({prefix!r} + json.dumps({{"path": path, "result": {{"meshes": []}}}}), flush=True)
+"""
+
+
+def test_crash_fails_only_the_running_file(tmp_path):
+    library = tmp_path / "library"
+    library.mkdir()
+    for name in ("a.blend", "b.blend", "c_crash.blend", "d.blend", "e.blend"):
+        (library / name).write_bytes(b"BLENDER")
+    blender = tmp_path / "blender"
+    blender.write_text(FAKE_BLENDER.format(python=sys.executable, prefix=scanner.RESULT_PREFIX))
+    os.chmod(blender, 0o755)
+    manifest = tmp_path / "scan.sqlite"
+
+    summary = scanner.scan(str(library), str(blender), str(manifest), workers=2, batch_size=5, log=lambda line: None)
+
+    assert summary == {scanner.STATUS_DONE: (4, 0), scanner.STATUS_FAILED: (1, 0)}
+    connection = sqlite3.connect(manifest)
+    failed = connection.execute("SELECT path FROM files WHERE status = ?", (scanner.STATUS_FAILED,)).fetchall()
+    connection.close()
+    assert [os.path.basename(path) for path, in failed] == ["c_crash.blend"]
+
+
+# Печатает результат первого файла и зависает
+HANGING_BLENDER = """#!{python}
+import json, sys, time
+paths = sys.argv[sys.argv.index("--worker") + 1:]
+print({prefix!r} + json.dumps({{"path": paths[0], "result": {{"meshes": []}}}}), flush=True)
+time.sleep(60)
+"""
+
+
+def test_results_stream_before_timeout(tmp_path):
+    blender = tmp_path / "blender"
+    blender.write_text(HANGING_BLENDER.format(python=sys.executable, prefix=scanner.RESULT_PREFIX))
+    os.chmod(blender, 0o755)
+    reported = []
+
+    requeue = scanner.run_worker_batch(str(blender), ["a.blend", "b.blend", "c.blend"], 1,
+                                       lambda *item: reported.append(item))
+
+    assert reported[0] == ("a.blend", {"meshes": []}, None)
+    assert reported[1][:2] == ("b.blend", None)
+    assert reported[1][2] == "Превышено время ожидания (1 с)"
+    assert requeue == ["c.blend"]
+
+
+def test_hash_only_changed_files(tmp_path, monkeypatch):
+    path = tmp_path / "a.blend"
+    path.write_bytes(b"BLENDER")
+    mtime, size, sha1 = scanner.file_signature(str(path), use_hash=True)
+    assert sha1
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *args, **kwargs: opened.append(args[0]) or real_open(*args, **kwargs))
+    # mtime и размер как в манифесте: хеш берется из записи
+    assert scanner.file_signature(str(path), True, (mtime, size, sha1, scanner.STATUS_DONE))[2] == sha1
+    assert opened == []
+    # Файл изменился: хеш считается заново
+    assert scanner.file_signature(str(path), True, (mtime - 1.0, size, "old", scanner.STATUS_DONE))[2] == sha1
+    assert opened == [str(path)]
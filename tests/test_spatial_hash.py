@@ -0,0 +1,56 @@
+import time
+
+import spatial_hash
+
+
+def test_coincident_pairs_within_tolerance():
+    points = [(0.0, 0.0, 0.0), (0.00005, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 0.0, 0.001)]
+    assert spatial_hash.find_coincident_pairs(points, 0.0001) == [(0, 1)]
+    assert spatial_hash.find_coincident_pairs(points, 0.0001, indices=[1, 2, 3]) == []
+
+
+def test_segment_cells_reaches_end_cell():
+    cells = list(spatial_hash.segment_cells((0.05, 0.05, 0.05), (0.95, 0.35, 0.75), 10.0))
+    assert cells[0] == (0, 0, 0)
+    assert cells[-1] == (9, 3, 7)
+    # Соседние ячейки пути отличаются на один шаг по одной оси
+    for before, after in zip(cells, cells[1:]):
+        assert sum(abs(p - q) for p, q in zip(before, after)) == 1
+
+
+def test_t_junction_on_long_diagonal_edge():
+    # Много коротких ребер задают мелкую ячейку, одно ребро идет по диагонали куба
+    points = []
+    edges = []
+    for i in range(2000):
+        x = (i % 50) * 0.02
+        y = (i // 50) * 0.02
+        points += [(x, y, 2.0), (x + 0.005, y, 2.0)]
+        edges.append((2 * i, 2 * i + 1))
+    diagonal = len(points)
+    points += [(0.0, 0.0, 0.0), (1.0, 1.0, 1.0), (0.5, 0.5, 0.5), (0.5, 0.5, 0.6)]
+    edges.append((diagonal, diagonal + 1))
+    # Ребро, начинающееся в середине диагонали
+    edges.append((diagonal + 2, diagonal + 3))
+
+    started = time.perf_counter()
+    hits = spatial_hash.find_t_junctions(points, edges, 0.0001)
+    assert time.perf_counter() - started < 5.0
+    assert hits == [(len(edges) - 2, diagonal + 2)]
+
+
+def test_classify_boundary_edges():
+    points = [
+        (0.0, 0.0, 0.0), (1.0, 0.0, 0.0),        # ребро 0
+        (0.0, 0.0, 0.0), (1.0, 0.0, 0.0),        # ребро 1 совпадает с ребром 0
+        (0.0, 2.0, 0.0), (2.0, 2.0, 0.0),        # ребро 2 с вершиной 8 посередине
+        (5.0, 5.0, 5.0), (6.0, 5.0, 5.0),        # ребро 3 - дыра
+        (1.0, 2.0, 0.0), (1.0, 3.0, 0.0),        # ребро 4 начинается внутри ребра 2
+    ]
+    edges = [(0, 1), (2, 3), (4, 5), (6, 7), (8, 9)]
+    classes, pairs = spatial_hash.classify_boundary_edges(points, edges, 0.0001)
+    assert classes == [
+        spatial_hash.EDGE_WELD, spatial_hash.EDGE_WELD,
+        spatial_hash.EDGE_TJUNCTION, spatial_hash.EDGE_HOLE, spatial_hash.EDGE_TJUNCTION,
+    ]
+    assert sorted(pairs) == [(0, 2), (1, 3)]
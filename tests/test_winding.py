@@ -0,0 +1,57 @@
+import random
+
+import winding
+
+
+def box_triangles(size, cuts):
+    """Замкнутый параллелепипед с внешними нормалями, грани разбиты сеткой cuts x cuts"""
+    sx, sy, sz = size
+    triangles = []
+
+    def side(origin, u, v):
+        def point(a, b):
+            return tuple(origin[k] + (u[k] * a + v[k] * b) / cuts for k in range(3))
+
+        for i in range(cuts):
+            for j in range(cuts):
+                p00, p10, p11, p01 = point(i, j), point(i + 1, j), point(i + 1, j + 1), point(i, j + 1)
+                triangles.append((p00, p10, p11))
+                triangles.append((p00, p11, p01))
+
+    side((0, 0, 0), (0, sy, 0), (sx, 0, 0))
+    side((0, 0, sz), (sx, 0, 0), (0, sy, 0))
+    side((0, 0, 0), (sx, 0, 0), (0, 0, sz))
+    side((0, sy, 0), (0, 0, sz), (sx, 0, 0))
+    side((0, 0, 0), (0, 0, sz), (0, sy, 0))
+    side((sx, 0, 0), (0, sy, 0), (0, 0, sz))
+    return triangles
+
+
+def test_thin_closed_shell_does_not_leak():
+    triangles = box_triangles((1.0, 1.0, 0.05), 32)
+    tree = winding.WindingTree(triangles)
+    rng = random.Random(1)
+    samples = []
+    for _sample in range(100):
+        x, y = rng.uniform(0.0, 1.0), rng.uniform(0.0, 1.0)
+        # Точка на середине толщины и точка снаружи над пластиной
+        samples.append(((x, y, 0.025), (x, y, 0.5)))
+
+    for candidates in samples:
+        assert abs(tree.winding_number(candidates[0]) - 1.0) <= winding.MAX_ERROR
+        assert abs(tree.winding_number(candidates[1])) <= winding.MAX_ERROR
+
+    leak, inside = winding.shell_leakage(tree, samples)
+    assert leak <= winding.MAX_ERROR
+    assert inside == 1.0
+
+
+def test_open_shell_leaks():
+    # Пластина без верхней стороны
+    triangles = box_triangles((1.0, 1.0, 0.05), 8)
+    open_triangles = triangles[:128] + triangles[256:]
+    tree = winding.WindingTree(open_triangles)
+    samples = [((0.5, 0.5, 0.025), (0.5, 0.5, 0.5))]
+
+    leak, _inside = winding.shell_leakage(tree, samples)
+    assert leak > 2.0 * winding.MAX_ERROR
@@ -0,0 +1,154 @@
+"""Сборка граничных ребер в упорядоченные петли и метрики отверстий.
+
+Петли хранятся компактно: массив смещений offsets (длина = число петель + 1)
+и плоские массивы индексов ребер и вершин. Ребра петли i - это
+loop_edges[offsets[i]:offsets[i + 1]], вершины - начальные вершины этих ребер
+в порядке обхода.
+
+Модуль не зависит от bpy: на вход подаются тройки (индекс ребра, v1, v2)
+и координаты вершин в виде кортежей (x, y, z).
+"""
+import math
+
+
+def chain_loops(edges):
+    """Связывает граничные ребра в цепочки за линейное время.
+
+    edges - список троек (индекс ребра, v1, v2).
+    Возвращает (offsets, loop_edges, loop_verts, closed), где closed - список
+    флагов замкнутости для каждой петли.
+    """
+    # Вершина -> позиции инцидентных граничных ребер
+    incident = {}
+    for pos, (_edge, a, b) in enumerate(edges):
+        incident.setdefault(a, []).append(pos)
+        incident.setdefault(b, []).append(pos)
+
+    used = [False] * len(edges)
+    # Указатель на первое непросмотренное ребро у каждой вершины,
+    # чтобы не сканировать списки заново (общая сложность остается линейной)
+    cursor = {v: 0 for v in incident}
+
+    def next_edge(vert):
+        positions = incident[vert]
+        i = cursor[vert]
+        while i < len(positions) and used[positions[i]]:
+            i += 1
+        cursor[vert] = i
+        return positions[i] if i < len(positions) else -1
+
+    offsets = [0]
+    loop_edges = []
+    loop_verts = []
+    closed = []
+
+    def walk(start_vert):
+        vert = start_vert
+        while True:
+            pos = next_edge(vert)
+            if pos < 0:
+                break
+            used[pos] = True
+            edge, a, b = edges[pos]
+            loop_edges.append(edge)
+            loop_verts.append(vert)
+            vert = b if vert == a else a
+            if vert == start_vert:
+                break
+        closed.append(vert == start_vert)
+        offsets.append(len(loop_edges))
+
+    # Сначала начинаем с концов открытых цепочек (нечетная степень),
+    # чтобы каждая цепочка обходилась целиком, а не кусками
+    for vert, positions in incident.items():
+        if len(positions) % 2 == 1:
+            while next_edge(vert) >= 0:
+                walk(vert)
+
+    for pos, (_edge, a, _b) in enumerate(edges):
+        if not used[pos]:
+            walk(a)
+
+    return offsets, loop_edges, loop_verts, closed
+
+
+def _distance(p, q):
+    return math.sqrt((q[0] - p[0]) ** 2 + (q[1] - p[1]) ** 2 + (q[2] - p[2]) ** 2)
+
+
+def loop_metrics(points, verts):
+    """Приблизительная площадь и неплоскостность петли.
+
+    Площадь считается по векторной площади (формула Ньюэлла) замкнутого
+    многоугольника, неплоскостность - максимальное отклонение вершин от
+    плоскости через центр петли с нормалью Ньюэлла.
+    """
+    count = len(verts)
+    if count < 3:
+        return 0.0, 0.0
+
+    nx = ny = nz = 0.0
+    cx = cy = cz = 0.0
+    for i in range(count):
+        p = points[verts[i]]
+        q = points[verts[(i + 1) % count]]
+        nx += (p[1] - q[1]) * (p[2] + q[2])
+        ny += (p[2] - q[2]) * (p[0] + q[0])
+        nz += (p[0] - q[0]) * (p[1] + q[1])
+        cx += p[0]
+        cy += p[1]
+        cz += p[2]
+
+    length = math.sqrt(nx * nx + ny * ny + nz * nz)
+    if length == 0.0:
+        return 0.0, 0.0
+
+    nx /= length
+    ny /= length
+    nz /= length
+    cx /= count
+    cy /= count
+    cz /= count
+    planarity = 0.0
+    for v in verts:
+        p = points[v]
+        planarity = max(planarity, abs((p[0] - cx) * nx + (p[1] - cy) * ny + (p[2] - cz) * nz))
+    return 0.5 * length, planarity
+
+
+def extract_loops(points, edges):
+    """Собирает петли, считает метрики и сортирует отверстия по убыванию размера.
+
+    Возвращает словарь с плоскими массивами: offsets, edges, verts,
+    perimeters, areas, planarity.
+    """
+    offsets, loop_edges, loop_verts, _closed = chain_loops(edges)
+    edge_length = {edge: _distance(points[a], points[b]) for edge, a, b in edges}
+
+    loops = []
+    for i in range(len(offsets) - 1):
+        start, end = offsets[i], offsets[i + 1]
+        verts = loop_verts[start:end]
+        perimeter = sum(edge_length[edge] for edge in loop_edges[start:end])
+        area, planarity = loop_metrics(points, verts)
+        loops.append(((perimeter, area, planarity), loop_edges[start:end], verts))
+
+    # Крупные отверстия первыми: по площади, затем по периметру
+    loops.sort(key=lambda item: (item[0][1], item[0][0]), reverse=True)
+
+    result = {
+        "offsets": [0],
+        "edges": [],
+        "verts": [],
+        "perimeters": [],
+        "areas": [],
+        "planarity": [],
+    }
+    for (perimeter, area, planarity), edge_indices, verts in loops:
+        result["edges"].extend(edge_indices)
+        result["verts"].extend(verts)
+        result["offsets"].append(len(result["edges"]))
+        result["perimeters"].append(perimeter)
+        result["areas"].append(area)
+        result["planarity"].append(planarity)
+    return result
@@ -0,0 +1,254 @@
+"""Поиск дублирующихся, перекрывающихся и вырожденных граней по массивам меша.
+
+Все метрики граней (векторная площадь, длины сторон, плоскости) считаются
+векторно за один проход по плоским массивам полигонов:
+
+    coords       - координаты вершин, форма (V, 3)
+    edge_verts   - вершины ребер, форма (E, 2)
+    loop_verts   - индекс вершины для каждого угла (loop), форма (L,)
+    loop_starts  - первый угол каждой грани, форма (F,)
+    loop_totals  - число углов каждой грани, форма (F,)
+
+Массивы совпадают с тем, что отдает Mesh.foreach_get, поэтому в Blender
+они заполняются без обхода элементов в Python.
+
+Модуль не зависит от bpy.
+"""
+import numpy as np
+
+# Шаг квантования нормали при группировке граней по плоскостям
+NORMAL_STEP = 1e-3
+
+# Минимальный шаг квантования смещения плоскости относительно размера меша
+PLANE_STEP_FRACTION = 1e-6
+
+# Доля шага у верхней границы ячейки плоскости, в которой грань попадает
+# и в соседнюю ячейку
+NEIGHBOUR_MARGIN = 0.25
+
+
+def face_loops(loop_starts, loop_totals):
+    """Индексы углов, упорядоченные по граням, и смещения граней в этом порядке"""
+    offsets = np.cumsum(loop_totals) - loop_totals
+    positions = np.repeat(loop_starts - offsets, loop_totals) + np.arange(int(loop_totals.sum()))
+    return positions, offsets
+
+
+def face_metrics(coords, loop_verts, loop_starts, loop_totals):
+    """Векторные площади, длины самых длинных сторон и вершины граней по порядку.
+
+    Векторная площадь считается по формуле Ньюэлла относительно первой
+    вершины грани (так меньше потеря точности вдали от начала координат).
+    Возвращает (area_vectors (F, 3), longest (F,), face_verts (L,), offsets (F,)).
+    """
+    positions, offsets = face_loops(loop_starts, loop_totals)
+    face_verts = loop_verts[positions]
+    points = coords[face_verts]
+    local = points - np.repeat(points[offsets], loop_totals, axis=0)
+
+    # Следующий угол в пределах грани (последний замыкается на первый)
+    following = np.arange(len(face_verts)) + 1
+    following[offsets + loop_totals - 1] = offsets
+
+    area_vectors = 0.5 * np.add.reduceat(np.cross(local, local[following]), offsets, axis=0)
+    side_lengths = np.linalg.norm(points[following] - points, axis=1)
+    longest = np.maximum.reduceat(side_lengths, offsets)
+    return area_vectors, longest, face_verts, offsets
+
+
+def find_duplicate_faces(face_verts, offsets, loop_totals):
+    """Грани с тем же набором вершин, что у грани с меньшим индексом.
+
+    Отсортированные кортежи индексов вершин сравниваются через np.unique
+    отдельно для граней каждого размера. Первая грань группы не помечается,
+    чтобы выделенные дубликаты можно было сразу удалить.
+    """
+    duplicates = []
+    for size in np.unique(loop_totals):
+        faces = np.flatnonzero(loop_totals == size)
+        if len(faces) < 2:
+            continue
+        rows = np.sort(face_verts[offsets[faces][:, None] + np.arange(size)], axis=1)
+        _rows, first, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        duplicates.append(faces[first[inverse] != np.arange(len(faces))])
+    if not duplicates:
+        return np.zeros(0, dtype=np.int64)
+    return np.sort(np.concatenate(duplicates))
+
+
+def _separated(tri_a, tri_b, tolerance):
+    """Треугольники на плоскости не перекрываются по площади (теорема о разделяющей оси).
+
+    Касание по стороне или вершине перекрытием не считается.
+    """
+    for tri in (tri_a, tri_b):
+        for i in range(3):
+            ex = tri[(i + 1) % 3][0] - tri[i][0]
+            ey = tri[(i + 1) % 3][1] - tri[i][1]
+            length = (ex * ex + ey * ey) ** 0.5
+            if length == 0.0:
+                continue
+            ax, ay = -ey / length, ex / length
+            pa = [p[0] * ax + p[1] * ay for p in tri_a]
+            pb = [p[0] * ax + p[1] * ay for p in tri_b]
+            if min(max(pa), max(pb)) - max(min(pa), min(pb)) <= tolerance:
+                return True
+    return False
+
+
+def _polygons_overlap(poly_a, poly_b, tolerance):
+    """Перекрытие двух плоских граней, разбитых веером на треугольники"""
+    tris_a = [(poly_a[0], poly_a[i], poly_a[i + 1]) for i in range(1, len(poly_a) - 1)]
+    tris_b = [(poly_b[0], poly_b[i], poly_b[i + 1]) for i in range(1, len(poly_b) - 1)]
+    return any(not _separated(a, b, tolerance) for a in tris_a for b in tris_b)
+
+
+def find_coplanar_overlaps(coords, area_vectors, face_verts, offsets, loop_totals,
+                           candidates, tolerance):
+    """Пары компланарных граней, перекрывающихся по площади.
+
+    Грани группируются по квантованной плоскости (нормаль с каноническим
+    знаком, поэтому встречные грани тоже попадают в одну группу); грани у
+    границы ячейки попадают и в соседнюю, чтобы почти совпадающие плоскости
+    не разошлись по разным группам. Внутри
+    группы грани проецируются на плоскость, кандидаты отбираются по плоской
+    сетке габаритов, а перекрытие проверяется по теореме о разделяющей оси.
+    Грани разбиваются на треугольники веером, поэтому для невыпуклых
+    N-угольников возможны ложные срабатывания. Пары с одинаковым набором
+    вершин (точные дубликаты) не учитываются.
+    candidates - индексы граней, участвующих в проверке (невырожденные).
+    Возвращает отсортированный массив индексов перекрывающихся граней.
+    """
+    if len(candidates) < 2:
+        return np.zeros(0, dtype=np.int64)
+
+    normals = area_vectors[candidates]
+    normals = normals / np.linalg.norm(normals, axis=1)[:, None]
+    # Канонический знак: наибольшая по модулю компонента положительна
+    dominant = np.argmax(np.abs(normals), axis=1)
+    signs = np.sign(normals[np.arange(len(candidates)), dominant])
+    normals = normals * signs[:, None]
+    distances = np.einsum("ij,ij->i", normals, coords[face_verts[offsets[candidates]]])
+
+    extent = float(np.ptp(coords, axis=0).max()) if len(coords) else 0.0
+    plane_step = max(tolerance, extent * PLANE_STEP_FRACTION, np.finfo(float).tiny)
+    scaled = np.column_stack((normals / NORMAL_STEP, distances / plane_step))
+    keys = np.floor(scaled).astype(np.int64)
+    # Близкие плоскости по разные стороны границы ячейки: грань у верхней
+    # границы ячейки по какой-либо оси попадает и в соседнюю ячейку, так что
+    # плоскости, отличающиеся меньше чем на NEIGHBOUR_MARGIN шага по каждой
+    # оси, всегда оказываются в общей группе
+    near = scaled - keys >= 1.0 - NEIGHBOUR_MARGIN
+    sources = np.arange(len(candidates))
+    for column in range(keys.shape[1]):
+        extra = np.flatnonzero(near[sources, column])
+        shifted = keys[extra].copy()
+        shifted[:, column] += 1
+        keys = np.concatenate((keys, shifted))
+        sources = np.concatenate((sources, sources[extra]))
+    _keys, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+
+    # Позиции кандидатов, сгруппированные по плоскостям (грань у границы
+    # ячейки может входить в несколько групп)
+    order = sources[np.argsort(inverse, kind="stable")]
+    group_starts = np.cumsum(counts) - counts
+
+    overlapping = set()
+    tested = set()
+    for group in np.flatnonzero(counts > 1):
+        # По возрастанию номера грани: пары ниже сразу упорядочены
+        positions = np.sort(order[group_starts[group]:group_starts[group] + counts[group]])
+        members = candidates[positions]
+        # Проекция на плоскость без доминирующей оси нормали
+        axis = int(dominant[positions[0]])
+        kept = [k for k in range(3) if k != axis]
+
+        # Углы граней группы и их проекции одним массивом
+        totals = loop_totals[members]
+        group_offsets = np.cumsum(totals) - totals
+        loops = np.repeat(offsets[members] - group_offsets, totals) + np.arange(int(totals.sum()))
+        verts = face_verts[loops]
+        projected = coords[verts][:, kept]
+
+        # Широкая фаза: плоская сетка по габаритам, сжатым на tolerance,
+        # так что соседи по стороне не попадают в общие ячейки
+        lo = np.minimum.reduceat(projected, group_offsets, axis=0)
+        hi = np.maximum.reduceat(projected, group_offsets, axis=0)
+        cell = float(np.median((hi - lo).max(axis=1))) or 1.0
+        lo += tolerance
+        hi -= tolerance
+        lo_cells = np.floor(lo / cell).astype(np.int64).tolist()
+        hi_cells = np.floor(hi / cell).astype(np.int64).tolist()
+        boxes = np.column_stack((lo, hi)).tolist()
+
+        grid = {}
+        for number, ((x0, y0), (x1, y1)) in enumerate(zip(lo_cells, hi_cells)):
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    grid.setdefault((cx, cy), []).append(number)
+
+        points = projected.tolist()
+        vert_lists = verts.tolist()
+        starts = group_offsets.tolist()
+        ends = (group_offsets + totals).tolist()
+
+        faces = members.tolist()
+        for bucket in grid.values():
+            for i in range(len(bucket)):
+                a = bucket[i]
+                for j in range(i + 1, len(bucket)):
+                    b = bucket[j]
+                    pair = (faces[a], faces[b])
+                    if pair in tested:
+                        continue
+                    tested.add(pair)
+                    box_a, box_b = boxes[a], boxes[b]
+                    if (box_a[2] < box_b[0] or box_b[2] < box_a[0]
+                            or box_a[3] < box_b[1] or box_b[3] < box_a[1]):
+                        continue
+                    if set(vert_lists[starts[a]:ends[a]]) == set(vert_lists[starts[b]:ends[b]]):
+                        continue
+                    if _polygons_overlap(points[starts[a]:ends[a]], points[starts[b]:ends[b]], tolerance):
+                        overlapping.add(int(members[a]))
+                        overlapping.add(int(members[b]))
+
+    return np.array(sorted(overlapping), dtype=np.int64)
+
+
+def check_faces(coords, edge_verts, loop_verts, loop_starts, loop_totals, tolerance=0.0):
+    """Все проверки граней и ребер по массивам меша.
+
+    Вырожденной считается грань, высота которой относительно самой длинной
+    стороны не больше tolerance (в том числе нулевая площадь), ребро -
+    если его длина не больше tolerance.
+    Возвращает словарь отсортированных массивов индексов: duplicate_faces,
+    overlapping_faces, degenerate_faces, zero_length_edges.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    edge_verts = np.asarray(edge_verts, dtype=np.int64).reshape(-1, 2)
+    loop_verts = np.asarray(loop_verts, dtype=np.int64)
+    loop_starts = np.asarray(loop_starts, dtype=np.int64)
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+
+    edge_lengths = np.linalg.norm(coords[edge_verts[:, 1]] - coords[edge_verts[:, 0]], axis=1)
+    result = {
+        "duplicate_faces": np.zeros(0, dtype=np.int64),
+        "overlapping_faces": np.zeros(0, dtype=np.int64),
+        "degenerate_faces": np.zeros(0, dtype=np.int64),
+        "zero_length_edges": np.flatnonzero(edge_lengths <= tolerance),
+    }
+    if not len(loop_totals):
+        return result
+
+    area_vectors, longest, face_verts, offsets = face_metrics(coords, loop_verts, loop_starts, loop_totals)
+    areas = np.linalg.norm(area_vectors, axis=1)
+    # Высота треугольника-оценки грани: 2 * площадь / длина основания
+    degenerate = 2.0 * areas <= tolerance * longest
+    result["degenerate_faces"] = np.flatnonzero(degenerate)
+    result["duplicate_faces"] = find_duplicate_faces(face_verts, offsets, loop_totals)
+    result["overlapping_faces"] = find_coplanar_overlaps(
+        coords, area_vectors, face_verts, offsets, loop_totals,
+        np.flatnonzero(~degenerate), tolerance)
+    return result
@@ -0,0 +1,150 @@
+"""Потоковая выгрузка результатов проверки в JSON, CSV, JUnit XML и NPZ.
+
+Записи об объектах передаются итератором словарей и пишутся в файл по одной,
+поэтому выгрузка тысяч объектов не собирает весь документ в памяти.
+
+Запись об объекте:
+    {
+        "name": имя объекта,
+        "mesh": имя меша,
+        "watertight": bool,
+        "mesh_hash": хеш геометрии,
+        "counts": {категория: число элементов},
+        "timings": {проверка: секунды},
+        "export_split": {vertices, export_vertices, uv_edges, normal_edges},  # необязательно
+        "indices": {категория: [индексы]}  # необязательно
+    }
+
+Модуль не зависит от bpy.
+"""
+import csv
+import json
+import os
+from xml.sax.saxutils import quoteattr, escape
+
+# Версия формата выгрузки
+SCHEMA_VERSION = 1
+
+FORMATS = ('JSON', 'CSV', 'JUNIT', 'NPZ')
+
+FORMAT_EXTENSIONS = {
+    'JSON': ".json",
+    'CSV': ".csv",
+    'JUNIT': ".xml",
+    'NPZ': ".npz",
+}
+
+
+def write_json(stream, records, plugin_version=""):
+    """Пишет JSON-документ, сериализуя объекты по одному"""
+    stream.write('{"schema_version": %d, "plugin_version": %s, "objects": [' % (
+        SCHEMA_VERSION, json.dumps(plugin_version)))
+    count = 0
+    for record in records:
+        if count:
+            stream.write(",")
+        stream.write("\n  ")
+        stream.write(json.dumps(record, ensure_ascii=False))
+        count += 1
+    stream.write("\n]}\n")
+    return count
+
+
+def write_csv(stream, records, categories):
+    """Пишет по строке на объект: счетчики категорий и суммарное время.
+
+    Массивы индексов в CSV не выгружаются.
+    """
+    writer = csv.writer(stream)
+    writer.writerow(["object", "mesh", "watertight", "mesh_hash", "total_time"] + list(categories))
+    count = 0
+    for record in records:
+        counts = record.get("counts", {})
+        writer.writerow([
+            record["name"],
+            record.get("mesh", ""),
+            int(bool(record.get("watertight"))),
+            record.get("mesh_hash", ""),
+            "%.6f" % record.get("timings", {}).get("total", 0.0),
+        ] + [counts.get(category, 0) for category in categories])
+        count += 1
+    return count
+
+
+def write_junit(stream, records, categories):
+    """Пишет JUnit XML: объект - набор тестов, категория - тест.
+
+    Итоговые счетчики на уровне testsuites не пишутся, чтобы не держать
+    все записи в памяти; CI-парсеры считают их сами.
+    """
+    stream.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    stream.write('<testsuites name="watertight_checker">\n')
+    count = 0
+    for record in records:
+        counts = record.get("counts", {})
+        failures = sum(1 for category in categories if counts.get(category, 0))
+        total_time = record.get("timings", {}).get("total", 0.0)
+        stream.write('  <testsuite name=%s tests="%d" failures="%d" time="%.6f">\n' % (
+            quoteattr(record["name"]), len(categories), failures, total_time))
+        stream.write('    <properties><property name="mesh_hash" value=%s/></properties>\n' % (
+            quoteattr(record.get("mesh_hash", ""))))
+        for category in categories:
+            stream.write('    <testcase classname=%s name=%s' % (
+                quoteattr(record["name"]), quoteattr(category)))
+            found = counts.get(category, 0)
+            if found:
+                stream.write('>\n      <failure message=%s>%s</failure>\n    </testcase>\n' % (
+                    quoteattr("%d elements" % found),
+                    escape(" ".join(str(i) for i in record.get("indices", {}).get(category, [])))))
+            else:
+                stream.write('/>\n')
+        stream.write('  </testsuite>\n')
+        count += 1
+    stream.write('</testsuites>\n')
+    return count
+
+
+def write_npz(filepath, records, categories):
+    """Пишет NPZ-архив: массивы индексов каждого объекта отдельными записями.
+
+    Массивы пишутся в zip по одному через numpy.lib.format, поэтому в памяти
+    находится только текущий массив. Сводка (счетчики, время, хеши)
+    сохраняется в записи "summary" как JSON-строка.
+    """
+    import zipfile
+    import numpy as np
+
+    summary = []
+    with zipfile.ZipFile(filepath, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        for number, record in enumerate(records):
+            for category in categories:
+                indices = record.get("indices", {}).get(category)
+                if indices is None:
+                    continue
+                with archive.open(f"obj{number}/{category}.npy", "w", force_zip64=True) as entry:
+                    np.lib.format.write_array(entry, np.asarray(indices, dtype=np.int32), allow_pickle=False)
+            summary.append({key: value for key, value in record.items() if key != "indices"})
+        with archive.open("summary.npy", "w") as entry:
+            np.lib.format.write_array(entry, np.array(json.dumps(summary, ensure_ascii=False)), allow_pickle=False)
+    return len(summary)
+
+
+def export_records(filepath, records, file_format, categories, plugin_version=""):
+    """Записывает записи в файл выбранного формата, возвращает число объектов"""
+    if file_format not in FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {file_format}")
+
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if file_format == 'NPZ':
+        return write_npz(filepath, records, categories)
+
+    newline = "" if file_format == 'CSV' else None
+    with open(filepath, "w", encoding="utf-8", newline=newline) as stream:
+        if file_format == 'JSON':
+            return write_json(stream, records, plugin_version)
+        if file_format == 'CSV':
+            return write_csv(stream, records, categories)
+        return write_junit(stream, records, categories)
@@ -0,0 +1,88 @@
+"""Моделирование разделения вершин при экспорте в игровой движок.
+
+Экспортеры (FBX, glTF и движки при импорте) создают отдельную вершину для
+каждого уникального сочетания (позиция, нормаль угла, UV всех слоев).
+Вдоль UV-швов и жестких ребер вершины расходятся, и замкнутый в Blender
+меш становится открытым: именно там появляются щели в тенях.
+
+Сочетания атрибутов углов (loops) квантуются и хешируются через np.unique,
+после чего ребро считается разрезанным, если соседние грани передают его
+разными парами экспортных вершин.
+
+Модуль не зависит от bpy: на вход подаются плоские массивы углов
+(loop_verts, loop_edges), нормали углов формы (L, 3) и список массивов UV
+формы (L, 2), плюс loop_starts/loop_totals полигонов.
+"""
+import numpy as np
+
+from .degenerate import face_loops
+
+# Шаг квантования нормалей и UV: значения ближе шага считаются совпадающими
+NORMAL_STEP = 1e-4
+UV_STEP = 1e-6
+
+
+def corner_keys(loop_verts, normals=None, uvs=()):
+    """Номер экспортной вершины для каждого угла и число таких вершин"""
+    columns = [np.asarray(loop_verts, dtype=np.int64)[:, None]]
+    if normals is not None:
+        columns.append(np.round(np.asarray(normals, dtype=np.float64).reshape(-1, 3) / NORMAL_STEP).astype(np.int64))
+    for uv in uvs:
+        columns.append(np.round(np.asarray(uv, dtype=np.float64).reshape(-1, 2) / UV_STEP).astype(np.int64))
+    keys = np.hstack(columns)
+    if not len(keys):
+        return np.zeros(0, dtype=np.int64), 0
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    return inverse.reshape(-1), len(unique)
+
+
+def split_edges(corner_ids, loop_edges, loop_starts, loop_totals):
+    """Ребра, которые соседние грани передают разными парами экспортных вершин"""
+    if not len(corner_ids):
+        return np.zeros(0, dtype=np.int64)
+    positions, offsets = face_loops(loop_starts, loop_totals)
+    # Угол и следующий за ним угол грани образуют ребро loop_edges[угол]
+    following = np.arange(len(positions)) + 1
+    following[offsets + loop_totals - 1] = offsets
+
+    start = corner_ids[positions]
+    end = corner_ids[positions[following]]
+    rows = np.column_stack((
+        np.asarray(loop_edges, dtype=np.int64)[positions],
+        np.minimum(start, end),
+        np.maximum(start, end),
+    ))
+    # Уникальные пары экспортных вершин на каждом ребре
+    unique = np.unique(rows, axis=0)
+    edges, counts = np.unique(unique[:, 0], return_counts=True)
+    return edges[counts > 1]
+
+
+def simulate_split(loop_verts, loop_edges, loop_starts, loop_totals, normals=None, uvs=()):
+    """Моделирует разделение вершин экспортером.
+
+    Возвращает словарь: split_edges (все разрезанные ребра), uv_edges и
+    normal_edges (разрезы только по UV и только по нормалям), vertices
+    (вершин с гранями в Blender) и export_vertices (вершин после разделения).
+    """
+    loop_verts = np.asarray(loop_verts, dtype=np.int64)
+    loop_starts = np.asarray(loop_starts, dtype=np.int64)
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+
+    corner_ids, export_vertices = corner_keys(loop_verts, normals, uvs)
+    result = {
+        "split_edges": split_edges(corner_ids, loop_edges, loop_starts, loop_totals),
+        "uv_edges": np.zeros(0, dtype=np.int64),
+        "normal_edges": np.zeros(0, dtype=np.int64),
+        # Вершины без граней экспортер отбрасывает
+        "vertices": int(len(np.unique(loop_verts))),
+        "export_vertices": int(export_vertices),
+    }
+    # Отдельно разрезы только по UV-швам и только по жестким нормалям
+    if uvs:
+        uv_ids, _count = corner_keys(loop_verts, None, uvs)
+        result["uv_edges"] = split_edges(uv_ids, loop_edges, loop_starts, loop_totals)
+    if normals is not None:
+        normal_ids, _count = corner_keys(loop_verts, normals)
+        result["normal_edges"] = split_edges(normal_ids, loop_edges, loop_starts, loop_totals)
+    return result
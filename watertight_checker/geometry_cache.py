@@ -0,0 +1,131 @@
+"""Сессионный кеш производных структур мешей (массивы, инцидентность, центры, BVH).
+
+Проверка, выделение и навигация по проблемам берут одни и те же структуры
+из кеша, а не строят их заново. Ключ записи - session_uid меша, внутри
+записи структуры хранятся по имени и строятся при первом обращении.
+
+Записи упорядочены по последнему обращению: при превышении лимита памяти
+вытесняются самые старые (LRU). Обработчик depsgraph_update_post помечает
+измененные меши; помеченная запись при следующем обращении сверяется по
+хешу геометрии и сбрасывается, только если геометрия действительно
+изменилась (смена выделения запись не сбрасывает). Хеш считается лениво:
+только при сверке помеченной записи или один раз за проверку меша.
+
+Модуль не зависит от bpy: построение структур и хеш передаются функциями.
+"""
+import sys
+from collections import OrderedDict
+
+# Лимит памяти кеша по умолчанию, байт
+MEMORY_LIMIT = 512 * 1024 * 1024
+
+# session_uid меша -> {"signature": хеш геометрии или None, "items": {имя: (значение, размер)}}
+_entries = OrderedDict()
+
+# Меши, измененные после построения записи (проверяются при обращении)
+_dirty = set()
+
+_limit = MEMORY_LIMIT
+
+
+def estimate_size(value):
+    """Примерный размер структуры в байтах (массивы NumPy, array, словари, кортежи)"""
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if hasattr(value, "buffer_info"):
+        return value.buffer_info()[1] * value.itemsize
+    return sys.getsizeof(value)
+
+
+def memory_usage():
+    """Суммарный размер всех записей, байт"""
+    return sum(size for entry in _entries.values() for _value, size in entry["items"].values())
+
+
+def set_limit(limit):
+    """Задает лимит памяти и сразу вытесняет лишние записи"""
+    global _limit
+    _limit = max(int(limit), 0)
+    _evict()
+
+
+def _evict(keep=None):
+    """Вытесняет самые старые записи, пока кеш не уложится в лимит"""
+    usage = memory_usage()
+    for key in list(_entries):
+        if usage <= _limit:
+            break
+        if key == keep:
+            continue
+        entry = _entries.pop(key)
+        _dirty.discard(key)
+        usage -= sum(size for _value, size in entry["items"].values())
+
+
+def validate(key, signature):
+    """Сверяет запись меша key с уже вычисленным хешем геометрии signature.
+
+    Запись сбрасывается, если она помечена как измененная или ее хеш известен
+    и хеш отличается. После сверки хеш запоминается в записи, и следующая
+    сверка помеченной записи сравнивает с ним.
+    """
+    entry = _entries.get(key)
+    if entry is not None and entry["signature"] != signature and (key in _dirty or entry["signature"] is not None):
+        del _entries[key]
+        entry = None
+    _dirty.discard(key)
+    if entry is None:
+        entry = _entries[key] = {"signature": signature, "items": {}}
+    entry["signature"] = signature
+    _entries.move_to_end(key)
+    return entry
+
+
+def get(key, name, builder, signature, size=None, stale=False):
+    """Структура name меша key: из кеша или построенная builder().
+
+    signature() - хеш геометрии меша: вычисляется только при обращении к
+    записи, помеченной как измененная. Новая запись хеш не считает; если к
+    ее пометке хеш так и не стал известен (см. validate), она сбрасывается.
+    size(value) - размер структуры в байтах, если estimate_size не подходит
+    (например, для BVHTree).
+    stale - данные меша могут отставать от редактируемой геометрии (режим
+    редактирования): запись не сверяется и остается помеченной, чтобы
+    сверка прошла после записи правок в меш.
+    """
+    entry = _entries.get(key)
+    if entry is not None and key in _dirty and not stale:
+        entry = validate(key, signature())
+    elif entry is None:
+        entry = _entries[key] = {"signature": None, "items": {}}
+    _entries.move_to_end(key)
+    if stale:
+        _dirty.add(key)
+
+    item = entry["items"].get(name)
+    if item is None:
+        value = builder()
+        item = entry["items"][name] = (value, size(value) if size else estimate_size(value))
+        _evict(keep=key)
+    return item[0]
+
+
+def mark_dirty(key):
+    """Помечает меш как возможно измененный (обработчик depsgraph)"""
+    if key in _entries:
+        _dirty.add(key)
+
+
+def discard(key):
+    _entries.pop(key, None)
+    _dirty.discard(key)
+
+
+def clear():
+    """Сбрасывает кеш (загрузка другого файла, выгрузка аддона)"""
+    _entries.clear()
+    _dirty.clear()
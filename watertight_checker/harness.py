@@ -0,0 +1,322 @@
+"""Дифференциальная проверка движков против эталона на BMesh.
+
+Запускается в фоновом Blender:
+
+    blender -b --factory-startup --python harness.py -- --cases 40 --seed 1
+
+Для каждого меша корпуса (процедурные примитивы и их случайные искажения:
+пробитые дыры, сдвиг вершин, перевернутые грани, дубликаты граней,
+схлопнутые вершины, пересекающиеся копии оболочек) сравниваются множества
+индексов по каждой категории проблем:
+
+    reference    - WatertightAnalyzer.analyze_bmesh без исходного меша
+                   (самопересечения через BVHTree), а дубликаты, вырожденные
+                   грани и ребра нулевой длины - прямым обходом BMesh
+    arrays       - analyze_mesh: массивы меша через foreach_get и NumPy
+    partitioned  - поиск самопересечений по ячейкам октодерева в пуле процессов
+    preview      - preview_mesh: точные счетчики по массивам инцидентности
+
+Остальные категории (границы, неплотные вершины, нормали, manifold,
+N-угольники, сварка, T-стыки, протекание) analyze_mesh считает тем же
+обходом BMesh, что и эталон, поэтому с arrays сравниваются только категории
+из ARRAYS_CATEGORIES. Границы, non-manifold ребра и неплотные вершины
+независимо от BMesh считает preview: его счетчики сверяются с размерами
+множеств эталона.
+
+С --registration N дополнительно замеряется время импорта пакета и циклов
+register/unregister (быстрый запуск фоновых процессов Blender).
+
+Рядом с результатом выводится ускорение относительно эталона. Код возврата
+1, если хотя бы одна категория разошлась. Для компланарных перекрытий
+независимого эталона нет: эталоном служит тот же NumPy-движок на массивах,
+собранных по BMesh.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Категории, которые analyze_mesh считает не так, как эталон (по массивам меша)
+ARRAYS_CATEGORIES = ("intersecting_faces", "duplicate_faces", "overlapping_faces",
+                     "degenerate_faces", "zero_length_edges")
+
+# Мелкие ячейки октодерева, чтобы пары на границах ячеек встречались и на малых мешах
+HARNESS_CELL_TRIANGLES = 64
+
+
+def primitive(kind, rng):
+    """Вершины и грани процедурного примитива"""
+    import bmesh
+
+    bm = bmesh.new()
+    try:
+        if kind == "cube":
+            bmesh.ops.create_cube(bm, size=2.0)
+            bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=rng.randint(1, 6), use_grid_fill=True)
+        elif kind == "uvsphere":
+            bmesh.ops.create_uvsphere(bm, u_segments=rng.randint(8, 48), v_segments=rng.randint(6, 32), radius=1.0)
+        elif kind == "icosphere":
+            bmesh.ops.create_icosphere(bm, subdivisions=rng.randint(1, 4), radius=1.0)
+        elif kind == "cone":
+            bmesh.ops.create_cone(bm, cap_ends=True, cap_tris=rng.random() < 0.5,
+                                  segments=rng.randint(3, 64), radius1=1.0, radius2=rng.random(), depth=2.0)
+        else:
+            bmesh.ops.create_grid(bm, x_segments=rng.randint(2, 40), y_segments=rng.randint(2, 40), size=1.0)
+        verts = [tuple(v.co) for v in bm.verts]
+        faces = [[v.index for v in f.verts] for f in bm.faces]
+    finally:
+        bm.free()
+    return verts, faces
+
+
+def fuzz(verts, faces, rng):
+    """Случайные искажения; возвращает новые списки и названия примененных искажений"""
+    verts = [list(co) for co in verts]
+    faces = [list(face) for face in faces]
+    applied = []
+
+    if rng.random() < 0.5:
+        # Вторая оболочка, сдвинутая так, что пересекает первую
+        shift = [rng.uniform(0.2, 0.8) for _axis in range(3)]
+        offset = len(verts)
+        verts += [[co[axis] + shift[axis] for axis in range(3)] for co in verts]
+        faces += [[v + offset for v in face] for face in faces]
+        applied.append("shell")
+    if rng.random() < 0.5:
+        for face in rng.sample(range(len(faces)), max(1, len(faces) // 20)):
+            faces[face] = None
+        faces = [face for face in faces if face is not None]
+        applied.append("holes")
+    if rng.random() < 0.5:
+        for v in rng.sample(range(len(verts)), max(1, len(verts) // 10)):
+            verts[v] = [co + rng.gauss(0.0, 0.02) for co in verts[v]]
+        applied.append("jitter")
+    if rng.random() < 0.5:
+        for face in rng.sample(range(len(faces)), max(1, len(faces) // 10)):
+            faces[face].reverse()
+        applied.append("flips")
+    if rng.random() < 0.5:
+        for face in rng.sample(range(len(faces)), max(1, len(faces) // 20)):
+            # Дубликат с другой начальной вершиной
+            shift = rng.randrange(len(faces[face]))
+            faces.append(faces[face][shift:] + faces[face][:shift])
+        applied.append("duplicates")
+    if rng.random() < 0.3:
+        for face in rng.sample(range(len(faces)), max(1, len(faces) // 50)):
+            # Вершина грани переносится в соседнюю: нулевая площадь или нулевое ребро
+            first, second = faces[face][0], faces[face][1]
+            verts[second] = list(verts[first])
+        applied.append("collapse")
+    return verts, faces, applied
+
+
+def build_mesh(name, verts, faces):
+    import bpy
+
+    mesh = bpy.data.meshes.new(name)
+    # Без validate(): дубликаты и вырожденные грани должны остаться в меше
+    mesh.from_pydata(verts, [], faces)
+    mesh.update()
+    return mesh
+
+
+def reference_face_checks(bm, tolerance):
+    """Дубликаты, вырожденные грани и нулевые ребра прямым обходом BMesh"""
+    seen = set()
+    duplicates = []
+    degenerate = []
+    for face in bm.faces:
+        key = frozenset(v.index for v in face.verts)
+        if key in seen:
+            duplicates.append(face.index)
+        seen.add(key)
+        longest = max(e.calc_length() for e in face.edges)
+        if 2.0 * face.calc_area() <= tolerance * longest:
+            degenerate.append(face.index)
+    return {
+        "duplicate_faces": duplicates,
+        "degenerate_faces": degenerate,
+        "zero_length_edges": [e.index for e in bm.edges if e.calc_length() <= tolerance],
+    }
+
+
+def run_reference(wtc, mesh, tolerance):
+    import bmesh
+
+    started = time.perf_counter()
+    bm = bmesh.new()
+    try:
+        bm.from_mesh(mesh)
+        bm.verts.ensure_lookup_table()
+        bm.edges.ensure_lookup_table()
+        bm.faces.ensure_lookup_table()
+        result = wtc.WatertightAnalyzer(weld_tolerance=tolerance).analyze_bmesh(bm)
+        indices = {key: set(values) for key, values in result["indices"].items()}
+        indices.update({key: set(values) for key, values in reference_face_checks(bm, tolerance).items()})
+    finally:
+        bm.free()
+    return indices, time.perf_counter() - started, result["timings"]["intersections"]
+
+
+def run_arrays(wtc, mesh, tolerance):
+    started = time.perf_counter()
+    result = wtc.WatertightAnalyzer(weld_tolerance=tolerance, intersection_workers=1).analyze_mesh(mesh)
+    indices = {key: set(values) for key, values in result["indices"].items()}
+    return indices, time.perf_counter() - started
+
+
+def run_preview(wtc, mesh):
+    """Точные счетчики preview_mesh: категория -> число элементов"""
+    started = time.perf_counter()
+    result = wtc.WatertightAnalyzer().preview_mesh(mesh)
+    counts = {key: int(result["estimates"][key][0]) for key in result["exact"]}
+    return counts, time.perf_counter() - started
+
+
+def run_partitioned(wtc, mesh, workers):
+    from watertight_checker import intersections
+
+    started = time.perf_counter()
+    arrays = wtc.mesh_arrays(mesh)
+    faces, stats = intersections.find_intersecting_faces(
+        arrays["coords"], arrays["loop_verts"], arrays["loop_starts"], arrays["loop_totals"],
+        triangles=wtc.mesh_loop_triangles(mesh), workers=workers,
+        cell_triangles=HARNESS_CELL_TRIANGLES, parallel_min=0)
+    return set(faces.tolist()), time.perf_counter() - started, stats
+
+
+def compare(expected, actual, categories):
+    """Расхождения: категория -> (лишние, пропущенные)"""
+    mismatches = {}
+    for key in categories:
+        extra = actual.get(key, set()) - expected.get(key, set())
+        missing = expected.get(key, set()) - actual.get(key, set())
+        if extra or missing:
+            mismatches[key] = (sorted(extra), sorted(missing))
+    return mismatches
+
+
+def compare_counts(expected, counts):
+    """Расхождения счетчиков: категория -> (ожидаемое число, полученное)"""
+    return {
+        key: (len(expected.get(key, ())), count)
+        for key, count in counts.items() if count != len(expected.get(key, ()))
+    }
+
+
+def describe(engine, mismatches):
+    lines = []
+    for key, (extra, missing) in sorted(mismatches.items()):
+        lines.append(f"    {engine}/{key}: лишние {extra[:10]}, пропущенные {missing[:10]}")
+    return lines
+
+
+def add_package_path():
+    """Пакет аддона лежит уровнем выше этого файла"""
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if package_dir not in sys.path:
+        sys.path.insert(0, package_dir)
+
+
+def measure_registration(repeats):
+    """Время импорта пакета и цикла register/unregister, мс"""
+    import importlib
+
+    add_package_path()
+    started = time.perf_counter()
+    package = importlib.import_module("watertight_checker")
+    import_time = time.perf_counter() - started
+
+    register_times = []
+    unregister_times = []
+    for _repeat in range(repeats):
+        started = time.perf_counter()
+        package.register()
+        register_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        package.unregister()
+        unregister_times.append(time.perf_counter() - started)
+
+    register_times.sort()
+    unregister_times.sort()
+    print(f"Регистрация: импорт {import_time * 1000:.1f} мс, "
+          f"register {register_times[len(register_times) // 2] * 1000:.2f} мс (медиана), "
+          f"unregister {unregister_times[len(unregister_times) // 2] * 1000:.2f} мс (медиана), "
+          f"повторов {repeats}", flush=True)
+
+
+def run(cases, seed, workers, tolerance):
+    """Прогоняет корпус и возвращает число случаев с расхождениями"""
+    import bpy
+
+    add_package_path()
+    from watertight_checker import watertight_checker as wtc
+
+    rng = random.Random(seed)
+    failed = 0
+    totals = {"reference": 0.0, "arrays": 0.0, "preview": 0.0, "bvh": 0.0, "partitioned": 0.0}
+    for case in range(cases):
+        kind = rng.choice(("cube", "uvsphere", "icosphere", "cone", "grid"))
+        verts, faces = primitive(kind, rng)
+        verts, faces, applied = fuzz(verts, faces, rng)
+        name = f"{case:03d}_{kind}" + "".join("+" + item for item in applied)
+
+        mesh = build_mesh(name, verts, faces)
+        try:
+            reference, reference_time, bvh_time = run_reference(wtc, mesh, tolerance)
+            arrays, arrays_time = run_arrays(wtc, mesh, tolerance)
+            preview, preview_time = run_preview(wtc, mesh)
+            partitioned, partitioned_time, stats = run_partitioned(wtc, mesh, workers)
+        finally:
+            bpy.data.meshes.remove(mesh)
+
+        mismatches = describe("arrays", compare(reference, arrays, ARRAYS_CATEGORIES))
+        mismatches += [
+            f"    preview/{key}: {count} вместо {expected}"
+            for key, (expected, count) in sorted(compare_counts(reference, preview).items())]
+        mismatches += describe("partitioned", compare(
+            reference, {"intersecting_faces": partitioned}, ["intersecting_faces"]))
+
+        totals["reference"] += reference_time
+        totals["arrays"] += arrays_time
+        totals["preview"] += preview_time
+        totals["bvh"] += bvh_time
+        totals["partitioned"] += partitioned_time
+        status = "OK  " if not mismatches else "FAIL"
+        print(f"{status} {name}: {len(faces)} граней, эталон {reference_time:.3f} с, "
+              f"arrays {arrays_time:.3f} с (x{reference_time / max(arrays_time, 1e-9):.1f}), "
+              f"preview {preview_time:.3f} с, "
+              f"пересечения BVH {bvh_time:.3f} с / ячейки {partitioned_time:.3f} с "
+              f"(ячеек {stats['cells']}, процессов {stats['workers']})", flush=True)
+        for line in mismatches:
+            print(line, flush=True)
+        if mismatches:
+            failed += 1
+
+    print(f"Итого: {cases - failed}/{cases} совпали; "
+          f"arrays x{totals['reference'] / max(totals['arrays'], 1e-9):.2f}, "
+          f"preview x{totals['reference'] / max(totals['preview'], 1e-9):.2f}, "
+          f"ячейки x{totals['bvh'] / max(totals['partitioned'], 1e-9):.2f} относительно BVH", flush=True)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение движков проверки с эталоном на BMesh")
+    parser.add_argument("--cases", type=int, default=40, help="Число мешей в корпусе")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора корпуса")
+    parser.add_argument("--workers", type=int, default=2, help="Процессов для поиска самопересечений")
+    parser.add_argument("--tolerance", type=float, default=0.0001, help="Допуск сварки и вырожденности")
+    parser.add_argument("--registration", type=int, default=0, metavar="N",
+                        help="Замерить время импорта и N циклов register/unregister")
+    args = parser.parse_args(argv)
+    # Замер до корпуса: импорт пакета должен быть первым
+    if args.registration:
+        measure_registration(args.registration)
+    return 1 if run(args.cases, args.seed, args.workers, args.tolerance) else 0
+
+
+if __name__ == "__main__":
+    # Внутри Blender аргументы скрипта идут после "--"
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    sys.exit(main(argv))
@@ -0,0 +1,469 @@
+"""Поиск самопересечений, разбитый на ячейки октодерева и выполняемый пулом процессов.
+
+Треугольники меша раскладываются по листьям октодерева: треугольник попадает
+в каждый лист, с которым пересекается его габарит, расширенный на epsilon
+(перекрытие ячеек). Каждый лист обрабатывается независимо - в отдельном
+процессе, если треугольников много: широкая фаза по иерархической сетке внутри
+ячейки и точная проверка пересечения треугольников по теореме о разделяющей
+оси. Пары, найденные в нескольких ячейках, объединяются без повторов.
+
+Смысл проверки совпадает с BVHTree.overlap: пересекающимися считаются грани,
+у которых пересекаются треугольники, а общих вершин нет.
+
+Для копий (instances) одного или разных мешей проверяются только пары копий
+с пересекающимися мировыми габаритами: в мировые координаты переводятся
+только копии из таких пар, каждая по одному разу.
+
+Модуль зависит только от NumPy и не использует относительный импорт:
+дочерние процессы импортируют этот файл как модуль верхнего уровня, потому
+что импорт пакета аддона потянул бы bpy, которого в них нет.
+"""
+import importlib
+import os
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+# Расширение габаритов треугольников (как epsilon у BVHTree.FromBMesh)
+EPSILON = 0.0001
+
+# Целевое число треугольников в листе октодерева
+CELL_TRIANGLES = 20000
+
+# Глубина октодерева ограничена: крупные треугольники попадают во многие ячейки
+MAX_DEPTH = 8
+
+# С какого числа треугольников имеет смысл запускать процессы
+PARALLEL_MIN_TRIANGLES = 100000
+
+# Габарит, перекрывающий больше ячеек сетки, переходит на уровень с более крупными ячейками
+MAX_TRIANGLE_CELLS = 64
+
+# Размер порции пар при точной проверке (ограничивает память)
+PAIR_CHUNK = 100000
+
+# Относительный порог вырожденной разделяющей оси
+AXIS_EPSILON = 1e-9
+
+# Относительный допуск компланарности пары треугольников
+COPLANAR_EPSILON = 1e-6
+
+# Лимит кеша треугольников копий в мировых координатах, байт
+WORLD_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def fan_triangles(loop_verts, loop_starts, loop_totals):
+    """Разбивает грани веером на треугольники: (вершины (T, 3), грань треугольника (T,))"""
+    loop_verts = np.asarray(loop_verts, dtype=np.int64)
+    loop_starts = np.asarray(loop_starts, dtype=np.int64)
+    counts = np.maximum(np.asarray(loop_totals, dtype=np.int64) - 2, 0)
+    tri_faces = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    first = loop_starts[tri_faces]
+    tris = np.column_stack((
+        loop_verts[first],
+        loop_verts[first + local],
+        loop_verts[first + local + 1],
+    ))
+    return tris, tri_faces
+
+
+def octree_cells(tri_lo, tri_hi, target=CELL_TRIANGLES, max_depth=MAX_DEPTH):
+    """Листья октодерева: списки индексов треугольников, чьи габариты задевают лист"""
+    if not len(tri_lo):
+        return []
+    cells = []
+    stack = [(tri_lo.min(axis=0), tri_hi.max(axis=0), np.arange(len(tri_lo)), 0)]
+    while stack:
+        lo, hi, members, depth = stack.pop()
+        if len(members) <= target or depth >= max_depth:
+            cells.append(members)
+            continue
+        middle = (lo + hi) * 0.5
+        member_lo = tri_lo[members]
+        member_hi = tri_hi[members]
+        for octant in range(8):
+            bits = [(octant >> axis) & 1 for axis in range(3)]
+            child_lo = np.where(bits, middle, lo)
+            child_hi = np.where(bits, hi, middle)
+            inside = np.all((member_lo <= child_hi) & (member_hi >= child_lo), axis=1)
+            child = members[inside]
+            if len(child):
+                stack.append((child_lo, child_hi, child, depth + 1))
+    return cells
+
+
+def _cell_span(lo, hi, size):
+    """Первая ячейка и число ячеек по осям для габаритов при размере ячейки size"""
+    first = np.floor(lo / size).astype(np.int64)
+    last = np.floor(hi / size).astype(np.int64)
+    return first, last - first + 1
+
+
+def _expand_cells(first, span):
+    """Развертка габаритов по всем задетым ячейкам: (номер габарита, ячейка (n, 3))"""
+    totals = span.prod(axis=1)
+    item = np.repeat(np.arange(len(first)), totals)
+    local = np.arange(int(totals.sum())) - np.repeat(np.cumsum(totals) - totals, totals)
+    sy = span[item, 1]
+    sz = span[item, 2]
+    cell = first[item] + np.column_stack((local // (sy * sz), (local // sz) % sy, local % sz))
+    return item, cell
+
+
+def _same_cell_pairs(keys, items):
+    """Пары элементов с одинаковым ключом ячейки"""
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    items = items[order]
+    # Для каждого элемента - число следующих за ним элементов той же ячейки
+    boundaries = np.flatnonzero(np.diff(keys)) + 1
+    group_end = np.append(boundaries, len(keys))
+    group_end = group_end[np.searchsorted(boundaries, np.arange(len(keys)), side="right")]
+    following = group_end - np.arange(len(keys)) - 1
+    left = np.repeat(np.arange(len(keys)), following)
+    offset = np.arange(int(following.sum())) - np.repeat(np.cumsum(following) - following, following) + 1
+    return items[left], items[left + offset]
+
+
+def _cross_cell_pairs(keys_a, items_a, keys_b, items_b):
+    """Пары (элемент A, элемент B) с одинаковым ключом ячейки"""
+    order = np.argsort(keys_b, kind="stable")
+    keys_b = keys_b[order]
+    items_b = items_b[order]
+    start = np.searchsorted(keys_b, keys_a, side="left")
+    count = np.searchsorted(keys_b, keys_a, side="right") - start
+    left = np.repeat(np.arange(len(keys_a)), count)
+    offset = np.arange(int(count.sum())) - np.repeat(np.cumsum(count) - count, count)
+    return items_a[left], items_b[np.repeat(start, count) + offset]
+
+
+def grid_pairs(lo, hi):
+    """Пары габаритов (треугольников, копий) с общими ячейками иерархической сетки (i < j).
+
+    Размер ячейки нулевого уровня - медиана габаритов. Габарит, задевающий
+    больше MAX_TRIANGLE_CELLS ячеек, переходит на уровень с вдвое большими
+    ячейками, пока не уложится в лимит. На своем уровне габарит сравнивается
+    с габаритами того же уровня и с более мелкими, разложенными по ячейкам
+    этого уровня, поэтому крупный треугольник получает в пары только соседей,
+    а не все треугольники ячейки октодерева.
+    """
+    count = len(lo)
+    if count < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+    extent = (hi - lo).max(axis=1)
+    size = float(np.median(extent)) or 1.0
+
+    level = np.zeros(count, dtype=np.int64)
+    first, span = _cell_span(lo, hi, size)
+    pending = np.flatnonzero(span.prod(axis=1) > MAX_TRIANGLE_CELLS)
+    while len(pending):
+        level[pending] += 1
+        scale = size * np.ldexp(1.0, level[pending])[:, None]
+        _first, pending_span = _cell_span(lo[pending], hi[pending], scale)
+        pending = pending[pending_span.prod(axis=1) > MAX_TRIANGLE_CELLS]
+
+    pairs = []
+    for current in np.unique(level).tolist():
+        members = np.flatnonzero(level == current)
+        finer = np.flatnonzero(level < current)
+        items = np.concatenate((members, finer))
+        first, span = _cell_span(lo[items], hi[items], size * np.ldexp(1.0, current))
+        entry, cell = _expand_cells(first, span)
+        cell -= cell.min(axis=0)
+        dims = cell.max(axis=0) + 1
+        keys = (cell[:, 0] * dims[1] + cell[:, 1]) * dims[2] + cell[:, 2]
+        own = entry < len(members)
+
+        a, b = _same_cell_pairs(keys[own], items[entry[own]])
+        if current:
+            # Крупные габариты в пары только с перекрывающимися мелкими
+            cross_a, cross_b = _cross_cell_pairs(keys[own], items[entry[own]], keys[~own], items[entry[~own]])
+            overlap = np.all((lo[cross_a] <= hi[cross_b]) & (lo[cross_b] <= hi[cross_a]), axis=1)
+            a = np.concatenate((a, cross_a[overlap]))
+            b = np.concatenate((b, cross_b[overlap]))
+        pairs.append(np.column_stack((np.minimum(a, b), np.maximum(a, b))))
+
+    pairs = np.concatenate(pairs)
+    return np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+
+
+def _axes_separate(axes, reference, tri_a, tri_b):
+    """Для каждой пары: есть ли среди осей разделяющая"""
+    length = np.linalg.norm(axes, axis=2)
+    valid = length > AXIS_EPSILON * reference
+    proj_a = np.einsum("mkd,mvd->mkv", axes, tri_a)
+    proj_b = np.einsum("mkd,mvd->mkv", axes, tri_b)
+    gap = (proj_a.max(axis=2) < proj_b.min(axis=2)) | (proj_b.max(axis=2) < proj_a.min(axis=2))
+    return np.any(gap & valid, axis=1)
+
+
+def triangles_intersect(tri_a, tri_b):
+    """Пересекаются ли треугольники попарно (массивы (m, 3, 3)).
+
+    Теорема о разделяющей оси: нормали, попарные векторные произведения
+    сторон и нормали сторон в плоскостях треугольников. Касание считается
+    пересечением. Компланарные пары (и вырожденные треугольники) не считаются
+    пересекающимися, как в BVHTree.overlap: наложение в одной плоскости
+    находит проверка компланарных перекрытий.
+    """
+    edges_a = np.roll(tri_a, -1, axis=1) - tri_a
+    edges_b = np.roll(tri_b, -1, axis=1) - tri_b
+    normal_a = np.cross(edges_a[:, 0], edges_a[:, 1])
+    normal_b = np.cross(edges_b[:, 0], edges_b[:, 1])
+    len_a = np.linalg.norm(edges_a, axis=2)
+    len_b = np.linalg.norm(edges_b, axis=2)
+    len_na = np.linalg.norm(normal_a, axis=1)
+    len_nb = np.linalg.norm(normal_b, axis=1)
+
+    axes = [normal_a, normal_b]
+    reference = [len_a[:, 0] * len_a[:, 1], len_b[:, 0] * len_b[:, 1]]
+    for i in range(3):
+        for j in range(3):
+            axes.append(np.cross(edges_a[:, i], edges_b[:, j]))
+            reference.append(len_a[:, i] * len_b[:, j])
+    for i in range(3):
+        axes.append(np.cross(normal_a, edges_a[:, i]))
+        reference.append(len_na * len_a[:, i])
+        axes.append(np.cross(normal_b, edges_b[:, i]))
+        reference.append(len_nb * len_b[:, i])
+
+    axes = np.stack(axes, axis=1)
+    reference = np.stack(reference, axis=1)
+
+    # Компланарность: параллельные нормали и вершины B в плоскости A
+    scale = np.maximum(len_a.max(axis=1), len_b.max(axis=1))
+    parallel = np.linalg.norm(np.cross(normal_a, normal_b), axis=1) <= COPLANAR_EPSILON * len_na * len_nb
+    distance = np.abs(np.einsum("md,mvd->mv", normal_a, tri_b - tri_a[:, :1])).max(axis=1)
+    coplanar = parallel & (distance <= COPLANAR_EPSILON * len_na * scale)
+    return ~_axes_separate(axes, reference, tri_a, tri_b) & ~coplanar
+
+
+def find_cell_pairs(tri_coords, tri_verts, tri_ids, epsilon=EPSILON):
+    """Пересекающиеся пары треугольников одной ячейки (глобальные индексы).
+
+    Выполняется в дочернем процессе: на вход только массивы NumPy.
+    """
+    if len(tri_coords) < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+    lo = tri_coords.min(axis=1) - epsilon
+    hi = tri_coords.max(axis=1) + epsilon
+    candidates = grid_pairs(lo, hi)
+
+    # Габариты должны перекрываться по всем осям
+    a, b = candidates[:, 0], candidates[:, 1]
+    keep = np.all((lo[a] <= hi[b]) & (lo[b] <= hi[a]), axis=1)
+    # Треугольники с общей вершиной не проверяются (как в BVHTree.overlap)
+    shared = (tri_verts[a][:, :, None] == tri_verts[b][:, None, :]).any(axis=(1, 2))
+    candidates = candidates[keep & ~shared]
+
+    found = []
+    for start in range(0, len(candidates), PAIR_CHUNK):
+        chunk = candidates[start:start + PAIR_CHUNK]
+        hits = triangles_intersect(tri_coords[chunk[:, 0]], tri_coords[chunk[:, 1]])
+        found.append(chunk[hits])
+    if not found:
+        return np.zeros((0, 2), dtype=np.int64)
+    return tri_ids[np.concatenate(found)]
+
+
+def _worker_module():
+    """Этот же файл, импортированный как модуль верхнего уровня (для дочерних процессов)"""
+    name = os.path.splitext(os.path.basename(__file__))[0]
+    module = importlib.import_module(name)
+    if os.path.abspath(getattr(module, "__file__", "")) != os.path.abspath(__file__):
+        raise ImportError(f"Модуль {name} перекрыт другим модулем")
+    return module
+
+
+def _run_parallel(tasks, workers):
+    """Обрабатывает ячейки в пуле процессов (контекст spawn)"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Дочерние процессы получают sys.path родителя при запуске
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    added = module_dir not in sys.path
+    if added:
+        sys.path.insert(0, module_dir)
+    try:
+        worker = _worker_module()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            return list(pool.map(worker.find_cell_pairs, *zip(*tasks)))
+    finally:
+        if added:
+            sys.path.remove(module_dir)
+
+
+def _faces_share_vertex(face_a, face_b, loop_verts, loop_starts, loop_totals):
+    start_a = loop_starts[face_a]
+    start_b = loop_starts[face_b]
+    verts_a = set(loop_verts[start_a:start_a + loop_totals[face_a]].tolist())
+    return not verts_a.isdisjoint(loop_verts[start_b:start_b + loop_totals[face_b]].tolist())
+
+
+def find_intersecting_faces(coords, loop_verts, loop_starts, loop_totals, triangles=None,
+                            epsilon=EPSILON, workers=None, cell_triangles=CELL_TRIANGLES,
+                            parallel_min=PARALLEL_MIN_TRIANGLES):
+    """Индексы самопересекающихся граней.
+
+    triangles - готовое разбиение (вершины (T, 3), грань (T,)), например
+    loop_triangles меша; без него грани разбиваются веером.
+    workers - число процессов (None - по числу ядер, 1 - без процессов).
+    parallel_min - с какого числа треугольников запускать процессы.
+    Возвращает (индексы граней, статистика: cells, workers, parallel).
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    loop_verts = np.asarray(loop_verts, dtype=np.int64)
+    loop_starts = np.asarray(loop_starts, dtype=np.int64)
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+    if triangles is None:
+        triangles = fan_triangles(loop_verts, loop_starts, loop_totals)
+    tris, tri_faces = (np.asarray(array, dtype=np.int64) for array in triangles)
+    tris = tris.reshape(-1, 3)
+
+    tri_coords = coords[tris]
+    tri_lo = tri_coords.min(axis=1) - epsilon
+    tri_hi = tri_coords.max(axis=1) + epsilon
+    cells = octree_cells(tri_lo, tri_hi, cell_triangles)
+    tasks = [(tri_coords[cell], tris[cell], cell, epsilon) for cell in cells]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    stats = {"cells": len(cells), "workers": 1, "parallel": False}
+    results = None
+    if workers > 1 and len(tasks) > 1 and len(tris) >= parallel_min:
+        try:
+            results = _run_parallel(tasks, min(workers, len(tasks)))
+            stats["workers"] = min(workers, len(tasks))
+            stats["parallel"] = True
+        except Exception as e:
+            # Без процессов (нет spawn, перекрыт модуль и т.п.) - в текущем процессе
+            stats["error"] = f"{type(e).__name__}: {e}"
+    if results is None:
+        results = [find_cell_pairs(*task) for task in tasks]
+
+    pairs = np.concatenate(results) if results else np.zeros((0, 2), dtype=np.int64)
+    face_pairs = np.sort(tri_faces[pairs], axis=1) if len(pairs) else np.zeros((0, 2), dtype=np.int64)
+    face_pairs = np.unique(face_pairs[face_pairs[:, 0] != face_pairs[:, 1]], axis=0)
+
+    # Грани с общей вершиной смежны и пересечением не считаются
+    faces = set()
+    for face_a, face_b in face_pairs.tolist():
+        if not _faces_share_vertex(face_a, face_b, loop_verts, loop_starts, loop_totals):
+            faces.add(face_a)
+            faces.add(face_b)
+    return np.array(sorted(faces), dtype=np.int64), stats
+
+
+def crossing_pairs(tri_a, tri_b, epsilon=EPSILON):
+    """Пересекающиеся пары треугольников из двух разных наборов (массивы (n, 3, 3)).
+
+    Общие вершины не учитываются: наборы принадлежат разным копиям.
+    Возвращает массив (m, 2) индексов в tri_a и tri_b.
+    """
+    empty = np.zeros((0, 2), dtype=np.int64)
+    if not len(tri_a) or not len(tri_b):
+        return empty
+    lo_a = tri_a.min(axis=1) - epsilon
+    hi_a = tri_a.max(axis=1) + epsilon
+    lo_b = tri_b.min(axis=1) - epsilon
+    hi_b = tri_b.max(axis=1) + epsilon
+
+    # Только треугольники внутри общего габарита наборов
+    box_lo = np.maximum(lo_a.min(axis=0), lo_b.min(axis=0))
+    box_hi = np.minimum(hi_a.max(axis=0), hi_b.max(axis=0))
+    keep_a = np.flatnonzero(np.all((lo_a <= box_hi) & (hi_a >= box_lo), axis=1))
+    keep_b = np.flatnonzero(np.all((lo_b <= box_hi) & (hi_b >= box_lo), axis=1))
+    if not len(keep_a) or not len(keep_b):
+        return empty
+
+    count_a = len(keep_a)
+    lo = np.concatenate((lo_a[keep_a], lo_b[keep_b]))
+    hi = np.concatenate((hi_a[keep_a], hi_b[keep_b]))
+    candidates = grid_pairs(lo, hi)
+    candidates = candidates[(candidates[:, 0] < count_a) & (candidates[:, 1] >= count_a)]
+    a, b = candidates[:, 0], candidates[:, 1]
+    candidates = candidates[np.all((lo[a] <= hi[b]) & (lo[b] <= hi[a]), axis=1)]
+
+    found = []
+    for start in range(0, len(candidates), PAIR_CHUNK):
+        chunk = candidates[start:start + PAIR_CHUNK]
+        first = keep_a[chunk[:, 0]]
+        second = keep_b[chunk[:, 1] - count_a]
+        hits = triangles_intersect(tri_a[first], tri_b[second])
+        found.append(np.column_stack((first[hits], second[hits])))
+    return np.concatenate(found) if found else empty
+
+
+def world_bounds(coords, matrices):
+    """Мировые габариты копий меша: coords (V, 3), matrices (N, 4, 4)"""
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    lo, hi = coords.min(axis=0), coords.max(axis=0)
+    corners = np.array([(x, y, z) for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])])
+    world = np.einsum("nij,kj->nki", matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+    return world.min(axis=1), world.max(axis=1)
+
+
+def crossing_instances(sources, epsilon=EPSILON, cache_bytes=WORLD_CACHE_BYTES):
+    """Пары пересекающихся копий.
+
+    sources - список словарей с массивами coords (V, 3), tris (T, 3) и
+    matrices (N, 4, 4) мировых матриц копий этого меша.
+    Треугольники копии переводятся в мировые координаты один раз и хранятся
+    в кеше до cache_bytes байт: кандидаты идут по возрастанию первой копии,
+    поэтому она переиспользуется для всех своих пар.
+    Возвращает список пар ((источник, копия), (источник, копия)).
+    """
+    owners = []
+    lows = []
+    highs = []
+    prepared = {}
+    for number, source in enumerate(sources):
+        if not len(source["coords"]) or not len(source["tris"]) or not len(source["matrices"]):
+            continue
+        coords = np.asarray(source["coords"], dtype=np.float64).reshape(-1, 3)
+        matrices = np.asarray(source["matrices"], dtype=np.float64).reshape(-1, 4, 4)
+        prepared[number] = (coords, np.asarray(source["tris"], dtype=np.int64).reshape(-1, 3), matrices)
+        lo, hi = world_bounds(coords, matrices)
+        owners.extend((number, instance) for instance in range(len(lo)))
+        lows.append(lo - epsilon)
+        highs.append(hi + epsilon)
+    if len(owners) < 2:
+        return []
+
+    lo = np.concatenate(lows)
+    hi = np.concatenate(highs)
+    candidates = grid_pairs(lo, hi)
+    a, b = candidates[:, 0], candidates[:, 1]
+    candidates = candidates[np.all((lo[a] <= hi[b]) & (lo[b] <= hi[a]), axis=1)]
+
+    cache = OrderedDict()
+    cached = 0
+
+    def world_triangles(index):
+        nonlocal cached
+        triangles = cache.get(index)
+        if triangles is not None:
+            cache.move_to_end(index)
+            return triangles
+        number, instance = owners[index]
+        coords, tris, matrices = prepared[number]
+        matrix = matrices[instance]
+        triangles = (coords @ matrix[:3, :3].T + matrix[:3, 3])[tris]
+        cache[index] = triangles
+        cached += triangles.nbytes
+        while cached > cache_bytes and len(cache) > 2:
+            cached -= cache.popitem(last=False)[1].nbytes
+        return triangles
+
+    crossing = []
+    for first, second in candidates.tolist():
+        tri_a = world_triangles(first)
+        tri_b = world_triangles(second)
+        if len(crossing_pairs(tri_a, tri_b, epsilon)):
+            crossing.append((owners[first], owners[second]))
+    return crossing
@@ -0,0 +1,130 @@
+"""Группировка проблемных элементов в пространственные острова.
+
+Элементы одной категории объединяются в остров, если у них есть общая
+вершина. Элементы, не связанные ни с одним другим (отдельные вершины,
+разрозненные грани), дополнительно объединяются по равномерной сетке:
+с одиночками и элементами из той же или соседней ячейки.
+
+Острова хранятся компактно: массив смещений offsets и плоский массив members
+с позициями элементов во входном списке. Для каждого острова хранятся центр
+(centers, по три числа) и габарит (bounds, по шесть чисел: min xyz, max xyz).
+
+Модуль не зависит от bpy: координаты вершин передаются кортежами (x, y, z),
+элементы - кортежами индексов своих вершин.
+"""
+from . import spatial_hash
+
+
+def _find(parent, i):
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    # Сжатие путей
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+    return root
+
+
+def _union(parent, a, b):
+    ra = _find(parent, a)
+    rb = _find(parent, b)
+    if ra != rb:
+        parent[max(ra, rb)] = min(ra, rb)
+
+
+def element_centers(points, element_verts):
+    """Центры элементов как среднее их вершин"""
+    centers = []
+    for verts in element_verts:
+        count = len(verts)
+        centers.append((
+            sum(points[v][0] for v in verts) / count,
+            sum(points[v][1] for v in verts) / count,
+            sum(points[v][2] for v in verts) / count,
+        ))
+    return centers
+
+
+def cluster_elements(points, element_verts, merge_distance=0.0):
+    """Разбивает элементы на острова.
+
+    element_verts - список кортежей индексов вершин для каждого элемента.
+    merge_distance - размер ячейки сетки для несвязанных элементов
+    (0 - только связность).
+    Возвращает словарь offsets, members, centers, bounds; острова отсортированы
+    по убыванию числа элементов.
+    """
+    count = len(element_verts)
+    parent = list(range(count))
+
+    # Связность: элементы с общей вершиной
+    owner = {}
+    for i, verts in enumerate(element_verts):
+        for v in verts:
+            first = owner.setdefault(v, i)
+            if first != i:
+                _union(parent, first, i)
+
+    centers = element_centers(points, element_verts)
+
+    if merge_distance > 0.0 and count:
+        sizes = {}
+        for i in range(count):
+            root = _find(parent, i)
+            sizes[root] = sizes.get(root, 0) + 1
+        single = [sizes[_find(parent, i)] == 1 for i in range(count)]
+
+        # Одиночки ячейки объединяются между собой и с любым связанным
+        # элементом той же ячейки
+        grid = spatial_hash.build_grid(centers, merge_distance)
+        representative = {}
+        for key, bucket in grid.items():
+            rep = -1
+            anchor = -1
+            for i in bucket:
+                if single[i]:
+                    if rep < 0:
+                        rep = i
+                    else:
+                        _union(parent, rep, i)
+                elif anchor < 0:
+                    anchor = i
+            if rep >= 0:
+                if anchor >= 0:
+                    _union(parent, rep, anchor)
+                representative[key] = rep
+
+        # Соседние ячейки с одиночками сливаются
+        for (cx, cy, cz), rep in representative.items():
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for dz in (-1, 0, 1):
+                        other = representative.get((cx + dx, cy + dy, cz + dz))
+                        if other is not None and other != rep:
+                            _union(parent, rep, other)
+
+    groups = {}
+    for i in range(count):
+        groups.setdefault(_find(parent, i), []).append(i)
+    ordered = sorted(groups.values(), key=lambda members: (-len(members), members[0]))
+
+    result = {"offsets": [0], "members": [], "centers": [], "bounds": []}
+    for members in ordered:
+        result["members"].extend(members)
+        result["offsets"].append(len(result["members"]))
+
+        cx = sum(centers[i][0] for i in members) / len(members)
+        cy = sum(centers[i][1] for i in members) / len(members)
+        cz = sum(centers[i][2] for i in members) / len(members)
+        result["centers"].extend((cx, cy, cz))
+
+        lo = [float("inf")] * 3
+        hi = [float("-inf")] * 3
+        for i in members:
+            for v in element_verts[i]:
+                co = points[v]
+                for axis in range(3):
+                    lo[axis] = min(lo[axis], co[axis])
+                    hi[axis] = max(hi[axis], co[axis])
+        result["bounds"].extend(lo + hi)
+    return result
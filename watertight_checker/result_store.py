@@ -0,0 +1,81 @@
+"""Сессионное хранилище результатов проверки.
+
+Результаты держатся в памяти процесса, а не в ID-свойствах объектов, поэтому
+проверка не создает тяжелый шаг отмены и не помечает .blend как измененный.
+Ключ объекта - session_uid, плюс session_uid меша: если объекту подменили
+данные, старый результат считается недействительным.
+
+Сохранение в файл выполняется явно (см. оператор сохранения результатов).
+"""
+from array import array
+
+# session_uid объекта -> (session_uid меша, результат)
+_object_results = {}
+
+# session_uid сцены -> состояние отчета и навигации
+_scene_states = {}
+
+
+def compact_result(result):
+    """Переводит списки индексов и метрик в компактные массивы array"""
+    compact = dict(result)
+    compact["indices"] = {
+        prop_name: array('i', values) for prop_name, values in result["indices"].items()
+    }
+    loops = result.get("loops", {})
+    compact["loops"] = {
+        key: array('d' if key in ("perimeters", "areas", "planarity") else 'i', values)
+        for key, values in loops.items()
+    }
+    compact["islands"] = {
+        problem_type: {
+            key: array('d' if key in ("centers", "bounds") else 'i', values)
+            for key, values in data.items()
+        }
+        for problem_type, data in result.get("islands", {}).items()
+    }
+    return compact
+
+
+def set_result(obj, result):
+    """Запоминает результат проверки объекта"""
+    _object_results[obj.session_uid] = (obj.data.session_uid, compact_result(result))
+
+
+def get_result(obj):
+    """Результат проверки объекта или None, если его нет или меш подменен"""
+    entry = _object_results.get(obj.session_uid)
+    if entry is None:
+        return None
+    mesh_uid, result = entry
+    if obj.data is None or obj.data.session_uid != mesh_uid:
+        return None
+    return result
+
+
+def discard_result(obj):
+    _object_results.pop(obj.session_uid, None)
+
+
+def scene_state(scene):
+    """Состояние отчета и навигации сцены (создается по требованию)"""
+    state = _scene_states.get(scene.session_uid)
+    if state is None:
+        state = {
+            "report": "",
+            "error_types": set(),
+            "problem_type": "",
+            "focus_index": -1,
+        }
+        _scene_states[scene.session_uid] = state
+    return state
+
+
+def has_scene_state(scene):
+    return scene.session_uid in _scene_states
+
+
+def clear():
+    """Сбрасывает все результаты (загрузка другого файла, выгрузка аддона)"""
+    _object_results.clear()
+    _scene_states.clear()
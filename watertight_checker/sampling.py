@@ -0,0 +1,115 @@
+"""Стратифицированная выборка элементов и оценка числа проблем по выборке.
+
+Элементы раскладываются по ячейкам равномерной сетки по габариту меша
+(страты). Из каждой страты берется в среднем доля fraction элементов
+(и хотя бы один), поэтому выборка покрывает весь меш, а не только плотные
+участки. Сетка не мельче GRID_CELLS^3 и не больше fraction * N страт: иначе
+на мешах меньше GRID_CELLS^3 / fraction элементов минимум в один элемент на
+страту перекрывал бы fraction.
+
+Число проблемных элементов оценивается стратифицированной оценкой
+sum(N_h * p_h), доверительный интервал - нормальным приближением с
+поправкой на конечность страты. Страты с одним элементом выборки для оценки
+дисперсии объединяются, иначе интервал на мелких стратах слишком узкий.
+
+Модуль не зависит от bpy.
+"""
+import numpy as np
+
+# Число ячеек сетки по каждой оси (GRID_CELLS^3 страт умещается в int16)
+GRID_CELLS = 16
+
+# Квантиль нормального распределения для 95% доверительного интервала
+Z_95 = 1.959964
+
+
+def strata_of(points, cells=GRID_CELLS):
+    """Номер ячейки сетки по габариту точек для каждой точки"""
+    points = np.asarray(points).reshape(-1, 3)
+    strata = np.zeros(len(points), dtype=np.int16)
+    if not len(points):
+        return strata
+    # По одной оси за раз и без перехода к float64: меньше временных массивов
+    for axis in range(3):
+        column = points[:, axis]
+        lo = column.min()
+        size = float(column.max() - lo) or 1.0
+        cell = ((column - lo) * (cells / size)).astype(np.int16)
+        np.minimum(cell, cells - 1, out=cell)
+        strata *= cells
+        strata += cell
+    return strata
+
+
+def grid_cells(count, fraction, cells=GRID_CELLS):
+    """Число ячеек по оси, при котором страт не больше fraction * count"""
+    return min(cells, max(1, int((fraction * count) ** (1.0 / 3.0) + 1e-9)))
+
+
+def stratified_sample(points, fraction, cells=GRID_CELLS, seed=0):
+    """Стратифицированная выборка индексов точек.
+
+    Внутри страты h каждый элемент попадает в выборку независимо с
+    вероятностью max(fraction, 1 / N_h), так что из каждой непустой страты
+    в среднем берется хотя бы один элемент, а сортировка не нужна.
+    Сетка уменьшается до grid_cells(N, fraction) ячеек по оси.
+    Возвращает (sample, sample_strata, population, sampled): индексы выборки,
+    страты выбранных элементов, размеры страт N_h и размеры выборки n_h.
+    """
+    points = np.asarray(points).reshape(-1, 3)
+    fraction = min(max(fraction, 0.0), 1.0)
+    cells = grid_cells(len(points), fraction, cells)
+    strata = strata_of(points, cells)
+    strata_count = cells ** 3
+    population = np.bincount(strata, minlength=strata_count).astype(np.int64)
+
+    probability = np.maximum(fraction, 1.0 / np.maximum(population, 1)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    sample = np.flatnonzero(rng.random(len(strata), dtype=np.float32) < probability[strata])
+    sample_strata = strata[sample].astype(np.int64)
+    sampled = np.bincount(sample_strata, minlength=strata_count).astype(np.int64)
+    return sample, sample_strata, population, sampled
+
+
+def estimate_count(flags, sample_strata, population, sampled):
+    """Оценка числа отмеченных элементов и полуширина 95% интервала.
+
+    flags - булев массив по элементам выборки. Страты, в которые не попал
+    ни один элемент, оцениваются по общей доле отмеченных элементов.
+    Полуширина не меньше интервала Уилсона по всей выборке, поэтому и без
+    единого попадания она не нулевая, если проверены не все элементы.
+    """
+    flags = np.asarray(flags, dtype=np.float64)
+    flagged = np.bincount(sample_strata, weights=flags, minlength=len(population))
+    overall = float(flags.mean()) if len(flags) else 0.0
+
+    taken = sampled > 0
+    n = sampled[taken].astype(np.float64)
+    big_n = population[taken].astype(np.float64)
+    p = flagged[taken] / n
+    missed = population[~taken & (population > 0)].astype(np.float64)
+    estimate = float((big_n * p).sum()) + float(missed.sum()) * overall
+
+    # В страте с одним элементом выборки дисперсию по ней не оценить:
+    # такие страты объединяются и берут общую долю объединения (оценка
+    # объединенных страт завышает дисперсию, интервал получается консервативным)
+    sparse = n < 2.0
+    pooled = float(flagged[taken][sparse].sum() / n[sparse].sum()) if sparse.any() else overall
+    p = np.where(sparse, pooled, p)
+    variance = float((big_n * big_n * (1.0 - n / big_n) * p * (1.0 - p) / np.maximum(n - 1.0, 1.0)).sum())
+    # Страты без выборки оцениваются общей долей с дисперсией как у одного элемента
+    variance += float((missed * missed).sum()) * overall * (1.0 - overall)
+    margin = Z_95 * variance ** 0.5
+
+    # Редкие проблемы часто не попадают в выборку вовсе, и дисперсия по
+    # стратам равна нулю. Нижняя граница полуширины - верхний предел
+    # интервала Уилсона для общей доли (при нуле попаданий около 3.84 / n,
+    # как "правило трех"), с поправкой на конечность совокупности
+    total = float(population.sum())
+    if len(flags) and total > len(flags):
+        count = len(flags)
+        z2 = Z_95 * Z_95
+        upper = (overall + z2 / (2.0 * count)
+                 + Z_95 * (overall * (1.0 - overall) / count + z2 / (4.0 * count * count)) ** 0.5) / (1.0 + z2 / count)
+        margin = max(margin, total * (upper - overall) * (1.0 - count / total) ** 0.5)
+    return estimate, margin
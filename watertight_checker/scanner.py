@@ -0,0 +1,333 @@
+"""Пакетная проверка библиотеки .blend-файлов пулом фоновых процессов Blender.
+
+Драйвер запускается обычным Python 3 (Blender нужен только воркерам):
+
+    python scanner.py /path/to/library --blender /opt/blender/blender \
+        --workers 8 --manifest library_scan.sqlite
+
+Драйвер обходит дерево каталогов, сверяет файлы с манифестом (SQLite) и
+раздает непроверенные файлы пачками ограниченному числу процессов
+`blender -b --factory-startup`. Каждый воркер подгружает из файла только
+меши через bpy.data.libraries.load (без загрузки сцены), проверяет их и
+печатает результат строкой в stdout. Драйвер читает вывод построчно и
+записывает результат каждого файла в манифест, как только он напечатан,
+поэтому прерванный обход продолжается с места остановки, а файлы с
+неизменными mtime и размером пропускаются. С --hash файлы, у которых
+изменились mtime или размер, сверяются по SHA-1 (mtime меняется и при
+копировании). Если воркер упал или превысил таймаут, ошибка записывается
+только файлу, на котором он остановился; непроверенные файлы пачки
+запускаются повторно по одному.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from queue import Empty, Queue
+
+# Префикс строки результата в выводе воркера
+RESULT_PREFIX = "WTC_RESULT "
+
+# Как часто драйвер записывает в манифест результаты, пришедшие от воркеров, с
+RECORD_INTERVAL = 0.5
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class Manifest:
+    """Манифест обхода в SQLite: состояние и результат по каждому файлу"""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " mtime REAL,"
+            " size INTEGER,"
+            " sha1 TEXT,"
+            " status TEXT,"
+            " watertight INTEGER,"
+            " result TEXT,"
+            " error TEXT,"
+            " updated REAL)"
+        )
+        self.connection.commit()
+
+    def lookup(self, path):
+        """Возвращает (mtime, size, sha1, status) или None"""
+        return self.connection.execute(
+            "SELECT mtime, size, sha1, status FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+    def record(self, path, signature, status, result=None, error=None):
+        """Записывает результат файла и сразу фиксирует транзакцию"""
+        mtime, size, sha1 = signature
+        watertight = None
+        if result is not None:
+            watertight = int(all(mesh["watertight"] for mesh in result.get("meshes", [])))
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files"
+            " (path, mtime, size, sha1, status, watertight, result, error, updated)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, mtime, size, sha1, status, watertight,
+             json.dumps(result, ensure_ascii=False) if result is not None else None,
+             error, time.time()),
+        )
+        self.connection.commit()
+
+    def summary(self):
+        """Счетчики по статусам и числу незамкнутых файлов"""
+        rows = self.connection.execute(
+            "SELECT status, COUNT(*), SUM(CASE WHEN watertight = 0 THEN 1 ELSE 0 END)"
+            " FROM files GROUP BY status"
+        ).fetchall()
+        return {status: (count, not_watertight or 0) for status, count, not_watertight in rows}
+
+    def close(self):
+        self.connection.close()
+
+
+def walk_blend_files(root):
+    """Все .blend-файлы в дереве каталогов (резервные копии .blend1 пропускаются)"""
+    for directory, _dirs, files in os.walk(root):
+        for name in sorted(files):
+            if name.lower().endswith(".blend"):
+                yield os.path.abspath(os.path.join(directory, name))
+
+
+def file_signature(path, use_hash=False, row=None):
+    """Подпись файла: (mtime, размер, sha1 или пустая строка).
+
+    row - запись манифеста (см. Manifest.lookup): если mtime и размер
+    не изменились, сохраненный хеш берется из нее, и файл не читается.
+    """
+    stat = os.stat(path)
+    sha1 = ""
+    if use_hash and row is not None and row[2] and (row[0], row[1]) == (stat.st_mtime, stat.st_size):
+        sha1 = row[2]
+    elif use_hash:
+        digest = hashlib.sha1()
+        with open(path, "rb") as stream:
+            for chunk in iter(lambda: stream.read(1 << 20), b""):
+                digest.update(chunk)
+        sha1 = digest.hexdigest()
+    return stat.st_mtime, stat.st_size, sha1
+
+
+def is_unchanged(row, signature, retry_failed):
+    """Файл уже проверен и не менялся с тех пор"""
+    if row is None:
+        return False
+    mtime, size, sha1, status = row
+    if status == STATUS_FAILED and retry_failed:
+        return False
+    if signature[2] and sha1:
+        # С хешем сравниваем содержимое: mtime мог измениться при копировании
+        return sha1 == signature[2]
+    return mtime == signature[0] and size == signature[1]
+
+
+def run_worker_batch(blender, paths, timeout, report):
+    """Запускает один фоновый Blender на пачку файлов.
+
+    Вывод воркера читается построчно: report(path, result, error) вызывается
+    для каждого файла сразу, как только воркер напечатал его результат.
+    Воркер проверяет файлы по порядку, поэтому при падении или таймауте
+    ошибка сообщается только первому файлу без результата. Возвращает файлы,
+    до которых воркер не дошел, для повторного запуска по одному.
+    """
+    command = [
+        blender, "-b", "--factory-startup", "-noaudio",
+        "--python", os.path.abspath(__file__),
+        "--", "--worker",
+    ] + list(paths)
+
+    reported = set()
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding="utf-8", errors="replace")
+    # По таймауту процесс завершается, и чтение вывода доходит до конца
+    expired = threading.Event()
+
+    def kill():
+        expired.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        for line in process.stdout:
+            if not line.startswith(RESULT_PREFIX):
+                continue
+            payload = json.loads(line[len(RESULT_PREFIX):])
+            reported.add(payload["path"])
+            report(payload["path"], payload.get("result"), payload.get("error"))
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        process.stdout.close()
+
+    error = None
+    if expired.is_set():
+        error = f"Превышено время ожидания ({timeout} с)"
+    elif returncode != 0:
+        error = f"Blender завершился с кодом {returncode}"
+
+    unreported = [path for path in paths if path not in reported]
+    if not unreported:
+        return []
+    # Ошибка - только у файла, на котором воркер остановился
+    report(unreported[0], None, error or "Воркер не вернул результат")
+    return unreported[1:]
+
+
+def scan(root, blender, manifest_path, workers=4, batch_size=16, use_hash=False,
+         retry_failed=False, timeout=3600, log=print):
+    """Обходит библиотеку и проверяет измененные файлы, возвращает сводку манифеста"""
+    manifest = Manifest(manifest_path)
+    try:
+        # Планирование: отбрасываем неизменные файлы до запуска воркеров
+        pending = []
+        skipped = 0
+        for path in walk_blend_files(root):
+            row = manifest.lookup(path)
+            signature = file_signature(path, use_hash, row)
+            if is_unchanged(row, signature, retry_failed):
+                skipped += 1
+            else:
+                pending.append((path, signature))
+        log(f"Файлов к проверке: {len(pending)}, пропущено без изменений: {skipped}")
+
+        signatures = dict(pending)
+        batches = [
+            [path for path, _signature in pending[i:i + batch_size]]
+            for i in range(0, len(pending), batch_size)
+        ]
+
+        # Результаты приходят из потоков воркеров через очередь: манифест пишется
+        # только из этого потока, SQLite-соединение не делится между потоками
+        results = Queue()
+        processed = 0
+
+        def report(path, result, error):
+            results.put((path, result, error))
+
+        def record_reported():
+            nonlocal processed
+            while True:
+                try:
+                    path, result, error = results.get_nowait()
+                except Empty:
+                    return
+                status = STATUS_DONE if result is not None else STATUS_FAILED
+                manifest.record(path, signatures[path], status, result, error)
+                processed += 1
+                if error:
+                    log(f"[{processed}/{len(pending)}] {path}: {error}")
+                else:
+                    log(f"[{processed}/{len(pending)}] {path}")
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(run_worker_batch, blender, batch, timeout, report) for batch in batches}
+            while futures:
+                done, futures = wait(futures, timeout=RECORD_INTERVAL, return_when=FIRST_COMPLETED)
+                record_reported()
+                for future in done:
+                    requeue = future.result()
+                    # Файлы после упавшего проверяются каждый своим запуском Blender
+                    if requeue:
+                        log(f"Повторный запуск по одному файлу: {len(requeue)}")
+                    futures |= {pool.submit(run_worker_batch, blender, [path], timeout, report) for path in requeue}
+
+        return manifest.summary()
+    finally:
+        manifest.close()
+
+
+def check_blend_file(path, analyzer):
+    """Проверяет меши одного .blend-файла внутри Blender (режим воркера)"""
+    import bpy
+
+    with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+        data_to.meshes = list(data_from.meshes)
+
+    meshes = []
+    try:
+        for mesh in data_to.meshes:
+            if mesh is None:
+                continue
+            result = analyzer.analyze_mesh(mesh)
+            counts = {prop_name: len(values) for prop_name, values in result["indices"].items()}
+            counts["holes"] = len(result["loops"]["perimeters"])
+            meshes.append({
+                "mesh": mesh.name,
+                "mesh_hash": result["mesh_hash"],
+                "watertight": not result["error_types"],
+                "counts": counts,
+                "timings": result["timings"],
+            })
+    finally:
+        for mesh in data_to.meshes:
+            if mesh is not None:
+                bpy.data.meshes.remove(mesh)
+        # Материалы и текстуры, подтянутые вместе с мешами
+        bpy.data.orphans_purge(do_recursive=True)
+
+    return {"meshes": meshes}
+
+
+def worker_main(paths):
+    """Точка входа воркера: проверяет файлы и печатает результат по каждому"""
+    # Пакет аддона лежит уровнем выше этого файла
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from watertight_checker import watertight_checker as wtc
+
+    # Параллельность дает пул воркеров: поиск пересечений внутри воркера
+    # идет в одном потоке, иначе каждый воркер занял бы все ядра
+    analyzer = wtc.WatertightAnalyzer(intersection_workers=1)
+    for path in paths:
+        payload = {"path": path}
+        try:
+            payload["result"] = check_blend_file(path, analyzer)
+        except Exception as e:
+            payload["error"] = f"{type(e).__name__}: {e}"
+        print(RESULT_PREFIX + json.dumps(payload, ensure_ascii=False), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка замкнутости мешей в библиотеке .blend-файлов")
+    parser.add_argument("root", nargs="?", help="Каталог библиотеки")
+    parser.add_argument("--blender", default="blender", help="Путь к исполняемому файлу Blender")
+    parser.add_argument("--manifest", default="watertight_scan.sqlite", help="Файл манифеста SQLite")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Число процессов Blender")
+    parser.add_argument("--batch-size", type=int, default=16, help="Файлов на один запуск Blender")
+    parser.add_argument("--hash", action="store_true", help="Сверять по SHA-1 файлы с измененными mtime или размером")
+    parser.add_argument("--retry-failed", action="store_true", help="Повторить файлы с ошибками")
+    parser.add_argument("--timeout", type=int, default=3600, help="Таймаут одного запуска Blender, с")
+    parser.add_argument("--worker", nargs="+", metavar="BLEND", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        worker_main(args.worker)
+        return 0
+
+    if not args.root:
+        parser.error("не указан каталог библиотеки")
+
+    summary = scan(args.root, args.blender, args.manifest, args.workers, args.batch_size,
+                   args.hash, args.retry_failed, args.timeout)
+    for status, (count, not_watertight) in sorted(summary.items()):
+        print(f"{status}: {count} (не замкнуты: {not_watertight})")
+    return 0 if STATUS_FAILED not in summary else 1
+
+
+if __name__ == "__main__":
+    # Внутри Blender аргументы скрипта идут после "--"
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    sys.exit(main(argv))
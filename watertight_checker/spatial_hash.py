@@ -0,0 +1,220 @@
+"""Равномерная хеш-сетка для поиска совпадающих вершин и T-образных стыков.
+
+Модуль не зависит от bpy: на вход подаются координаты в виде кортежей (x, y, z)
+и пары индексов вершин для ребер.
+"""
+import math
+
+# Классы граничных ребер
+EDGE_HOLE = 'HOLE'
+EDGE_WELD = 'WELD'
+EDGE_TJUNCTION = 'TJUNCTION'
+
+
+def cell_of(co, inv_cell):
+    """Возвращает ключ ячейки сетки для точки"""
+    return (
+        math.floor(co[0] * inv_cell),
+        math.floor(co[1] * inv_cell),
+        math.floor(co[2] * inv_cell),
+    )
+
+
+def build_grid(points, cell_size, indices=None):
+    """Раскладывает точки по ячейкам сетки: {ключ ячейки: [индексы]}"""
+    inv_cell = 1.0 / cell_size
+    grid = {}
+    if indices is None:
+        indices = range(len(points))
+    for i in indices:
+        grid.setdefault(cell_of(points[i], inv_cell), []).append(i)
+    return grid
+
+
+def _dist_sq(a, b):
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+    dz = a[2] - b[2]
+    return dx * dx + dy * dy + dz * dz
+
+
+def find_coincident_pairs(points, tolerance, indices=None):
+    """Находит пары вершин (i, j), i < j, расположенных ближе tolerance.
+
+    Ячейки сетки имеют размер tolerance, поэтому каждая вершина сравнивается
+    только с вершинами из 27 соседних ячеек.
+    """
+    if tolerance <= 0.0:
+        # Нулевой допуск - ищем только точные совпадения координат
+        buckets = {}
+        for i in (range(len(points)) if indices is None else indices):
+            buckets.setdefault(tuple(points[i]), []).append(i)
+        pairs = []
+        for bucket in buckets.values():
+            for a in range(len(bucket)):
+                for b in range(a + 1, len(bucket)):
+                    pairs.append((min(bucket[a], bucket[b]), max(bucket[a], bucket[b])))
+        return pairs
+
+    grid = build_grid(points, tolerance, indices)
+    tol_sq = tolerance * tolerance
+    pairs = []
+    for (cx, cy, cz), bucket in grid.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    other = grid.get((cx + dx, cy + dy, cz + dz))
+                    if not other:
+                        continue
+                    for i in bucket:
+                        pi = points[i]
+                        for j in other:
+                            # Каждая пара учитывается один раз
+                            if j <= i:
+                                continue
+                            if _dist_sq(pi, points[j]) <= tol_sq:
+                                pairs.append((i, j))
+    return pairs
+
+
+def point_on_segment(p, a, b, tolerance):
+    """Проверяет, лежит ли точка p внутри отрезка ab (не у его концов)"""
+    ab = (b[0] - a[0], b[1] - a[1], b[2] - a[2])
+    length_sq = ab[0] * ab[0] + ab[1] * ab[1] + ab[2] * ab[2]
+    if length_sq <= tolerance * tolerance:
+        return False
+    ap = (p[0] - a[0], p[1] - a[1], p[2] - a[2])
+    t = (ap[0] * ab[0] + ap[1] * ab[1] + ap[2] * ab[2]) / length_sq
+    # Точки у концов отрезка - это совпадающие вершины, а не T-стык
+    margin = tolerance / math.sqrt(length_sq)
+    if t <= margin or t >= 1.0 - margin:
+        return False
+    closest = (a[0] + ab[0] * t, a[1] + ab[1] * t, a[2] + ab[2] * t)
+    return _dist_sq(p, closest) <= tolerance * tolerance
+
+
+def segment_cells(a, b, inv_cell):
+    """Ячейки сетки, которые пересекает отрезок ab, по порядку (3D DDA).
+
+    Число ячеек пропорционально длине отрезка, а не объему его габарита.
+    """
+    cell = list(cell_of(a, inv_cell))
+    end = cell_of(b, inv_cell)
+    step = [0, 0, 0]
+    t_max = [math.inf, math.inf, math.inf]
+    t_delta = [math.inf, math.inf, math.inf]
+    for axis in range(3):
+        delta = (b[axis] - a[axis]) * inv_cell
+        start = a[axis] * inv_cell
+        if end[axis] > cell[axis] and delta > 0.0:
+            step[axis] = 1
+            t_max[axis] = (cell[axis] + 1 - start) / delta
+            t_delta[axis] = 1.0 / delta
+        elif end[axis] < cell[axis] and delta < 0.0:
+            step[axis] = -1
+            t_max[axis] = (cell[axis] - start) / delta
+            t_delta[axis] = -1.0 / delta
+
+    yield tuple(cell)
+    for _step in range(sum(abs(end[axis] - cell[axis]) for axis in range(3))):
+        axis = min(range(3), key=t_max.__getitem__)
+        cell[axis] += step[axis]
+        t_max[axis] += t_delta[axis]
+        # Ось, дошедшая до ячейки конца, больше не шагает (ошибки округления)
+        if cell[axis] == end[axis]:
+            t_max[axis] = math.inf
+        yield tuple(cell)
+
+
+def find_t_junctions(points, edges, tolerance, cell_size=None):
+    """Ищет граничные вершины, лежащие внутри других граничных ребер.
+
+    edges - список пар индексов вершин. Возвращает список пар
+    (позиция ребра в edges, индекс вершины).
+
+    Ячейка не меньше tolerance, поэтому вершина в пределах tolerance от
+    ребра лежит в ячейке на пути ребра или в соседней с ней: ребро
+    проверяет только эти ячейки, и длинное диагональное ребро стоит
+    пропорционально своей длине, а не объему габарита.
+    """
+    if not edges:
+        return []
+
+    # Размер ячейки - средняя длина ребра, но не меньше допуска
+    if cell_size is None:
+        total = 0.0
+        for a, b in edges:
+            total += math.sqrt(_dist_sq(points[a], points[b]))
+        cell_size = max(tolerance, total / len(edges))
+    if cell_size <= 0.0:
+        return []
+    cell_size = max(cell_size, tolerance)
+    inv_cell = 1.0 / cell_size
+
+    edge_verts = set()
+    for a, b in edges:
+        edge_verts.add(a)
+        edge_verts.add(b)
+    grid = build_grid(points, cell_size, edge_verts)
+
+    hits = []
+    for edge_pos, (a, b) in enumerate(edges):
+        pa = points[a]
+        pb = points[b]
+        visited = set()
+        for cx, cy, cz in segment_cells(pa, pb, inv_cell):
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for dz in (-1, 0, 1):
+                        key = (cx + dx, cy + dy, cz + dz)
+                        if key in visited:
+                            continue
+                        visited.add(key)
+                        bucket = grid.get(key)
+                        if not bucket:
+                            continue
+                        for v in bucket:
+                            if v == a or v == b:
+                                continue
+                            if point_on_segment(points[v], pa, pb, tolerance):
+                                hits.append((edge_pos, v))
+    return hits
+
+
+def classify_boundary_edges(points, edges, tolerance):
+    """Классифицирует граничные ребра: сквозная дыра, кандидат на слияние или T-стык.
+
+    points - координаты всех вершин, edges - пары индексов вершин граничных ребер.
+    Возвращает (список классов в порядке edges, список совпадающих пар
+    граничных вершин). Сливаться могут только граничные вершины, поэтому
+    в сетку попадают только они, а не весь меш.
+    """
+    boundary_verts = set()
+    for a, b in edges:
+        boundary_verts.add(a)
+        boundary_verts.add(b)
+    coincident_pairs = find_coincident_pairs(points, tolerance, sorted(boundary_verts))
+
+    # Вершины, у которых есть совпадающая граничная вершина-партнер
+    welded = set()
+    for i, j in coincident_pairs:
+        welded.add(i)
+        welded.add(j)
+
+    # T-стык: внутри ребра лежит чужая граничная вершина,
+    # либо конец ребра лежит внутри другого граничного ребра
+    tjunction_edges = set()
+    tjunction_verts = set()
+    for edge_pos, v in find_t_junctions(points, edges, tolerance):
+        tjunction_edges.add(edge_pos)
+        tjunction_verts.add(v)
+
+    classes = []
+    for edge_pos, (a, b) in enumerate(edges):
+        if edge_pos in tjunction_edges or a in tjunction_verts or b in tjunction_verts:
+            classes.append(EDGE_TJUNCTION)
+        elif a in welded and b in welded:
+            classes.append(EDGE_WELD)
+        else:
+            classes.append(EDGE_HOLE)
+    return classes, coincident_pairs
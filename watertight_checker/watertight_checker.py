@@ -2,11 +2,25 @@ import bpy
 import bmesh
 import traceback
 import os
+import time
+import hashlib
+from array import array
 from bpy.types import Operator, Panel
-from bpy.props import BoolProperty, StringProperty, IntVectorProperty, IntProperty, EnumProperty
+from bpy.props import BoolProperty, StringProperty, IntVectorProperty, IntProperty, FloatProperty, EnumProperty
 from mathutils import Vector
 from bpy_extras import view3d_utils
+from bpy_extras.io_utils import ExportHelper
 from bpy.app.translations import pgettext as _, pgettext_data as data_
+from bpy.app.handlers import persistent
+from . import spatial_hash
+from . import winding
+from . import boundary_loops
+from . import export
+from . import result_store
+from . import islands
+from . import geometry_cache
+# Модули на NumPy (degenerate, export_split, sampling, intersections)
+# импортируются при первой проверке: запуск Blender их не ждет
 
 # Версия плагина в формате "год.месяцдень.minor"
 PLUGIN_VERSION = "2025.1006.1"  # 6 октября 2025, 1-я ревизия
@@ -14,10 +28,446 @@ PLUGIN_VERSION = "2025.1006.1"  # 6 октября 2025, 1-я ревизия
 # Уникальные префиксы для свойств
 PREFIX = "wtc_"
 
+# Подробный журнал регистрации и проверок включается переменной окружения WTC_DEBUG=1
+DEBUG = os.environ.get("WTC_DEBUG", "") not in ("", "0")
+
+# Допуск по умолчанию для поиска совпадающих вершин и T-стыков
+WELD_TOLERANCE_DEFAULT = 0.0001
+
+# Число выборок на оболочку и порог протекания для проверки числом оборотов.
+# Порог - двойная ошибка дальней аппроксимации, чтобы замкнутые тонкие
+# оболочки не считались протекающими
+WINDING_SAMPLES_PER_SHELL = 16
+WINDING_LEAK_THRESHOLD = 2.0 * winding.MAX_ERROR
+
+# Размер ячейки сетки для объединения несвязанных проблемных элементов
+# в острова, в долях диагонали габарита меша
+ISLAND_GRID_FRACTION = 0.02
+
+# Регистрация переводов и описаний сохраняемых результатов отложена до первого использования
+_translations_registered = False
+_result_properties_registered = False
+
+# Свойства объектов с индексами проблемных элементов
+OBJECT_PROPERTIES = [
+    ("boundary_edges", "Индексы граничных ребер"),
+    ("loose_verts", "Индексы вершин с недостаточным количеством соединений"),
+    ("inverted_normals", "Индексы полигонов с перевернутыми нормалями"),
+    ("non_manifold_edges", "Индексы не manifold ребер"),
+    ("non_manifold_verts", "Индексы не manifold вершин"),
+    ("ngon_faces", "Индексы N-gon граней (более 4 вершин)"),
+    ("intersecting_faces", "Индексы самопересекающихся граней"),
+    ("weld_edges", "Индексы граничных ребер - кандидатов на слияние вершин"),
+    ("tjunction_edges", "Индексы граничных ребер с T-образными стыками"),
+    ("leaky_faces", "Индексы граней протекающих оболочек (по числу оборотов)"),
+    ("duplicate_faces", "Индексы граней, повторяющих набор вершин другой грани"),
+    ("overlapping_faces", "Индексы компланарных граней, перекрывающихся по площади"),
+    ("degenerate_faces", "Индексы граней нулевой площади"),
+    ("zero_length_edges", "Индексы ребер нулевой длины"),
+    ("split_edges", "Индексы ребер, разрезаемых экспортером по UV-швам и жестким нормалям"),
+]
+
+# Свойства объекта с петлями открытых границ (смещения + плоские массивы)
+LOOP_PROPERTIES = [
+    "boundary_loop_offsets",
+    "boundary_loop_edges",
+    "boundary_loop_verts",
+    "boundary_loop_perimeters",
+    "boundary_loop_areas",
+    "boundary_loop_planarity",
+]
+
+# Сколько крупнейших отверстий показывать в панели
+HOLE_LIST_LIMIT = 5
+
+# Доля элементов, проверяемых в режиме быстрой оценки
+PREVIEW_FRACTION_DEFAULT = 0.01
+
+# Тип проблемы -> свойства объекта и тип элементов в них
+PROBLEM_ELEMENTS = {
+    'BOUNDARY': (("boundary_edges", 'EDGE'),),
+    'LOOSE': (("loose_verts", 'VERT'),),
+    'NORMALS': (("inverted_normals", 'FACE'),),
+    'MANIFOLD': (("non_manifold_edges", 'EDGE'), ("non_manifold_verts", 'VERT')),
+    'NGONS': (("ngon_faces", 'FACE'),),
+    'INTERSECTIONS': (("intersecting_faces", 'FACE'),),
+    'WELD': (("weld_edges", 'EDGE'),),
+    'TJUNCTION': (("tjunction_edges", 'EDGE'),),
+    'LEAKY': (("leaky_faces", 'FACE'),),
+    'DUPLICATES': (("duplicate_faces", 'FACE'),),
+    'OVERLAPS': (("overlapping_faces", 'FACE'),),
+    'DEGENERATE': (("degenerate_faces", 'FACE'), ("zero_length_edges", 'EDGE')),
+    'SPLITS': (("split_edges", 'EDGE'),),
+}
+
 # Функция для логгирования
 def log_message(message):
     print(f"[Watertight Checker] {message}")
 
+def debug_message(message):
+    """Подробное сообщение: выводится только при WTC_DEBUG"""
+    if DEBUG:
+        log_message(message)
+
+def get_object_result(obj):
+    """Результат проверки объекта: из сессионного хранилища или сохраненный в файле"""
+    if obj is None or obj.type != 'MESH' or obj.data is None:
+        return None
+    result = result_store.get_result(obj)
+    if result is None and obj.get(PREFIX + "mesh_hash"):
+        # Результаты, ранее сохраненные в .blend явным действием
+        result_store.set_result(obj, load_persisted_result(obj))
+        result = result_store.get_result(obj)
+    return result
+
+def load_persisted_result(obj):
+    """Читает результат проверки из ID-свойств объекта"""
+    indices = {prop_name: list(obj.get(PREFIX + prop_name, [])) for prop_name, _description in OBJECT_PROPERTIES}
+    timings = obj.get(PREFIX + "timings")
+    problem_islands = obj.get(PREFIX + "islands")
+    return {
+        "indices": indices,
+        "loops": {
+            prop_name[len("boundary_loop_"):]: list(obj.get(PREFIX + prop_name, []))
+            for prop_name in LOOP_PROPERTIES
+        },
+        "islands": problem_islands.to_dict() if problem_islands else {},
+        "timings": timings.to_dict() if timings else {},
+        "mesh_hash": obj.get(PREFIX + "mesh_hash", ""),
+        "error_types": {
+            problem_type for problem_type, props in PROBLEM_ELEMENTS.items()
+            if any(indices.get(prop_name) for prop_name, _kind in props)
+        },
+    }
+
+def persist_object_result(obj, result):
+    """Записывает результат проверки в ID-свойства объекта (сохраняется в .blend)"""
+    for prop_name, values in result["indices"].items():
+        obj[PREFIX + prop_name] = list(values)
+    for key, values in result["loops"].items():
+        obj[PREFIX + "boundary_loop_" + key] = list(values)
+    obj[PREFIX + "islands"] = {
+        problem_type: {key: list(values) for key, values in data.items()}
+        for problem_type, data in result.get("islands", {}).items()
+    }
+    obj[PREFIX + "timings"] = dict(result["timings"])
+    obj[PREFIX + "mesh_hash"] = result["mesh_hash"]
+
+def get_scene_report(scene):
+    """Отчет и типы ошибок сцены: из сессионного хранилища или сохраненные в файле"""
+    if result_store.has_scene_state(scene):
+        state = result_store.scene_state(scene)
+        return state["report"], state["error_types"]
+    # Преобразуем строку обратно в множество
+    error_types_str = scene.get(PREFIX + "error_types", "")
+    error_types = set(error_types_str.split(",")) if error_types_str else set()
+    return scene.get(PREFIX + "report", ""), error_types
+
+def get_problem_elements(obj, problem_type):
+    """Возвращает список пар (тип элемента, индекс) для типа проблемы"""
+    result = get_object_result(obj)
+    if result is None:
+        return []
+    elements = []
+    for prop_name, kind in PROBLEM_ELEMENTS.get(problem_type, ()):
+        elements.extend((kind, idx) for idx in result["indices"].get(prop_name, ()))
+    return elements
+
+def get_problem_groups(obj, problem_type):
+    """Группы элементов для навигации: петли отверстий, острова или отдельные элементы"""
+    result = get_object_result(obj)
+    if problem_type == 'BOUNDARY' and result is not None:
+        offsets = result["loops"].get("offsets", ())
+        loop_edges = result["loops"].get("edges", ())
+        if len(offsets) > 1:
+            return [[('EDGE', idx) for idx in loop_edges[offsets[i]:offsets[i + 1]]]
+                    for i in range(len(offsets) - 1)]
+    elements = get_problem_elements(obj, problem_type)
+    island_data = get_problem_islands(obj, problem_type)
+    if island_data is not None:
+        offsets = island_data["offsets"]
+        members = island_data["members"]
+        return [[elements[m] for m in members[offsets[i]:offsets[i + 1]] if m < len(elements)]
+                for i in range(len(offsets) - 1)]
+    return [[element] for element in elements]
+
+def get_problem_islands(obj, problem_type):
+    """Острова проблемных элементов типа или None, если они не построены"""
+    result = get_object_result(obj)
+    if result is None:
+        return None
+    island_data = result.get("islands", {}).get(problem_type)
+    if not island_data or len(island_data["offsets"]) < 2:
+        return None
+    return island_data
+
+def element_center(mesh, kind, index):
+    """Центр вершины, ребра или грани меша по кешированным массивам (None, если индекса нет)"""
+    arrays = cached_geometry(mesh, "arrays")
+    if kind == 'VERT':
+        coords = arrays["coords"]
+        return Vector(coords[index].tolist()) if index < len(coords) else None
+    if kind == 'EDGE':
+        edge_verts = arrays["edge_verts"]
+        if index >= len(edge_verts):
+            return None
+        return Vector(arrays["coords"][edge_verts[index]].mean(axis=0).tolist())
+    centers = cached_geometry(mesh, "face_centers")
+    return Vector(centers[index].tolist()) if index < len(centers) else None
+
+def problem_selection_masks(mesh, result, problem_type):
+    """Маски выделения вершин, ребер и граней (булевы массивы NumPy) для типа проблемы.
+    
+    Маски строятся по кешированным массивам меша и записываются обратно
+    одним foreach_set на слой. Как и при выделении через BMesh, выделенное
+    ребро выделяет свои вершины, а грань - свои ребра и вершины. Индексы за
+    пределами меша (меш изменен после проверки) пропускаются.
+    """
+    import numpy as np
+    from . import degenerate
+    
+    # Индексы из кеша применяются к мешу: число элементов должно совпадать
+    arrays = cached_arrays_matching(mesh, len(mesh.vertices), len(mesh.edges), len(mesh.polygons))
+    vert_mask = np.zeros(len(mesh.vertices), dtype=bool)
+    edge_mask = np.zeros(len(mesh.edges), dtype=bool)
+    face_mask = np.zeros(len(mesh.polygons), dtype=bool)
+    masks = {'VERT': vert_mask, 'EDGE': edge_mask, 'FACE': face_mask}
+    
+    for prop_name, kind in PROBLEM_ELEMENTS.get(problem_type, ()):
+        mask = masks[kind]
+        indices = np.asarray(result["indices"].get(prop_name, ()), dtype=np.int64)
+        mask[indices[indices < len(mask)]] = True
+    
+    if arrays is not None and face_mask.any():
+        faces = np.flatnonzero(face_mask)
+        positions, _offsets = degenerate.face_loops(arrays["loop_starts"][faces], arrays["loop_totals"][faces])
+        edge_mask[cached_geometry(mesh, "incidence")["loop_edges"][positions]] = True
+    
+    if arrays is not None and edge_mask.any():
+        vert_mask[arrays["edge_verts"][edge_mask].ravel()] = True
+    
+    return vert_mask, edge_mask, face_mask
+
+def mesh_arrays(mesh):
+    """Плоские массивы вершин, ребер и полигонов меша (см. модуль degenerate)"""
+    import numpy as np
+    
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_verts)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    return {
+        "coords": coords.reshape(-1, 3),
+        "edge_verts": edge_verts.reshape(-1, 2),
+        "loop_verts": loop_verts,
+        "loop_starts": loop_starts,
+        "loop_totals": loop_totals,
+    }
+
+def mesh_loop_triangles(mesh):
+    """Треугольники меша (тройки вершин) и грань каждого треугольника"""
+    import numpy as np
+    
+    mesh.calc_loop_triangles()
+    tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", tris)
+    tri_faces = np.empty(len(mesh.loop_triangles), dtype=np.int32)
+    mesh.loop_triangles.foreach_get("polygon_index", tri_faces)
+    return tris.reshape(-1, 3), tri_faces
+
+def mesh_corner_arrays(mesh):
+    """Ребра, нормали и UV всех слоев для каждого угла меша"""
+    import numpy as np
+    
+    loop_count = len(mesh.loops)
+    loop_edges = np.empty(loop_count, dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+    
+    normals = np.empty(loop_count * 3, dtype=np.float32)
+    mesh.corner_normals.foreach_get("vector", normals)
+    
+    uvs = []
+    for layer in mesh.uv_layers:
+        uv = np.empty(loop_count * 2, dtype=np.float32)
+        layer.data.foreach_get("uv", uv)
+        uvs.append(uv.reshape(-1, 2))
+    
+    return {
+        "loop_edges": loop_edges,
+        "normals": normals.reshape(-1, 3),
+        "uvs": uvs,
+    }
+
+def bmesh_arrays(bm):
+    """Те же массивы, собранные по BMesh (когда исходного меша нет)"""
+    loop_totals = [len(f.verts) for f in bm.faces]
+    loop_starts = []
+    start = 0
+    for total in loop_totals:
+        loop_starts.append(start)
+        start += total
+    return {
+        "coords": [v.co.to_tuple() for v in bm.verts],
+        "edge_verts": [(e.verts[0].index, e.verts[1].index) for e in bm.edges],
+        "loop_verts": [v.index for f in bm.faces for v in f.verts],
+        "loop_starts": loop_starts,
+        "loop_totals": loop_totals,
+    }
+
+def mesh_hash(mesh):
+    """SHA-1 координат вершин и топологии полигонов меша"""
+    digest = hashlib.sha1()
+    
+    coords = array('f', [0.0]) * (len(mesh.vertices) * 3)
+    mesh.vertices.foreach_get("co", coords)
+    digest.update(coords.tobytes())
+    
+    loop_verts = array('i', [0]) * len(mesh.loops)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    digest.update(loop_verts.tobytes())
+    
+    loop_totals = array('i', [0]) * len(mesh.polygons)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    digest.update(loop_totals.tobytes())
+    
+    return digest.hexdigest()
+
+def mesh_signature(mesh):
+    """Признак изменения геометрии для кеша: хеш меша и число ребер"""
+    return len(mesh.edges), mesh_hash(mesh)
+
+def mesh_incidence(mesh):
+    """Ребра углов и число граней у ребра и ребер у вершины"""
+    import numpy as np
+    
+    arrays = cached_geometry(mesh, "arrays")
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+    return {
+        "loop_edges": loop_edges,
+        "edge_faces": np.bincount(loop_edges, minlength=len(arrays["edge_verts"])),
+        "vert_edges": np.bincount(arrays["edge_verts"].ravel(), minlength=len(arrays["coords"])),
+    }
+
+def mesh_face_centers(mesh):
+    """Центры граней как среднее их вершин (как BMFace.calc_center_median)"""
+    import numpy as np
+    from . import degenerate
+    
+    arrays = cached_geometry(mesh, "arrays")
+    loop_totals = arrays["loop_totals"]
+    if not len(loop_totals):
+        return np.zeros((0, 3))
+    positions, offsets = degenerate.face_loops(arrays["loop_starts"], loop_totals)
+    points = arrays["coords"][arrays["loop_verts"][positions]].astype(np.float64)
+    return np.add.reduceat(points, offsets, axis=0) / loop_totals[:, None]
+
+def mesh_bvh(mesh):
+    """BVHTree по треугольникам меша (индексы - номера треугольников)"""
+    from mathutils.bvhtree import BVHTree
+    
+    coords = cached_geometry(mesh, "arrays")["coords"]
+    tris, _tri_faces = cached_geometry(mesh, "triangles")
+    return BVHTree.FromPolygons(coords.tolist(), tris.tolist(), all_triangles=True)
+
+# Построители структур общего кеша и оценка размера BVH (байт на треугольник)
+GEOMETRY_BUILDERS = {
+    "arrays": mesh_arrays,
+    "triangles": mesh_loop_triangles,
+    "incidence": mesh_incidence,
+    "face_centers": mesh_face_centers,
+    "bvh": mesh_bvh,
+}
+BVH_BYTES_PER_TRIANGLE = 128
+
+def cached_arrays_matching(mesh, verts, edges, faces):
+    """Кешированные массивы меша, если в них verts вершин, edges ребер и faces граней, иначе None.
+    
+    Запись, устаревшая без события depsgraph, сбрасывается и строится заново.
+    """
+    def matches(arrays):
+        return (len(arrays["coords"]) == verts
+                and len(arrays["edge_verts"]) == edges
+                and len(arrays["loop_totals"]) == faces)
+    
+    arrays = cached_geometry(mesh, "arrays")
+    if not matches(arrays):
+        geometry_cache.discard(mesh.session_uid)
+        arrays = cached_geometry(mesh, "arrays")
+    return arrays if matches(arrays) else None
+
+def cached_arrays_for_bmesh(mesh, bm):
+    """Кешированные массивы меша, если они соответствуют BMesh, иначе None.
+    
+    Индексы из массивов применяются к элементам BMesh, поэтому число вершин,
+    ребер и граней должно совпадать. Если и заново построенные массивы не
+    совпадают (BMesh изменен после загрузки из меша), проверка идет по BMesh.
+    """
+    return cached_arrays_matching(mesh, len(bm.verts), len(bm.edges), len(bm.faces))
+
+def cached_geometry(mesh, name):
+    """Производная структура меша из общего кеша (см. модуль geometry_cache).
+    
+    Вычисленные меши (с модификаторами, копии) делят session_uid с исходным,
+    поэтому для них структура строится без кеша. В режиме редактирования
+    данные меша отстают от правок: запись не сверяется и остается помеченной
+    до выхода из режима.
+    """
+    builder = GEOMETRY_BUILDERS[name]
+    if mesh.is_evaluated:
+        return builder(mesh)
+    size = None
+    if name == "bvh":
+        size = lambda _tree: len(mesh.loop_triangles) * BVH_BYTES_PER_TRIANGLE
+    return geometry_cache.get(mesh.session_uid, name, lambda: builder(mesh),
+                              lambda: mesh_signature(mesh), size, stale=mesh.is_editmode)
+
+def collect_object_result(obj, include_indices=False):
+    """Запись о результатах проверки объекта для выгрузки"""
+    result = get_object_result(obj)
+    counts = {}
+    indices = {}
+    for prop_name, _description in OBJECT_PROPERTIES:
+        values = result["indices"].get(prop_name, ())
+        counts[prop_name] = len(values)
+        if include_indices:
+            indices[prop_name] = list(values)
+    counts["holes"] = max(len(result["loops"].get("offsets", ())) - 1, 0)
+    
+    record = {
+        "name": obj.name,
+        "mesh": obj.data.name,
+        "watertight": not any(counts.values()),
+        "mesh_hash": result["mesh_hash"],
+        "counts": counts,
+        "timings": dict(result["timings"]),
+    }
+    if result.get("export_split"):
+        record["export_split"] = dict(result["export_split"])
+    if include_indices:
+        record["indices"] = indices
+    return record
+
+def export_results(objects, filepath, file_format='JSON', include_indices=False):
+    """Выгружает результаты проверки объектов в файл (JSON, CSV, JUNIT или NPZ).
+    
+    Объекты без результатов пропускаются. Записи формируются лениво,
+    по одной на объект. Возвращает число выгруженных объектов.
+    """
+    records = (
+        collect_object_result(obj, include_indices)
+        for obj in objects
+        if get_object_result(obj) is not None
+    )
+    categories = [prop_name for prop_name, _description in OBJECT_PROPERTIES] + ["holes"]
+    return export.export_records(filepath, records, file_format, categories, PLUGIN_VERSION)
+
 # Функции для локализации
 def TIP_(message):
     return pgettext_tip(message)
@@ -33,6 +483,8 @@ def register_translations():
         ("Operator", "Recheck Watertight Geometry"): "Перепроверить замкнутость геометрии (Recheck Watertight)",
         ("Operator", "Select Specific Problems"): "Выделить конкретные проблемы",
         ("Operator", "Focus on Problem Element"): "Сфокусироваться на проблемном элементе",
+        ("Operator", "Export Check Results"): "Выгрузить результаты проверки",
+        ("Operator", "Persist Check Results"): "Сохранить результаты проверки в файл",
         
         # Панель
         ("*", "Watertight Checker"): "Проверка замкнутости",
@@ -47,6 +499,7 @@ def register_translations():
         ("*", "Self-intersections"): "Самопересечения (Self-intersections)",
         ("*", "Focus on elements:"): "Фокус на элементах:",
         ("*", "Position:"): "Позиция:",
+        ("*", "Island:"): "Остров:",
         ("*", "Previous"): "Предыдущий",
         ("*", "Next"): "Следующий",
         ("*", "Additional solutions:"): "Дополнительные решения:",
@@ -60,12 +513,67 @@ def register_translations():
         ("*", "Apply Boolean"): "Применить Boolean",
         ("*", "Triangulate"): "Триангулировать (Triangulate)",
         ("*", "Fix intersections"): "Исправить пересечения (Fix intersections)",
+        ("*", "Weld tolerance"): "Допуск слияния (Weld tolerance)",
+        ("*", "Weld candidates"): "Несваренные швы (Weld candidates)",
+        ("*", "T-junctions"): "T-стыки (T-junctions)",
+        ("*", "Subdivide"): "Подразделить (Subdivide)",
+        ("*", "Winding number leak test"): "Проверка протекания (Winding number)",
+        ("*", "Leaky shells"): "Протекающие оболочки (Leaky shells)",
+        ("*", "Intersection processes"): "Процессов для самопересечений",
+        ("*", "Check instances"): "Проверить копии",
+        ("*", "No mesh instances to check"): "Нет копий мешей для проверки",
+        ("Report", "{name} ({count} instances): {status}"): "{name} (копий: {count}): {status}",
+        ("Report", "Intersecting instances: {count}"): "Пересекающиеся копии: {count}",
+        ("Report", "{first} #{first_index} and {second} #{second_index}"): "{first} №{first_index} и {second} №{second_index}",
+        ("Report", "Instances: {instances}, unique meshes: {meshes} ({time} s)"): "Копий: {instances}, уникальных мешей: {meshes} ({time} с)",
+        ("*", "Open boundaries: {count} edges"): "Открытые границы: {count} ребер",
+        ("*", "Loose geometry: {count} vertices"): "Неплотные соединения: {count} вершин",
+        ("*", "Inverted normals: ≈{estimate} ± {margin} faces"): "Перевернутые нормали: ≈{estimate} ± {margin} граней",
+        ("*", "Non-manifold: {count} edges"): "Non-manifold: {count} ребер",
+        ("*", "N-Gons: ≈{estimate} ± {margin} faces"): "N-угольники: ≈{estimate} ± {margin} граней",
+        ("*", "Zero-area faces: ≈{estimate} ± {margin}"): "Грани нулевой площади: ≈{estimate} ± {margin}",
+        ("*", "Zero-length edges: ≈{estimate} ± {margin}"): "Ребра нулевой длины: ≈{estimate} ± {margin}",
+        ("*", "Preview of {percent}% sample ({time} s)"): "Оценка по выборке {percent}% ({time} с)",
+        ("*", "Holes, welds, self-intersections and leaks are found only by the full check"): "Отверстия, швы, самопересечения и протекание находит только полная проверка",
+        ("*", "Preview finished, run the full check for exact results"): "Оценка готова, для точных результатов запустите полную проверку",
+        ("*", "Preview"): "Оценка",
+        ("*", "Sample"): "Выборка",
+        ("*", "Run full check"): "Полная проверка",
+        ("*", "Simulate export vertex splits"): "Моделировать разделение вершин при экспорте",
+        ("*", "Export splits: {count} edges (UV seams {uv}, hard normals {normals})"): "Разрезы при экспорте: ребер {count} (UV-швы {uv}, жесткие нормали {normals})",
+        ("*", "Exported vertices: {vertices} → {export_vertices} (×{ratio})"): "Вершин при экспорте: {vertices} → {export_vertices} (×{ratio})",
+        ("*", "Hide seams in occluded areas or add shadow proxy geometry"): "Спрячьте швы в невидимых местах или добавьте замкнутую геометрию для теней",
+        ("*", "Export splits"): "Разрезы при экспорте (Export splits)",
+        ("*", "Duplicate faces: {duplicates}, overlapping coplanar faces: {overlapping}"): "Дубликаты граней: {duplicates}, перекрывающиеся компланарные грани: {overlapping}",
+        ("*", "Delete duplicate faces"): "Удалите дубликаты граней",
+        ("*", "Remove or offset overlapping faces"): "Удалите или сместите перекрывающиеся грани",
+        ("*", "Degenerate geometry: {faces} zero-area faces, {edges} zero-length edges"): "Вырожденная геометрия: граней нулевой площади {faces}, ребер нулевой длины {edges}",
+        ("*", "Dissolve degenerate geometry"): "Растворите вырожденную геометрию",
+        ("*", "Duplicate faces"): "Дубликаты граней (Duplicate faces)",
+        ("*", "Overlapping faces"): "Перекрывающиеся грани (Overlapping faces)",
+        ("*", "Degenerate geometry"): "Вырожденная геометрия (Degenerate)",
+        ("*", "Delete duplicates"): "Удалить дубликаты",
+        ("*", "Degenerate Dissolve"): "Растворить вырожденные (Degenerate Dissolve)",
+        ("*", "Largest holes:"): "Крупнейшие отверстия:",
+        ("*", "Export results"): "Выгрузить результаты",
+        ("*", "Export failed: {error}"): "Ошибка выгрузки: {error}",
+        ("*", "No check results to export"): "Нет результатов проверки для выгрузки",
+        ("*", "Exported results for {count} objects"): "Выгружены результаты для {count} объектов",
+        ("*", "Persist results"): "Сохранить результаты в файл",
+        ("*", "No check results to persist"): "Нет результатов проверки для сохранения",
+        ("*", "Persisted results for {count} objects"): "Сохранены результаты для {count} объектов",
+        ("*", "...and {count} more"): "...и еще {count}",
+        ("*", "Hole {index}/{total}: perimeter {perimeter}, area {area}"):
+            "Отверстие {index}/{total}: периметр {perimeter}, площадь {area}",
+        ("*", "Island {index}/{total}: {count} elements, size {size}"):
+            "Остров {index}/{total}: элементов {count}, размер {size}",
         
         # Сообщения
         ("*", "No selected objects to check"): "Нет выделенных объектов для проверки",
         ("*", "Geometry problems detected"): "Обнаружены проблемы в геометрии",
         ("*", "All meshes are watertight"): "Все меши замкнуты",
         ("*", "Select a mesh object"): "Выделите mesh-объект",
+        ("*", "Select a checked mesh object"): "Выделите проверенный mesh-объект",
         ("*", "First select a problem"): "Сначала выделите проблему",
         ("*", "No problem elements found"): "Проблемные элементы не найдены",
         ("*", "Focus on element {index}/{total}"): "Фокус на элементе {index}/{total}",
@@ -100,6 +608,17 @@ def register_translations():
         ("Report", "Apply boolean operation"): "   - Применить Boolean (Boolean Operation)",
         ("Report", "Triangulate faces"): "   - Триангулировать грани (Triangulate)",
         ("Report", "Fix self-intersections"): "   - Исправить самопересечения (Fix intersections)",
+        ("Report", "Holes: {holes}, weld candidates: {welds}, T-junctions: {tjunctions}"):
+            "Дыры: {holes}, несваренные швы: {welds}, T-стыки: {tjunctions}",
+        ("Report", "Coincident vertex pairs: {count}"): "Совпадающих пар вершин: {count}",
+        ("Report", "Subdivide long edges at T-junctions and merge"):
+            "Подразделить длинные ребра в T-стыках и объединить вершины",
+        ("Report", "Leaky shells: {count} (max leak {leak}%)"):
+            "Протекающие оболочки (Leaky shells): {count} (макс. протекание {leak}%)",
+        ("Report", "Close the openings that leak inside/outside classification"):
+            "Закрыть отверстия, нарушающие разделение внутри/снаружи",
+        ("Report", "Boundary loops: {count}, largest perimeter {perimeter}"):
+            "Петли границ: {count}, наибольший периметр {perimeter}",
     }
     
     en_translations = {
@@ -108,6 +627,8 @@ def register_translations():
         ("Operator", "Recheck Watertight Geometry"): "Recheck Watertight Geometry",
         ("Operator", "Select Specific Problems"): "Select Specific Problems",
         ("Operator", "Focus on Problem Element"): "Focus on Problem Element",
+        ("Operator", "Export Check Results"): "Export Check Results",
+        ("Operator", "Persist Check Results"): "Persist Check Results",
         
         # Панель
         ("*", "Watertight Checker"): "Watertight Checker",
@@ -122,6 +643,7 @@ def register_translations():
         ("*", "Self-intersections"): "Self-intersections",
         ("*", "Focus on elements:"): "Focus on elements:",
         ("*", "Position:"): "Position:",
+        ("*", "Island:"): "Island:",
         ("*", "Previous"): "Previous",
         ("*", "Next"): "Next",
         ("*", "Additional solutions:"): "Additional solutions:",
@@ -135,12 +657,67 @@ def register_translations():
         ("*", "Apply Boolean"): "Apply Boolean",
         ("*", "Triangulate"): "Triangulate",
         ("*", "Fix intersections"): "Fix intersections",
+        ("*", "Weld tolerance"): "Weld tolerance",
+        ("*", "Weld candidates"): "Weld candidates",
+        ("*", "T-junctions"): "T-junctions",
+        ("*", "Subdivide"): "Subdivide",
+        ("*", "Winding number leak test"): "Winding number leak test",
+        ("*", "Leaky shells"): "Leaky shells",
+        ("*", "Intersection processes"): "Intersection processes",
+        ("*", "Check instances"): "Check instances",
+        ("*", "No mesh instances to check"): "No mesh instances to check",
+        ("Report", "{name} ({count} instances): {status}"): "{name} ({count} instances): {status}",
+        ("Report", "Intersecting instances: {count}"): "Intersecting instances: {count}",
+        ("Report", "{first} #{first_index} and {second} #{second_index}"): "{first} #{first_index} and {second} #{second_index}",
+        ("Report", "Instances: {instances}, unique meshes: {meshes} ({time} s)"): "Instances: {instances}, unique meshes: {meshes} ({time} s)",
+        ("*", "Open boundaries: {count} edges"): "Open boundaries: {count} edges",
+        ("*", "Loose geometry: {count} vertices"): "Loose geometry: {count} vertices",
+        ("*", "Inverted normals: ≈{estimate} ± {margin} faces"): "Inverted normals: ≈{estimate} ± {margin} faces",
+        ("*", "Non-manifold: {count} edges"): "Non-manifold: {count} edges",
+        ("*", "N-Gons: ≈{estimate} ± {margin} faces"): "N-Gons: ≈{estimate} ± {margin} faces",
+        ("*", "Zero-area faces: ≈{estimate} ± {margin}"): "Zero-area faces: ≈{estimate} ± {margin}",
+        ("*", "Zero-length edges: ≈{estimate} ± {margin}"): "Zero-length edges: ≈{estimate} ± {margin}",
+        ("*", "Preview of {percent}% sample ({time} s)"): "Preview of {percent}% sample ({time} s)",
+        ("*", "Holes, welds, self-intersections and leaks are found only by the full check"): "Holes, welds, self-intersections and leaks are found only by the full check",
+        ("*", "Preview finished, run the full check for exact results"): "Preview finished, run the full check for exact results",
+        ("*", "Preview"): "Preview",
+        ("*", "Sample"): "Sample",
+        ("*", "Run full check"): "Run full check",
+        ("*", "Simulate export vertex splits"): "Simulate export vertex splits",
+        ("*", "Export splits: {count} edges (UV seams {uv}, hard normals {normals})"): "Export splits: {count} edges (UV seams {uv}, hard normals {normals})",
+        ("*", "Exported vertices: {vertices} → {export_vertices} (×{ratio})"): "Exported vertices: {vertices} → {export_vertices} (×{ratio})",
+        ("*", "Hide seams in occluded areas or add shadow proxy geometry"): "Hide seams in occluded areas or add shadow proxy geometry",
+        ("*", "Export splits"): "Export splits",
+        ("*", "Duplicate faces: {duplicates}, overlapping coplanar faces: {overlapping}"): "Duplicate faces: {duplicates}, overlapping coplanar faces: {overlapping}",
+        ("*", "Delete duplicate faces"): "Delete duplicate faces",
+        ("*", "Remove or offset overlapping faces"): "Remove or offset overlapping faces",
+        ("*", "Degenerate geometry: {faces} zero-area faces, {edges} zero-length edges"): "Degenerate geometry: {faces} zero-area faces, {edges} zero-length edges",
+        ("*", "Dissolve degenerate geometry"): "Dissolve degenerate geometry",
+        ("*", "Duplicate faces"): "Duplicate faces",
+        ("*", "Overlapping faces"): "Overlapping faces",
+        ("*", "Degenerate geometry"): "Degenerate geometry",
+        ("*", "Delete duplicates"): "Delete duplicates",
+        ("*", "Degenerate Dissolve"): "Degenerate Dissolve",
+        ("*", "Largest holes:"): "Largest holes:",
+        ("*", "Export results"): "Export results",
+        ("*", "Export failed: {error}"): "Export failed: {error}",
+        ("*", "No check results to export"): "No check results to export",
+        ("*", "Exported results for {count} objects"): "Exported results for {count} objects",
+        ("*", "Persist results"): "Persist results",
+        ("*", "No check results to persist"): "No check results to persist",
+        ("*", "Persisted results for {count} objects"): "Persisted results for {count} objects",
+        ("*", "...and {count} more"): "...and {count} more",
+        ("*", "Hole {index}/{total}: perimeter {perimeter}, area {area}"):
+            "Hole {index}/{total}: perimeter {perimeter}, area {area}",
+        ("*", "Island {index}/{total}: {count} elements, size {size}"):
+            "Island {index}/{total}: {count} elements, size {size}",
         
         # Сообщения
         ("*", "No selected objects to check"): "No selected objects to check",
         ("*", "Geometry problems detected"): "Geometry problems detected",
         ("*", "All meshes are watertight"): "All meshes are watertight",
         ("*", "Select a mesh object"): "Select a mesh object",
+        ("*", "Select a checked mesh object"): "Select a checked mesh object",
         ("*", "First select a problem"): "First select a problem",
         ("*", "No problem elements found"): "No problem elements found",
         ("*", "Focus on element {index}/{total}"): "Focus on element {index}/{total}",
@@ -161,182 +738,429 @@ def register_translations():
 def unregister_translations():
     bpy.app.translations.unregister(__name__)
 
-class MESH_OT_check_watertight(Operator):
-    bl_idname = "mesh.check_watertight"
-    bl_label = _("Check Watertight Geometry")
-    bl_description = _("Проверяет замкнутость меша и наличие проблемных граней")
-    bl_options = {'REGISTER', 'UNDO'}
+class WatertightAnalyzer:
+    """Проверки замкнутости одного меша без привязки к контексту и операторам.
+    
+    Используется оператором проверки, пакетным сканером и скриптами.
+    """
+    
+    def __init__(self, weld_tolerance=WELD_TOLERANCE_DEFAULT, check_winding=False,
+                 check_export_split=False, intersection_workers=0):
+        self.weld_tolerance = weld_tolerance
+        self.check_winding = check_winding
+        self.check_export_split = check_export_split
+        # Процессов для поиска самопересечений (0 - по числу ядер)
+        self.intersection_workers = intersection_workers
+    
+    def analyze_mesh(self, mesh, origin=None):
+        """Проверяет меш и возвращает словарь результатов (см. analyze_bmesh)"""
+        started = time.perf_counter()
+        # Один хеш на проверку: и для сверки кеша, и в результат
+        signature = mesh_signature(mesh)
+        if not mesh.is_evaluated and not mesh.is_editmode:
+            geometry_cache.validate(mesh.session_uid, signature)
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+        bm.edges.ensure_lookup_table()
+        bm.faces.ensure_lookup_table()
+        bm.verts.ensure_lookup_table()
+        bmesh_time = time.perf_counter() - started
+        
+        try:
+            result = self.analyze_bmesh(bm, origin, mesh)
+        finally:
+            bm.free()
+        
+        result["timings"]["bmesh"] = bmesh_time
+        result["timings"]["total"] += bmesh_time
+        result["mesh_hash"] = signature[1]
+        return result
+    
+    def preview_mesh(self, mesh, origin=None, fraction=PREVIEW_FRACTION_DEFAULT):
+        """Быстрая оценка числа проблем по стратифицированной выборке элементов.
+        
+        Открытые границы, non-manifold ребра и неплотные вершины считаются
+        точно по кешированным массивам инцидентности (полуширина интервала 0).
+        По выборке проверяются только свойства, требующие геометрии: размер,
+        площадь и ориентация грани, длина ребра; BMesh и BVH не строятся.
+        Возвращает словарь: estimates (свойство -> (оценка, полуширина 95%
+        интервала)), exact (точно посчитанные свойства), population
+        (свойство -> всего элементов), sampled (свойство -> размер выборки),
+        fraction и timings.
+        """
+        import numpy as np
+        from . import degenerate, sampling
+        
+        started = time.perf_counter()
+        arrays = cached_geometry(mesh, "arrays")
+        incidence = cached_geometry(mesh, "incidence")
+        coords = arrays["coords"]
+        edge_verts = arrays["edge_verts"]
+        if origin is None:
+            origin = Vector()
+        
+        flags = {}
+        samples = {}
+        
+        # Грани: N-угольники, перевернутые нормали, нулевая площадь
+        if len(arrays["loop_totals"]):
+            face_points = coords[arrays["loop_verts"][arrays["loop_starts"]]]
+            faces, *strata = sampling.stratified_sample(face_points, fraction)
+            totals = arrays["loop_totals"][faces]
+            area_vectors, longest, face_verts, offsets = degenerate.face_metrics(
+                coords, arrays["loop_verts"], arrays["loop_starts"][faces], totals)
+            centers = np.add.reduceat(coords[face_verts], offsets, axis=0) / totals[:, None]
+            areas = np.linalg.norm(area_vectors, axis=1)
+            flags["ngon_faces"] = totals > 4
+            flags["inverted_normals"] = np.einsum("ij,ij->i", area_vectors, centers - np.array(origin)) < 0
+            flags["degenerate_faces"] = 2.0 * areas <= self.weld_tolerance * longest
+            for key in ("ngon_faces", "inverted_normals", "degenerate_faces"):
+                samples[key] = strata
+        
+        # Ребра нулевой длины по выборке
+        if len(edge_verts):
+            edges, *strata = sampling.stratified_sample(coords[edge_verts[:, 0]], fraction, seed=1)
+            lengths = np.linalg.norm(coords[edge_verts[edges, 1]] - coords[edge_verts[edges, 0]], axis=1)
+            flags["zero_length_edges"] = lengths <= self.weld_tolerance
+            samples["zero_length_edges"] = strata
+        
+        result = {"estimates": {}, "exact": set(), "population": {}, "sampled": {}, "fraction": fraction}
+        
+        # Число граней у ребра и ребер у вершины уже посчитано в кеше: точно
+        edge_faces = incidence["edge_faces"]
+        vert_edges = incidence["vert_edges"]
+        exact = {
+            "boundary_edges": edge_faces == 1,
+            "non_manifold_edges": edge_faces != 2,
+            "loose_verts": vert_edges < 2,
+        }
+        for key, element_flags in exact.items():
+            result["estimates"][key] = (float(np.count_nonzero(element_flags)), 0.0)
+            result["exact"].add(key)
+            result["population"][key] = len(element_flags)
+            result["sampled"][key] = len(element_flags)
+        
+        for key, element_flags in flags.items():
+            sample_strata, population, sampled = samples[key]
+            result["estimates"][key] = sampling.estimate_count(element_flags, sample_strata, population, sampled)
+            result["population"][key] = int(population.sum())
+            result["sampled"][key] = len(sample_strata)
+        result["timings"] = {"total": time.perf_counter() - started}
+        return result
 
-    def execute(self, context):
-        scene = context.scene
-        # Очищаем предыдущий отчет
-        scene[PREFIX + "report"] = ""
-        scene[PREFIX + "error_types"] = ""  # Храним как строку вместо множества
+    def analyze_bmesh(self, bm, origin=None, mesh=None):
+        """Выполняет все проверки над BMesh с готовыми таблицами поиска.
+        
+        origin - точка, относительно которой оцениваются нормали
+        (для объекта - его положение). mesh - исходный меш, из которого
+        массивы для векторных проверок берутся через foreach_get (без него
+        они собираются по BMesh). Возвращает словарь:
+        indices (свойство -> индексы элементов), loops (петли отверстий),
+        islands (тип проблемы -> острова элементов),
+        export_split (счетчики разделения вершин экспортером или None),
+        coincident_pairs, leaky_shells, max_leak, timings и error_types.
+        """
+        if origin is None:
+            origin = Vector()
         
-        results = []
-        has_errors = False
         error_types = set()
+        timings = {}
+        object_started = time.perf_counter()
         
-        # Проверяем есть ли выделенные объекты
-        if not context.selected_objects:
-            self.report({'INFO'}, _("No selected objects to check"))
-            return {'CANCELLED'}
+        # Проверка 1: Открытые границы (ребра с <2 граней)
+        started = time.perf_counter()
+        boundary_edges = [e for e in bm.edges if e.is_boundary]
+        timings["boundary"] = time.perf_counter() - started
+        if boundary_edges:
+            error_types.add("BOUNDARY")
         
-        # Сброс кэшированных данных на всех объектах перед началом новой проверки
-        for obj in context.selected_objects:
-            if hasattr(obj, PREFIX + "boundary_edges"):
-                obj[PREFIX + "boundary_edges"] = []
-            if hasattr(obj, PREFIX + "loose_verts"):
-                obj[PREFIX + "loose_verts"] = []
-            if hasattr(obj, PREFIX + "inverted_normals"):
-                obj[PREFIX + "inverted_normals"] = []
-            if hasattr(obj, PREFIX + "non_manifold_edges"):
-                obj[PREFIX + "non_manifold_edges"] = []
-            if hasattr(obj, PREFIX + "non_manifold_verts"):
-                obj[PREFIX + "non_manifold_verts"] = []
-            if hasattr(obj, PREFIX + "ngon_faces"):
-                obj[PREFIX + "ngon_faces"] = []
-            if hasattr(obj, PREFIX + "intersecting_faces"):
-                obj[PREFIX + "intersecting_faces"] = []
+        # Координаты вершин для проверок открытых границ
+        points = [v.co.to_tuple() for v in bm.verts] if boundary_edges else []
         
-        for obj in context.selected_objects:
-            if obj.type != 'MESH':
-                continue
-
-            mesh = obj.data
-            
-            # Очистка кэшированных данных для текущего объекта
-            obj[PREFIX + "boundary_edges"] = []
-            obj[PREFIX + "loose_verts"] = []
-            obj[PREFIX + "inverted_normals"] = []
-            obj[PREFIX + "non_manifold_edges"] = []
-            obj[PREFIX + "non_manifold_verts"] = []
-            obj[PREFIX + "ngon_faces"] = []
-            obj[PREFIX + "intersecting_faces"] = []
-            
-            # Принудительное обновление данных меша
-            bm = bmesh.new()
-            bm.from_mesh(mesh)
-            bm.edges.ensure_lookup_table()
-            bm.faces.ensure_lookup_table()
-            bm.verts.ensure_lookup_table()
-
-            # Проверка 1: Открытые границы (ребра с <2 граней)
-            boundary_edges = [e for e in bm.edges if e.is_boundary]
-            if boundary_edges:
-                error_types.add("BOUNDARY")
-            
-            # Проверка 2: Неплотные соединения (вершины с <2 ребер)
-            loose_verts = [v for v in bm.verts if len(v.link_edges) < 2 and not v.hide]
-            if loose_verts:
-                error_types.add("LOOSE")
+        # Проверка 1а: Классификация открытых границ (дыра, несваренный шов, T-стык)
+        started = time.perf_counter()
+        weld_edges, tjunction_edges, coincident_pairs = self.classify_boundary_edges(
+            points, boundary_edges, self.weld_tolerance)
+        if weld_edges:
+            error_types.add("WELD")
+        if tjunction_edges:
+            error_types.add("TJUNCTION")
+        timings["weld"] = time.perf_counter() - started
+        
+        # Проверка 1б: Упорядоченные петли открытых границ с метриками отверстий
+        started = time.perf_counter()
+        hole_loops = boundary_loops.extract_loops(
+            points, [(e.index, e.verts[0].index, e.verts[1].index) for e in boundary_edges])
+        timings["boundary_loops"] = time.perf_counter() - started
+        
+        # Проверка 2: Неплотные соединения (вершины с <2 ребер)
+        started = time.perf_counter()
+        loose_verts = [v for v in bm.verts if len(v.link_edges) < 2 and not v.hide]
+        timings["loose"] = time.perf_counter() - started
+        if loose_verts:
+            error_types.add("LOOSE")
+        
+        # Проверка 3: Перевернутые нормали
+        started = time.perf_counter()
+        inverted_normals = []
+        for face in bm.faces:
+            # Вычисляем центр грани
+            face_center = Vector()
+            for vert in face.verts:
+                face_center += vert.co
+            face_center /= len(face.verts)
             
-            # Проверка 3: Перевернутые нормали
-            inverted_normals = []
-            for face in bm.faces:
-                # Вычисляем центр грани
-                face_center = Vector()
-                for vert in face.verts:
-                    face_center += vert.co
-                face_center /= len(face.verts)
+            # Проверяем направление нормали
+            if face.normal.dot(face_center - origin) < 0:
+                inverted_normals.append(face)
                 
-                # Проверяем направление нормали
-                if face.normal.dot(face_center - obj.location) < 0:
-                    inverted_normals.append(face)
-                    
-            if inverted_normals:
-                error_types.add("NORMALS")
-            
-            # Проверка 4: Не manifold геометрия
-            non_manifold_edges = [e for e in bm.edges if not e.is_manifold]
-            non_manifold_verts = [v for v in bm.verts if not v.is_manifold]
-            if non_manifold_edges or non_manifold_verts:
-                error_types.add("MANIFOLD")
-
-            # Проверка 5: N-gons (грани с более чем 4 вершинами)
-            ngon_faces = [f for f in bm.faces if len(f.verts) > 4]
-            if ngon_faces:
-                error_types.add("NGONS")
-
-            # Проверка 6: Самопересечения
-            intersecting_faces = self.check_self_intersections(bm, obj)
-            if intersecting_faces:
-                error_types.add("INTERSECTIONS")
+        timings["normals"] = time.perf_counter() - started
+        if inverted_normals:
+            error_types.add("NORMALS")
+        
+        # Проверка 4: Не manifold геометрия
+        started = time.perf_counter()
+        non_manifold_edges = [e for e in bm.edges if not e.is_manifold]
+        non_manifold_verts = [v for v in bm.verts if not v.is_manifold]
+        timings["manifold"] = time.perf_counter() - started
+        if non_manifold_edges or non_manifold_verts:
+            error_types.add("MANIFOLD")
 
-            # Формирование отчета с пояснениями и рекомендациями
-            errors = []
-            if boundary_edges:
-                errors.append("❌ " + _("Open boundaries: {count} edges (<2 faces)").format(count=len(boundary_edges)))
-                errors.append("   - " + _("Fill holes"))
-                errors.append("   - " + _("Connect edges"))
-                
-            if loose_verts:
-                errors.append("❌ " + _("Loose geometry: {count} vertices (<2 edges)").format(count=len(loose_verts)))
-                errors.append("   - " + _("Merge by distance"))
-                errors.append("   - " + _("Delete extra vertices"))
-                
-            if inverted_normals:
-                errors.append("❌ " + _("Inverted normals: {count} polygons").format(count=len(inverted_normals)))
-                errors.append("   - " + _("Flip normals"))
-                errors.append("   - " + _("Recalculate outward"))
-                
-            if non_manifold_edges or non_manifold_verts:
-                errors.append("❌ " + _("Non-manifold: {edges} edges, {verts} vertices").format(
-                    edges=len(non_manifold_edges), 
-                    verts=len(non_manifold_verts)))
-                errors.append("   - " + _("Delete internal surfaces"))
-                errors.append("   - " + _("Apply boolean operation"))
-
-            if ngon_faces:
-                errors.append("❌ " + _("N-Gons: {count} faces (>4 vertices)").format(count=len(ngon_faces)))
-                errors.append("   - " + _("Triangulate faces"))
-                
-            if intersecting_faces:
-                errors.append("❌ " + _("Self-intersections: {count} faces").format(count=len(intersecting_faces)))
-                errors.append("   - " + _("Fix self-intersections"))
+        # Проверка 5: N-gons (грани с более чем 4 вершинами)
+        started = time.perf_counter()
+        ngon_faces = [f for f in bm.faces if len(f.verts) > 4]
+        timings["ngons"] = time.perf_counter() - started
+        if ngon_faces:
+            error_types.add("NGONS")
 
-            status = _("Watertight") if not errors else _("Not watertight")
-            status_symbol = "✅ " + status if not errors else "❌ " + status
-            results.append(f"{obj.name}: {status_symbol}")
-            
-            if errors:
-                has_errors = True
-                results.extend(errors)
-                
-                # Сохраняем проблемы для последующего выделения
-                obj[PREFIX + "boundary_edges"] = [e.index for e in boundary_edges]
-                obj[PREFIX + "loose_verts"] = [v.index for v in loose_verts]
-                obj[PREFIX + "inverted_normals"] = [f.index for f in inverted_normals]
-                obj[PREFIX + "non_manifold_edges"] = [e.index for e in non_manifold_edges]
-                obj[PREFIX + "non_manifold_verts"] = [v.index for v in non_manifold_verts]
-                obj[PREFIX + "ngon_faces"] = [f.index for f in ngon_faces]
-                obj[PREFIX + "intersecting_faces"] = [f.index for f in intersecting_faces]
-            else:
-                # Очищаем данные о проблемах, если их нет
-                obj[PREFIX + "boundary_edges"] = []
-                obj[PREFIX + "loose_verts"] = []
-                obj[PREFIX + "inverted_normals"] = []
-                obj[PREFIX + "non_manifold_edges"] = []
-                obj[PREFIX + "non_manifold_verts"] = []
-                obj[PREFIX + "ngon_faces"] = []
-                obj[PREFIX + "intersecting_faces"] = []
+        # Проверка 6: Самопересечения. По массивам меша - ячейками октодерева в
+        # пуле процессов, без меша - через BVHTree по BMesh
+        started = time.perf_counter()
+        arrays = cached_arrays_for_bmesh(mesh, bm) if mesh is not None else None
+        from_mesh = arrays is not None
+        if from_mesh:
+            intersecting_faces = [bm.faces[i] for i in self.check_self_intersections_partitioned(mesh, arrays)]
+        else:
+            intersecting_faces = self.check_self_intersections(bm)
+        timings["intersections"] = time.perf_counter() - started
+        if intersecting_faces:
+            error_types.add("INTERSECTIONS")
 
-            bm.free()
+        # Проверка 7 (опционально): Протекание оболочек по обобщенному числу оборотов
+        leaky_faces, leaky_shells, max_leak = [], 0, 0.0
+        if self.check_winding:
+            started = time.perf_counter()
+            bvh = cached_geometry(mesh, "bvh") if from_mesh else None
+            leaky_faces, leaky_shells, max_leak = self.check_winding_leaks(bm, bvh)
+            timings["winding"] = time.perf_counter() - started
+            if leaky_faces:
+                error_types.add("LEAKY")
+        
+        # Проверка 8: Дубликаты, компланарные перекрытия и вырожденная геометрия
+        from . import degenerate, export_split
+        started = time.perf_counter()
+        if arrays is None:
+            arrays = bmesh_arrays(bm)
+        face_checks = degenerate.check_faces(
+            arrays["coords"], arrays["edge_verts"], arrays["loop_verts"],
+            arrays["loop_starts"], arrays["loop_totals"], self.weld_tolerance)
+        timings["degenerate"] = time.perf_counter() - started
+        if len(face_checks["duplicate_faces"]):
+            error_types.add("DUPLICATES")
+        if len(face_checks["overlapping_faces"]):
+            error_types.add("OVERLAPS")
+        if len(face_checks["degenerate_faces"]) or len(face_checks["zero_length_edges"]):
+            error_types.add("DEGENERATE")
+        
+        # Проверка 9 (опционально): Разделение вершин экспортером по UV-швам и нормалям.
+        # Нормали углов есть только у меша, поэтому без его массивов проверка пропускается
+        split_stats = None
+        split_indices = []
+        if self.check_export_split and from_mesh:
+            started = time.perf_counter()
+            corners = mesh_corner_arrays(mesh)
+            split = export_split.simulate_split(
+                arrays["loop_verts"], corners["loop_edges"], arrays["loop_starts"],
+                arrays["loop_totals"], corners["normals"], corners["uvs"])
+            timings["export_split"] = time.perf_counter() - started
+            split_indices = split["split_edges"].tolist()
+            split_stats = {
+                "vertices": split["vertices"],
+                "export_vertices": split["export_vertices"],
+                "uv_edges": len(split["uv_edges"]),
+                "normal_edges": len(split["normal_edges"]),
+            }
+            if split_indices:
+                error_types.add("SPLITS")
+        
+        indices = {
+            "boundary_edges": [e.index for e in boundary_edges],
+            "loose_verts": [v.index for v in loose_verts],
+            "inverted_normals": [f.index for f in inverted_normals],
+            "non_manifold_edges": [e.index for e in non_manifold_edges],
+            "non_manifold_verts": [v.index for v in non_manifold_verts],
+            "ngon_faces": [f.index for f in ngon_faces],
+            "intersecting_faces": [f.index for f in intersecting_faces],
+            "weld_edges": [e.index for e in weld_edges],
+            "tjunction_edges": [e.index for e in tjunction_edges],
+            "leaky_faces": [f.index for f in leaky_faces],
+        }
+        indices.update({key: values.tolist() for key, values in face_checks.items()})
+        indices["split_edges"] = split_indices
+        
+        # Группировка проблемных элементов в острова для навигации
+        started = time.perf_counter()
+        problem_islands = self.find_problem_islands(bm, indices, error_types)
+        timings["islands"] = time.perf_counter() - started
+        
+        timings["total"] = time.perf_counter() - object_started
+        
+        return {
+            "indices": indices,
+            "loops": hole_loops,
+            "islands": problem_islands,
+            "export_split": split_stats,
+            "coincident_pairs": len(coincident_pairs),
+            "leaky_shells": leaky_shells,
+            "max_leak": max_leak,
+            "timings": timings,
+            "error_types": error_types,
+        }
 
-        # Формирование финального отчета
-        report_msg = "\n".join(results)
-        # Сохраняем error_types как строку с разделителем
-        scene[PREFIX + "error_types"] = ",".join(error_types)
-        scene[PREFIX + "report"] = report_msg
+    def find_problem_islands(self, bm, indices, error_types):
+        """Острова проблемных элементов каждой категории.
         
-        if has_errors:
-            self.report({'WARNING'}, _("Geometry problems detected"))
-        else:
-            self.report({'INFO'}, _("All meshes are watertight"))
+        Открытые границы уже сгруппированы в петли отверстий, поэтому
+        для них острова не строятся.
+        """
+        problem_types = [problem_type for problem_type in PROBLEM_ELEMENTS
+                         if problem_type in error_types and problem_type != 'BOUNDARY']
+        if not problem_types:
+            return {}
+        
+        points = [v.co.to_tuple() for v in bm.verts]
+        lo = [min(co[axis] for co in points) for axis in range(3)]
+        hi = [max(co[axis] for co in points) for axis in range(3)]
+        diagonal = sum((hi[axis] - lo[axis]) ** 2 for axis in range(3)) ** 0.5
+        
+        sequences = {'EDGE': bm.edges, 'FACE': bm.faces}
+        problem_islands = {}
+        for problem_type in problem_types:
+            # Порядок элементов совпадает с get_problem_elements
+            element_verts = []
+            for prop_name, kind in PROBLEM_ELEMENTS[problem_type]:
+                if kind == 'VERT':
+                    element_verts.extend((idx,) for idx in indices[prop_name])
+                else:
+                    sequence = sequences[kind]
+                    element_verts.extend(
+                        tuple(v.index for v in sequence[idx].verts) for idx in indices[prop_name])
+            problem_islands[problem_type] = islands.cluster_elements(
+                points, element_verts, diagonal * ISLAND_GRID_FRACTION)
+        return problem_islands
+
+    def classify_boundary_edges(self, points, boundary_edges, tolerance):
+        """Разделяет открытые границы на несваренные швы, T-стыки и настоящие дыры"""
+        if not boundary_edges:
+            return [], [], []
+        
+        edge_verts = [(e.verts[0].index, e.verts[1].index) for e in boundary_edges]
+        classes, coincident_pairs = spatial_hash.classify_boundary_edges(points, edge_verts, tolerance)
+        
+        weld_edges = [e for e, cls in zip(boundary_edges, classes) if cls == spatial_hash.EDGE_WELD]
+        tjunction_edges = [e for e, cls in zip(boundary_edges, classes) if cls == spatial_hash.EDGE_TJUNCTION]
+        return weld_edges, tjunction_edges, coincident_pairs
+
+    def find_shells(self, bm):
+        """Разбивает грани на оболочки, связанные через общие ребра"""
+        shells = []
+        visited = set()
+        for start in bm.faces:
+            if start.index in visited:
+                continue
+            visited.add(start.index)
+            shell = [start]
+            stack = [start]
+            while stack:
+                face = stack.pop()
+                for edge in face.edges:
+                    for other in edge.link_faces:
+                        if other.index not in visited:
+                            visited.add(other.index)
+                            shell.append(other)
+                            stack.append(other)
+            shells.append(shell)
+        return shells
+
+    def check_winding_leaks(self, bm, bvh=None):
+        """Оценивает протекание каждой оболочки по обобщенному числу оборотов.
+        
+        bvh - готовое дерево по всему мешу (из кеша); без него строится по BMesh.
+        """
+        from mathutils.bvhtree import BVHTree
+        
+        leaky_faces = []
+        leaky_shells = 0
+        max_leak = 0.0
+        
+        try:
+            if bvh is None:
+                bvh = BVHTree.FromBMesh(bm)
             
-        return {'FINISHED'}
+            # Треугольники каждой грани для построения дерева оболочки
+            triangles_by_face = {}
+            for loop_tri in bm.calc_loop_triangles():
+                triangles_by_face.setdefault(loop_tri[0].face.index, []).append(
+                    tuple(loop.vert.co.to_tuple() for loop in loop_tri))
+            
+            for shell in self.find_shells(bm):
+                triangles = [tri for face in shell for tri in triangles_by_face.get(face.index, ())]
+                if not triangles:
+                    continue
+                
+                tree = winding.WindingTree(triangles)
+                samples = self.winding_query_samples(bvh, shell)
+                leak, _inside = winding.shell_leakage(tree, samples)
+                if leak > WINDING_LEAK_THRESHOLD:
+                    leaky_shells += 1
+                    leaky_faces.extend(shell)
+                    max_leak = max(max_leak, leak)
+                    
+        except Exception as e:
+            log_message(f"Ошибка при проверке числа оборотов: {str(e)}")
+        
+        return leaky_faces, leaky_shells, max_leak
 
-    def check_self_intersections(self, bm, obj):
+    def winding_query_samples(self, bvh, shell):
+        """Точки запроса по обе стороны граней оболочки, на середине толщины"""
+        bb_min = Vector(shell[0].verts[0].co)
+        bb_max = Vector(shell[0].verts[0].co)
+        for face in shell:
+            for vert in face.verts:
+                for axis in range(3):
+                    bb_min[axis] = min(bb_min[axis], vert.co[axis])
+                    bb_max[axis] = max(bb_max[axis], vert.co[axis])
+        diagonal = max((bb_max - bb_min).length, 1e-6)
+        offset = diagonal * 1e-5
+        
+        step = max(1, len(shell) // WINDING_SAMPLES_PER_SHELL)
+        samples = []
+        for face in shell[::step]:
+            normal = face.normal
+            if normal.length_squared == 0.0:
+                continue
+            center = face.calc_center_median()
+            candidates = []
+            for direction in (-normal, normal):
+                # Середина между гранью и следующей поверхностью по лучу;
+                # если луч ушел в пустоту, берем точку на половине габарита
+                hit = bvh.ray_cast(center + direction * offset, direction)
+                distance = hit[3] if hit[0] is not None else diagonal
+                candidates.append((center + direction * (distance * 0.5)).to_tuple())
+            samples.append(candidates)
+        return samples
+
+    def check_self_intersections(self, bm):
         """Проверяет геометрию на самопересечения"""
         import mathutils
         from mathutils.bvhtree import BVHTree
@@ -379,6 +1203,22 @@ class MESH_OT_check_watertight(Operator):
             
         return intersecting_faces
 
+    def check_self_intersections_partitioned(self, mesh, arrays):
+        """Индексы самопересекающихся граней по массивам меша (см. модуль intersections)"""
+        from . import intersections
+        
+        try:
+            faces, stats = intersections.find_intersecting_faces(
+                arrays["coords"], arrays["loop_verts"], arrays["loop_starts"], arrays["loop_totals"],
+                triangles=cached_geometry(mesh, "triangles"), workers=self.intersection_workers or None)
+        except Exception as e:
+            log_message(f"Ошибка при проверке самопересечений: {str(e)}")
+            return []
+        if "error" in stats:
+            log_message(f"Пул процессов недоступен, самопересечения проверены в одном процессе: {stats['error']}")
+        debug_message(f"Самопересечения: ячеек {stats['cells']}, процессов {stats['workers']}")
+        return faces.tolist()
+
     def are_faces_adjacent(self, face1, face2):
         """Проверяет, являются ли грани смежными (имеют общие вершины)"""
         verts1 = {v for v in face1.verts}
@@ -433,11 +1273,230 @@ class MESH_OT_check_watertight(Operator):
             
         return True
 
+def format_preview_lines(preview):
+    """Строки отчета быстрой оценки: точные числа или оценка и 95% интервал"""
+    templates = [
+        ("boundary_edges", _("Open boundaries: {count} edges")),
+        ("loose_verts", _("Loose geometry: {count} vertices")),
+        ("inverted_normals", _("Inverted normals: ≈{estimate} ± {margin} faces")),
+        ("non_manifold_edges", _("Non-manifold: {count} edges")),
+        ("ngon_faces", _("N-Gons: ≈{estimate} ± {margin} faces")),
+        ("degenerate_faces", _("Zero-area faces: ≈{estimate} ± {margin}")),
+        ("zero_length_edges", _("Zero-length edges: ≈{estimate} ± {margin}")),
+    ]
+    lines = []
+    for key, template in templates:
+        if key not in preview["estimates"]:
+            continue
+        estimate, margin = preview["estimates"][key]
+        if estimate <= 0.0 and margin <= 0.0:
+            continue
+        if key in preview["exact"]:
+            lines.append("❌ " + template.format(count=round(estimate)))
+        else:
+            # Без попаданий в выборку проблема не исключена: показываем верхнюю границу
+            icon = "❌ " if estimate > 0.0 else "❔ "
+            lines.append(icon + template.format(estimate=round(estimate), margin=round(margin)))
+    return lines
+
+def preview_status_icon(preview):
+    """❌ - проблемы найдены, ✅ - исключены, ❔ - в выборке нет, но не исключены"""
+    estimates = preview["estimates"].values()
+    if any(estimate > 0.0 for estimate, _margin in estimates):
+        return "❌"
+    if any(margin > 0.0 for _estimate, margin in estimates):
+        return "❔"
+    return "✅"
+
+def format_result_lines(result):
+    """Строки отчета с пояснениями и рекомендациями для результата проверки"""
+    indices = result["indices"]
+    boundary_edges = indices["boundary_edges"]
+    weld_edges = indices["weld_edges"]
+    tjunction_edges = indices["tjunction_edges"]
+    
+    errors = []
+    if boundary_edges:
+        errors.append("❌ " + _("Open boundaries: {count} edges (<2 faces)").format(count=len(boundary_edges)))
+        errors.append("   " + _("Holes: {holes}, weld candidates: {welds}, T-junctions: {tjunctions}").format(
+            holes=len(boundary_edges) - len(weld_edges) - len(tjunction_edges),
+            welds=len(weld_edges),
+            tjunctions=len(tjunction_edges)))
+        errors.append("   " + _("Boundary loops: {count}, largest perimeter {perimeter}").format(
+            count=len(result["loops"]["perimeters"]),
+            perimeter=f"{max(result['loops']['perimeters']):.4g}"))
+        if result["coincident_pairs"]:
+            errors.append("   " + _("Coincident vertex pairs: {count}").format(count=result["coincident_pairs"]))
+        if weld_edges:
+            errors.append("   - " + _("Merge by distance"))
+        if tjunction_edges:
+            errors.append("   - " + _("Subdivide long edges at T-junctions and merge"))
+        if len(weld_edges) + len(tjunction_edges) < len(boundary_edges):
+            errors.append("   - " + _("Fill holes"))
+            errors.append("   - " + _("Connect edges"))
+        
+    if indices["loose_verts"]:
+        errors.append("❌ " + _("Loose geometry: {count} vertices (<2 edges)").format(count=len(indices["loose_verts"])))
+        errors.append("   - " + _("Merge by distance"))
+        errors.append("   - " + _("Delete extra vertices"))
+        
+    if indices["inverted_normals"]:
+        errors.append("❌ " + _("Inverted normals: {count} polygons").format(count=len(indices["inverted_normals"])))
+        errors.append("   - " + _("Flip normals"))
+        errors.append("   - " + _("Recalculate outward"))
+        
+    if indices["non_manifold_edges"] or indices["non_manifold_verts"]:
+        errors.append("❌ " + _("Non-manifold: {edges} edges, {verts} vertices").format(
+            edges=len(indices["non_manifold_edges"]), 
+            verts=len(indices["non_manifold_verts"])))
+        errors.append("   - " + _("Delete internal surfaces"))
+        errors.append("   - " + _("Apply boolean operation"))
+
+    if indices["ngon_faces"]:
+        errors.append("❌ " + _("N-Gons: {count} faces (>4 vertices)").format(count=len(indices["ngon_faces"])))
+        errors.append("   - " + _("Triangulate faces"))
+        
+    if indices["intersecting_faces"]:
+        errors.append("❌ " + _("Self-intersections: {count} faces").format(count=len(indices["intersecting_faces"])))
+        errors.append("   - " + _("Fix self-intersections"))
+
+    if indices["duplicate_faces"] or indices["overlapping_faces"]:
+        errors.append("❌ " + _("Duplicate faces: {duplicates}, overlapping coplanar faces: {overlapping}").format(
+            duplicates=len(indices["duplicate_faces"]),
+            overlapping=len(indices["overlapping_faces"])))
+        if indices["duplicate_faces"]:
+            errors.append("   - " + _("Delete duplicate faces"))
+        if indices["overlapping_faces"]:
+            errors.append("   - " + _("Remove or offset overlapping faces"))
+    
+    if indices["degenerate_faces"] or indices["zero_length_edges"]:
+        errors.append("❌ " + _("Degenerate geometry: {faces} zero-area faces, {edges} zero-length edges").format(
+            faces=len(indices["degenerate_faces"]),
+            edges=len(indices["zero_length_edges"])))
+        errors.append("   - " + _("Dissolve degenerate geometry"))
+    
+    if indices["split_edges"]:
+        split = result["export_split"]
+        errors.append("❌ " + _("Export splits: {count} edges (UV seams {uv}, hard normals {normals})").format(
+            count=len(indices["split_edges"]),
+            uv=split["uv_edges"],
+            normals=split["normal_edges"]))
+        errors.append("   " + _("Exported vertices: {vertices} → {export_vertices} (×{ratio})").format(
+            vertices=split["vertices"],
+            export_vertices=split["export_vertices"],
+            ratio=f"{split['export_vertices'] / max(split['vertices'], 1):.2f}"))
+        errors.append("   - " + _("Hide seams in occluded areas or add shadow proxy geometry"))
+    
+    if indices["leaky_faces"]:
+        errors.append("❌ " + _("Leaky shells: {count} (max leak {leak}%)").format(
+            count=result["leaky_shells"],
+            leak=round(result["max_leak"] * 100)))
+        errors.append("   - " + _("Close the openings that leak inside/outside classification"))
+    
+    return errors
+
+class MESH_OT_check_watertight(Operator):
+    bl_idname = "mesh.check_watertight"
+    bl_label = _("Check Watertight Geometry")
+    bl_description = _("Проверяет замкнутость меша и наличие проблемных граней")
+    # Без UNDO: результаты хранятся в памяти сессии и не меняют данные файла
+    bl_options = {'REGISTER'}
+
+    preview: BoolProperty(
+        name="Preview",
+        description=_("Быстрая оценка по выборке элементов вместо полной проверки"),
+        default=False,
+        options={'SKIP_SAVE'}
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        state = result_store.scene_state(scene)
+        # Очищаем предыдущий отчет
+        state["report"] = ""
+        state["error_types"] = set()
+        state["preview"] = self.preview
+        
+        if self.preview:
+            return self.execute_preview(context, state)
+        
+        results = []
+        has_errors = False
+        error_types = set()
+        
+        # Проверяем есть ли выделенные объекты
+        if not context.selected_objects:
+            self.report({'INFO'}, _("No selected objects to check"))
+            return {'CANCELLED'}
+        
+        analyzer = WatertightAnalyzer(
+            weld_tolerance=getattr(scene, PREFIX + "weld_tolerance", WELD_TOLERANCE_DEFAULT),
+            check_winding=getattr(scene, PREFIX + "check_winding", False),
+            check_export_split=getattr(scene, PREFIX + "check_export_split", False),
+            intersection_workers=getattr(scene, PREFIX + "intersection_workers", 0))
+        
+        for obj in context.selected_objects:
+            if obj.type != 'MESH':
+                continue
+            
+            result = analyzer.analyze_mesh(obj.data, obj.location)
+            error_types |= result["error_types"]
+            
+            # Формирование отчета с пояснениями и рекомендациями
+            errors = format_result_lines(result)
+            status = _("Watertight") if not errors else _("Not watertight")
+            status_symbol = "✅ " + status if not errors else "❌ " + status
+            results.append(f"{obj.name}: {status_symbol}")
+            
+            if errors:
+                has_errors = True
+                results.extend(errors)
+            
+            result_store.set_result(obj, result)
+
+        # Формирование финального отчета
+        state["error_types"] = error_types
+        state["report"] = "\n".join(results)
+        
+        if has_errors:
+            self.report({'WARNING'}, _("Geometry problems detected"))
+        else:
+            self.report({'INFO'}, _("All meshes are watertight"))
+            
+        return {'FINISHED'}
+
+    def execute_preview(self, context, state):
+        """Быстрая оценка выделенных объектов без сохранения индексов"""
+        scene = context.scene
+        meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        if not meshes:
+            self.report({'INFO'}, _("No selected objects to check"))
+            return {'CANCELLED'}
+        
+        fraction = getattr(scene, PREFIX + "preview_fraction", PREVIEW_FRACTION_DEFAULT)
+        analyzer = WatertightAnalyzer(
+            weld_tolerance=getattr(scene, PREFIX + "weld_tolerance", WELD_TOLERANCE_DEFAULT))
+        
+        results = []
+        for obj in meshes:
+            preview = analyzer.preview_mesh(obj.data, obj.location, fraction)
+            lines = format_preview_lines(preview)
+            status = _("Preview of {percent}% sample ({time} s)").format(
+                percent=f"{fraction * 100:.3g}",
+                time=f"{preview['timings']['total']:.2f}")
+            results.append(f"{obj.name}: {preview_status_icon(preview)} {status}")
+            results.extend(lines)
+        results.append(_("Holes, welds, self-intersections and leaks are found only by the full check"))
+        
+        state["report"] = "\n".join(results)
+        self.report({'INFO'}, _("Preview finished, run the full check for exact results"))
+        return {'FINISHED'}
+
 class MESH_OT_recheck_watertight(Operator):
     bl_idname = "mesh.recheck_watertight"
     bl_label = _("Recheck Watertight Geometry")
     bl_description = _("Обновляет меш и проверяет замкнутость")
-    bl_options = {'REGISTER', 'UNDO'}
+    bl_options = {'REGISTER'}
     
     def execute(self, context):
         # Запоминаем текущий режим активного объекта
@@ -464,6 +1523,124 @@ class MESH_OT_recheck_watertight(Operator):
         
         return {'FINISHED'}
 
+def collect_instance_sources(depsgraph, owners, analyzer):
+    """Уникальные меши среди копий выделенных объектов, проверенные по разу.
+    
+    Обходит depsgraph.object_instances без реализации копий: копии с общим
+    вычисленным мешем (коллекции-копии, инстансы Geometry Nodes) группируются
+    по указателю на меш. owners - имена выделенных объектов; копия относится
+    к ним, если выделен сам объект или породивший ее объект.
+    
+    Объекты копий и их вычисленные меши действительны только на текущем шаге
+    обхода, поэтому меш проверяется analyzer и его массивы копируются сразу,
+    при первой встрече; ссылки на меш не сохраняются.
+    Возвращает список словарей: result (результат проверки), coords и tris
+    (вершины и треугольники меша в локальных координатах), object (исходный
+    объект или None для геометрии, созданной нодами), name, instancers
+    (имена породивших объектов) и matrices (мировые матрицы копий).
+    """
+    sources = {}
+    for instance in depsgraph.object_instances:
+        obj = instance.object
+        if obj.type != 'MESH':
+            continue
+        owner = instance.parent.original if instance.is_instance and instance.parent else obj.original
+        if owner.name not in owners:
+            continue
+        
+        key = obj.data.as_pointer()
+        source = sources.get(key)
+        if source is None:
+            mesh = obj.data
+            original = obj.original
+            # Меш проверяется в своих локальных координатах один раз на все копии
+            tris, _tri_faces = mesh_loop_triangles(mesh)
+            source = sources[key] = {
+                "result": analyzer.analyze_mesh(mesh),
+                "coords": mesh_arrays(mesh)["coords"],
+                "tris": tris,
+                # Меш без модификаторов совпадает с данными объекта: результат можно
+                # привязать к объекту для выделения и навигации
+                "object": original if original.type == 'MESH' and not original.modifiers else None,
+                # Геометрия, созданная нодами, называется по своему мешу
+                "name": original.name if mesh.original == original.data else mesh.name,
+                "instancers": set(),
+                "matrices": [],
+            }
+        source["instancers"].add(owner.name)
+        source["matrices"].append([tuple(row) for row in instance.matrix_world])
+    return list(sources.values())
+
+class MESH_OT_check_watertight_instances(Operator):
+    """Проверяет копии выделенных объектов без их реализации"""
+    bl_idname = "mesh.check_watertight_instances"
+    bl_label = _("Check Instances")
+    bl_description = _("Проверяет каждый уникальный меш среди копий коллекций и инстансов Geometry Nodes один раз и ищет пересечения копий")
+    bl_options = {'REGISTER'}
+    
+    def execute(self, context):
+        scene = context.scene
+        state = result_store.scene_state(scene)
+        state["report"] = ""
+        state["error_types"] = set()
+        state["preview"] = False
+        
+        owners = {obj.name for obj in context.selected_objects}
+        if not owners:
+            self.report({'INFO'}, _("No selected objects to check"))
+            return {'CANCELLED'}
+        
+        started = time.perf_counter()
+        analyzer = WatertightAnalyzer(
+            weld_tolerance=getattr(scene, PREFIX + "weld_tolerance", WELD_TOLERANCE_DEFAULT),
+            check_winding=getattr(scene, PREFIX + "check_winding", False),
+            check_export_split=getattr(scene, PREFIX + "check_export_split", False),
+            intersection_workers=getattr(scene, PREFIX + "intersection_workers", 0))
+        
+        depsgraph = context.evaluated_depsgraph_get()
+        sources = collect_instance_sources(depsgraph, owners, analyzer)
+        if not sources:
+            self.report({'INFO'}, _("No mesh instances to check"))
+            return {'CANCELLED'}
+        
+        results = []
+        error_types = set()
+        for source in sources:
+            result = source["result"]
+            error_types |= result["error_types"]
+            if source["object"] is not None:
+                result_store.set_result(source["object"], result)
+            
+            errors = format_result_lines(result)
+            status = "✅ " + _("Watertight") if not errors else "❌ " + _("Not watertight")
+            results.append(_("{name} ({count} instances): {status}").format(
+                name=source["name"], count=len(source["matrices"]), status=status))
+            results.extend(errors)
+        
+        # Пересечения копий между собой: мировые матрицы нужны только здесь
+        from . import intersections
+        crossing = intersections.crossing_instances(sources)
+        if crossing:
+            error_types.add("INTERSECTIONS")
+            results.append("❌ " + _("Intersecting instances: {count}").format(count=len(crossing)))
+            for (source_a, instance_a), (source_b, instance_b) in crossing[:HOLE_LIST_LIMIT]:
+                results.append("   " + _("{first} #{first_index} and {second} #{second_index}").format(
+                    first=sources[source_a]["name"], first_index=instance_a + 1,
+                    second=sources[source_b]["name"], second_index=instance_b + 1))
+        
+        instance_count = sum(len(source["matrices"]) for source in sources)
+        results.insert(0, _("Instances: {instances}, unique meshes: {meshes} ({time} s)").format(
+            instances=instance_count, meshes=len(sources),
+            time=f"{time.perf_counter() - started:.2f}"))
+        state["error_types"] = error_types
+        state["report"] = "\n".join(results)
+        
+        if error_types:
+            self.report({'WARNING'}, _("Geometry problems detected"))
+        else:
+            self.report({'INFO'}, _("All meshes are watertight"))
+        return {'FINISHED'}
+
 class MESH_OT_select_watertight_problems(Operator):
     """Выделить конкретный тип проблем"""
     bl_idname = "mesh.select_watertight_problems"
@@ -476,110 +1653,61 @@ class MESH_OT_select_watertight_problems(Operator):
     )
     
     def execute(self, context):
-        log_message(f"Выделение проблемы типа: {self.problem_type}")
-        obj = context.active_object
-        if not obj or obj.type != 'MESH':
-            self.report({'ERROR'}, _("Select a mesh object"))
-            return {'CANCELLED'}
-        
-        mesh = obj.data
-        current_mode = obj.mode
+        import numpy as np
         
-        # Переходим в режим редактирования
-        if current_mode != 'EDIT':
-            bpy.ops.object.mode_set(mode='EDIT')
+        debug_message(f"Выделение проблемы типа: {self.problem_type}")
+        # Все проверенные меш-объекты из выделения (или активный объект)
+        candidates = list(context.selected_objects) or [context.active_object]
+        targets = [obj for obj in candidates if get_object_result(obj) is not None]
+        if not targets:
+            self.report({'ERROR'}, _("Select a checked mesh object"))
+            return {'CANCELLED'}
         
-        # Сбрасываем выделение
-        bpy.ops.mesh.select_all(action='DESELECT')
+        # Маски пишутся в меш в объектном режиме: у BMesh нет массовой записи
+        # выделения, а вход в режим редактирования загружает маски в BMesh
+        view_layer = context.view_layer
+        if view_layer.objects.active not in targets:
+            view_layer.objects.active = targets[0]
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        for obj in targets:
+            obj.select_set(True)
         
-        # Получаем bmesh из режима редактирования
-        bm = bmesh.from_edit_mesh(mesh)
-        bm.edges.ensure_lookup_table()
-        bm.faces.ensure_lookup_table()
-        bm.verts.ensure_lookup_table()
+        total = 0
+        center = Vector()
+        for obj in targets:
+            mesh = obj.data
+            vert_mask, edge_mask, face_mask = problem_selection_masks(
+                mesh, get_object_result(obj), self.problem_type)
+            mesh.vertices.foreach_set("select", vert_mask)
+            mesh.edges.foreach_set("select", edge_mask)
+            mesh.polygons.foreach_set("select", face_mask)
+            
+            # Центр выделенных вершин в мировых координатах для фокуса
+            selected = np.flatnonzero(vert_mask)
+            if len(selected):
+                coords = cached_geometry(mesh, "arrays")["coords"]
+                local = Vector(coords[selected].mean(axis=0).tolist())
+                center += (obj.matrix_world @ local) * len(selected)
+                total += len(selected)
+            debug_message(f"{obj.name}: выделено вершин {len(selected)}")
         
-        # Список для сбора всех проблемных элементов
-        all_elements = []
-        
-        # Выделяем в зависимости от типа проблемы
-        if self.problem_type == 'BOUNDARY':
-            indices = obj.get(PREFIX + "boundary_edges", [])
-            log_message(f"Найдено {len(indices)} граничных ребер")
-            for idx in indices:
-                if idx < len(bm.edges):
-                    edge = bm.edges[idx]
-                    edge.select = True
-                    all_elements.append(edge)
-        elif self.problem_type == 'LOOSE':
-            indices = obj.get(PREFIX + "loose_verts", [])
-            log_message(f"Найдено {len(indices)} неплотных вершин")
-            for idx in indices:
-                if idx < len(bm.verts):
-                    vert = bm.verts[idx]
-                    vert.select = True
-                    all_elements.append(vert)
-        elif self.problem_type == 'NORMALS':
-            indices = obj.get(PREFIX + "inverted_normals", [])
-            log_message(f"Найдено {len(indices)} полигонов с перевернутыми нормалями")
-            for idx in indices:
-                if idx < len(bm.faces):
-                    face = bm.faces[idx]
-                    face.select = True
-                    all_elements.append(face)
-        elif self.problem_type == 'MANIFOLD':
-            indices_edges = obj.get(PREFIX + "non_manifold_edges", [])
-            indices_verts = obj.get(PREFIX + "non_manifold_verts", [])
-            log_message(f"Найдено {len(indices_edges)} не manifold ребер и {len(indices_verts)} не manifold вершин")
-            for idx in indices_edges:
-                if idx < len(bm.edges):
-                    edge = bm.edges[idx]
-                    edge.select = True
-                    all_elements.append(edge)
-            for idx in indices_verts:
-                if idx < len(bm.verts):
-                    vert = bm.verts[idx]
-                    vert.select = True
-                    all_elements.append(vert)
-        elif self.problem_type == 'NGONS':
-            indices = obj.get(PREFIX + "ngon_faces", [])
-            log_message(f"Найдено {len(indices)} N-gon граней")
-            for idx in indices:
-                if idx < len(bm.faces):
-                    face = bm.faces[idx]
-                    face.select = True
-                    all_elements.append(face)
-        elif self.problem_type == 'INTERSECTIONS':
-            indices = obj.get(PREFIX + "intersecting_faces", [])
-            log_message(f"Найдено {len(indices)} пересекающихся граней")
-            for idx in indices:
-                if idx < len(bm.faces):
-                    face = bm.faces[idx]
-                    face.select = True
-                    all_elements.append(face)
-        
-        # Обновляем меш
-        bmesh.update_edit_mesh(mesh)
+        # Один переход в режим редактирования для всех объектов сразу
+        bpy.ops.object.mode_set(mode='EDIT')
+        for obj in targets:
+            bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
         
         # Сохраняем тип проблемы для навигации
-        context.scene[PREFIX + "current_problem_type"] = self.problem_type
-        context.scene[PREFIX + "current_focus_index"] = -1  # Сброс индекса
+        state = result_store.scene_state(context.scene)
+        state["problem_type"] = self.problem_type
+        state["focus_index"] = -1  # Сброс индекса
         
         # Фокусируем камеру на всем проблемном участке
-        if all_elements:
-            center = Vector()
-            for element in all_elements:
-                if isinstance(element, bmesh.types.BMVert):
-                    center += element.co
-                elif isinstance(element, bmesh.types.BMEdge):
-                    center += (element.verts[0].co + element.verts[1].co) / 2
-                elif isinstance(element, bmesh.types.BMFace):
-                    center += element.calc_center_median()
-            
-            center /= len(all_elements)
-            self.focus_on_location(context, center)
+        if total:
+            self.focus_on_location(context, center / total)
         
         # Оставляем пользователя в режиме редактирования
-        log_message("Выделение завершено. Остаемся в режиме редактирования.")
+        debug_message("Выделение завершено. Остаемся в режиме редактирования.")
         return {'FINISHED'}
 
     @staticmethod
@@ -598,7 +1726,8 @@ class MESH_OT_focus_problem_element(Operator):
     """Фокусирует камеру на проблемном элементе"""
     bl_idname = "mesh.focus_problem_element"
     bl_label = _("Focus on Problem Element")
-    bl_options = {'REGISTER', 'UNDO'}
+    # Навигация меняет только вид и сессионное состояние
+    bl_options = {'REGISTER'}
     
     direction: EnumProperty(
         items=[
@@ -608,96 +1737,183 @@ class MESH_OT_focus_problem_element(Operator):
         default='NEXT'
     )
     
+    problem_type: StringProperty(
+        name="Problem Type",
+        description=_("Тип проблемы для навигации (по умолчанию - текущий)"),
+        default=""
+    )
+    
+    target_index: IntProperty(
+        name="Target Index",
+        description=_("Номер группы элементов для перехода (-1 - по направлению)"),
+        default=-1,
+        min=-1
+    )
+    
     def execute(self, context):
         obj = context.active_object
         if not obj or obj.type != 'MESH':
             self.report({'ERROR'}, _("Select a mesh object"))
             return {'CANCELLED'}
         
-        scene = context.scene
-        problem_type = scene.get(PREFIX + "current_problem_type", "")
-        current_index = scene.get(PREFIX + "current_focus_index", -1)
+        state = result_store.scene_state(context.scene)
+        if self.problem_type:
+            state["problem_type"] = self.problem_type
+        problem_type = state["problem_type"]
+        current_index = state["focus_index"]
         
         if not problem_type:
             self.report({'INFO'}, _("First select a problem"))
             return {'CANCELLED'}
         
-        # Получаем список элементов для текущей проблемы
-        elements = []
-        if problem_type == 'BOUNDARY':
-            elements = list(obj.get(PREFIX + "boundary_edges", []))
-        elif problem_type == 'LOOSE':
-            elements = list(obj.get(PREFIX + "loose_verts", []))
-        elif problem_type == 'NORMALS':
-            elements = list(obj.get(PREFIX + "inverted_normals", []))
-        elif problem_type == 'MANIFOLD':
-            # Преобразуем IDPropertyArray в списки
-            edges = list(obj.get(PREFIX + "non_manifold_edges", []))
-            verts = list(obj.get(PREFIX + "non_manifold_verts", []))
-            elements = edges + verts
-        elif problem_type == 'NGONS':
-            elements = list(obj.get(PREFIX + "ngon_faces", []))
-        elif problem_type == 'INTERSECTIONS':
-            elements = list(obj.get(PREFIX + "intersecting_faces", []))
-        
-        if not elements:
+        # Получаем группы элементов для текущей проблемы (петли отверстий или отдельные элементы)
+        groups = get_problem_groups(obj, problem_type)
+        
+        if not groups:
             self.report({'INFO'}, _("No problem elements found"))
             return {'CANCELLED'}
         
-        # Обновляем индекс в зависимости от направления
-        if self.direction == 'NEXT':
-            current_index = (current_index + 1) % len(elements)
+        # Обновляем индекс в зависимости от направления или переходим к заданной группе
+        if self.target_index >= 0:
+            current_index = self.target_index % len(groups)
+        elif self.direction == 'NEXT':
+            current_index = (current_index + 1) % len(groups)
         else:
-            current_index = (current_index - 1) % len(elements)
+            current_index = (current_index - 1) % len(groups)
         
-        scene[PREFIX + "current_focus_index"] = current_index
-        element_idx = elements[current_index]
+        state["focus_index"] = current_index
         
-        # Создаем BMesh для доступа к геометрии
+        # Для островов центр и габарит уже посчитаны при проверке
+        island_data = get_problem_islands(obj, problem_type)
+        if island_data is not None:
+            center = Vector(island_data["centers"][3 * current_index:3 * current_index + 3])
+            bounds = island_data["bounds"][6 * current_index:6 * current_index + 6]
+            size = (Vector(bounds[3:]) - Vector(bounds[:3])).length
+            MESH_OT_select_watertight_problems.focus_on_location(context, obj.matrix_world @ center)
+            self.report({'INFO'}, _("Island {index}/{total}: {count} elements, size {size}").format(
+                index=current_index+1,
+                total=len(groups),
+                count=len(groups[current_index]),
+                size=f"{size:.4g}"))
+            return {'FINISHED'}
+        
+        # Центры элементов группы по кешированным массивам меша (без BMesh)
         mesh = obj.data
-        bm = bmesh.new()
-        bm.from_mesh(mesh)
-        bm.verts.ensure_lookup_table()
-        bm.edges.ensure_lookup_table()
-        bm.faces.ensure_lookup_table()
+        centers = [element_center(mesh, element_kind, element_idx)
+                   for element_kind, element_idx in groups[current_index]]
+        centers = [center for center in centers if center is not None]
         
-        # Получаем элемент по индексу
-        element = None
-        if problem_type == 'BOUNDARY' and element_idx < len(bm.edges):
-            element = bm.edges[element_idx]
-        elif problem_type == 'LOOSE' and element_idx < len(bm.verts):
-            element = bm.verts[element_idx]
-        elif problem_type == 'NORMALS' and element_idx < len(bm.faces):
-            element = bm.faces[element_idx]
-        elif problem_type == 'MANIFOLD':
-            # Для non-manifold проверяем оба типа элементов
-            if element_idx < len(bm.edges):
-                element = bm.edges[element_idx]
-            elif element_idx < len(bm.edges) + len(bm.verts):
-                element = bm.verts[element_idx - len(bm.edges)]
-        elif problem_type == 'NGONS' and element_idx < len(bm.faces):
-            element = bm.faces[element_idx]
-        elif problem_type == 'INTERSECTIONS' and element_idx < len(bm.faces):
-            element = bm.faces[element_idx]
-        
-        if element:
-            # Вычисляем центр элемента
-            if isinstance(element, bmesh.types.BMVert):
-                center = element.co
-            elif isinstance(element, bmesh.types.BMEdge):
-                center = (element.verts[0].co + element.verts[1].co) / 2
-            elif isinstance(element, bmesh.types.BMFace):
-                center = element.calc_center_median()
+        if centers:
+            # Вычисляем центр группы элементов
+            center = sum(centers, Vector()) / len(centers)
             
             # Фокусируем камеру на элементе без изменения масштаба
-            MESH_OT_select_watertight_problems.focus_on_location(context, center)
-            self.report({'INFO'}, _("Focus on element {index}/{total}").format(
-                index=current_index+1, 
-                total=len(elements)))
+            MESH_OT_select_watertight_problems.focus_on_location(context, obj.matrix_world @ center)
+            loops = get_object_result(obj)["loops"]
+            if problem_type == 'BOUNDARY' and len(loops.get("offsets", ())) > 1:
+                self.report({'INFO'}, _("Hole {index}/{total}: perimeter {perimeter}, area {area}").format(
+                    index=current_index+1,
+                    total=len(groups),
+                    perimeter=f"{loops['perimeters'][current_index]:.4g}",
+                    area=f"{loops['areas'][current_index]:.4g}"))
+            else:
+                self.report({'INFO'}, _("Focus on element {index}/{total}").format(
+                    index=current_index+1, 
+                    total=len(groups)))
         else:
             self.report({'WARNING'}, _("Element not found"))
         
-        bm.free()
+        return {'FINISHED'}
+
+class MESH_OT_export_watertight_results(Operator, ExportHelper):
+    """Выгружает результаты проверки в машиночитаемом формате"""
+    bl_idname = "mesh.export_watertight_results"
+    bl_label = _("Export Check Results")
+    bl_options = {'REGISTER'}
+    
+    filename_ext = ".json"
+    
+    filter_glob: StringProperty(
+        default="*.json;*.csv;*.xml;*.npz",
+        options={'HIDDEN'}
+    )
+    
+    file_format: EnumProperty(
+        name="Format",
+        items=[
+            ('JSON', "JSON", _("Счетчики, время и хеш меша для каждого объекта")),
+            ('CSV', "CSV", _("Одна строка со счетчиками на объект")),
+            ('JUNIT', "JUnit XML", _("Отчет для CI: объект - набор тестов, категория - тест")),
+            ('NPZ', "NPZ", _("Массивы индексов NumPy для больших объемов")),
+        ],
+        default='JSON'
+    )
+    
+    include_indices: BoolProperty(
+        name="Include Indices",
+        description=_("Выгружать полные массивы индексов проблемных элементов"),
+        default=False
+    )
+    
+    selected_only: BoolProperty(
+        name="Selected Only",
+        description=_("Выгружать только выделенные объекты"),
+        default=True
+    )
+    
+    def check(self, context):
+        # Расширение файла следует за выбранным форматом
+        self.filename_ext = export.FORMAT_EXTENSIONS[self.file_format]
+        return ExportHelper.check(self, context)
+    
+    def execute(self, context):
+        objects = context.selected_objects if self.selected_only else context.scene.objects
+        # В NPZ без индексов остается только сводка, поэтому индексы пишутся всегда
+        include_indices = self.include_indices or self.file_format == 'NPZ'
+        
+        try:
+            count = export_results(objects, self.filepath, self.file_format, include_indices)
+        except Exception as e:
+            log_message(f"Ошибка выгрузки результатов: {str(e)}")
+            log_message(traceback.format_exc())
+            self.report({'ERROR'}, _("Export failed: {error}").format(error=str(e)))
+            return {'CANCELLED'}
+        
+        if not count:
+            self.report({'WARNING'}, _("No check results to export"))
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, _("Exported results for {count} objects").format(count=count))
+        return {'FINISHED'}
+
+class MESH_OT_persist_watertight_results(Operator):
+    """Сохраняет результаты проверки в файл .blend"""
+    bl_idname = "mesh.persist_watertight_results"
+    bl_label = _("Persist Check Results")
+    bl_description = _("Записывает результаты проверки в свойства объектов, чтобы они сохранились вместе с файлом")
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        scene = context.scene
+        ensure_result_properties()
+        count = 0
+        for obj in scene.objects:
+            result = result_store.get_result(obj)
+            if result is None:
+                continue
+            persist_object_result(obj, result)
+            count += 1
+        
+        if not count:
+            self.report({'WARNING'}, _("No check results to persist"))
+            return {'CANCELLED'}
+        
+        report, error_types = get_scene_report(scene)
+        # Сохраняем error_types как строку с разделителем
+        scene[PREFIX + "error_types"] = ",".join(error_types)
+        scene[PREFIX + "report"] = report
+        
+        self.report({'INFO'}, _("Persisted results for {count} objects").format(count=count))
         return {'FINISHED'}
 
 class VIEW3D_PT_watertight_panel(Panel):
@@ -707,6 +1923,8 @@ class VIEW3D_PT_watertight_panel(Panel):
     bl_label = _("Watertight Checker") + f" v{PLUGIN_VERSION}"
 
     def draw(self, context):
+        # Переводы регистрируются при первой отрисовке, если таймер еще не сработал
+        ensure_translations()
         layout = self.layout
         scene = context.scene
         
@@ -720,11 +1938,23 @@ class VIEW3D_PT_watertight_panel(Panel):
         row = col.row(align=True)
         row.operator(MESH_OT_check_watertight.bl_idname, text=_("Check"))
         row.operator(MESH_OT_recheck_watertight.bl_idname, text=_("Recheck"))
+        row = col.row(align=True)
+        op = row.operator(MESH_OT_check_watertight.bl_idname, text=_("Preview"), icon='TIME')
+        op.preview = True
+        row.prop(scene, PREFIX + "preview_fraction", text=_("Sample"))
+        col.operator(MESH_OT_check_watertight_instances.bl_idname, text=_("Check instances"), icon='OUTLINER_OB_GROUP_INSTANCE')
+        if result_store.has_scene_state(scene) and result_store.scene_state(scene).get("preview"):
+            col.operator(MESH_OT_check_watertight.bl_idname, text=_("Run full check"), icon='PLAY')
+        col.prop(scene, PREFIX + "weld_tolerance", text=_("Weld tolerance"))
+        col.prop(scene, PREFIX + "check_winding", text=_("Winding number leak test"))
+        col.prop(scene, PREFIX + "check_export_split", text=_("Simulate export vertex splits"))
+        col.prop(scene, PREFIX + "intersection_workers", text=_("Intersection processes"))
+        col.operator(MESH_OT_export_watertight_results.bl_idname, text=_("Export results"), icon='EXPORT')
         
         # Кнопки выделения проблем
-        # Преобразуем строку обратно в множество
-        error_types_str = scene.get(PREFIX + "error_types", "")
-        error_types = set(error_types_str.split(",")) if error_types_str else set()
+        report, error_types = get_scene_report(scene)
+        if report:
+            col.operator(MESH_OT_persist_watertight_results.bl_idname, text=_("Persist results"), icon='FILE_TICK')
         
         if error_types:
             box = layout.box()
@@ -732,33 +1962,83 @@ class VIEW3D_PT_watertight_panel(Panel):
             
             row = box.row()
             if "BOUNDARY" in error_types:
-                op = row.operator("mesh.select_watertight_problems", text=_("Open boundaries"))
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Open boundaries"), 'BOUNDARY'))
                 op.problem_type = 'BOUNDARY'
             
             if "LOOSE" in error_types:
-                op = row.operator("mesh.select_watertight_problems", text=_("Loose geometry"))
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Loose geometry"), 'LOOSE'))
                 op.problem_type = 'LOOSE'
             
             row = box.row()
             if "NORMALS" in error_types:
-                op = row.operator("mesh.select_watertight_problems", text=_("Inverted normals"))
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Inverted normals"), 'NORMALS'))
                 op.problem_type = 'NORMALS'
             
             if "MANIFOLD" in error_types:
-                op = row.operator("mesh.select_watertight_problems", text=_("Non-manifold"))
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Non-manifold"), 'MANIFOLD'))
                 op.problem_type = 'MANIFOLD'
             
             row = box.row()
             if "NGONS" in error_types:
-                op = row.operator("mesh.select_watertight_problems", text=_("N-Gons"))
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("N-Gons"), 'NGONS'))
                 op.problem_type = 'NGONS'
             
             if "INTERSECTIONS" in error_types:
-                op = row.operator("mesh.select_watertight_problems", text=_("Self-intersections"))
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Self-intersections"), 'INTERSECTIONS'))
                 op.problem_type = 'INTERSECTIONS'
             
+            row = box.row()
+            if "WELD" in error_types:
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Weld candidates"), 'WELD'))
+                op.problem_type = 'WELD'
+            
+            if "TJUNCTION" in error_types:
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("T-junctions"), 'TJUNCTION'))
+                op.problem_type = 'TJUNCTION'
+            
+            if "LEAKY" in error_types:
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Leaky shells"), 'LEAKY'))
+                op.problem_type = 'LEAKY'
+            
+            row = box.row()
+            if "DUPLICATES" in error_types:
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Duplicate faces"), 'DUPLICATES'))
+                op.problem_type = 'DUPLICATES'
+            
+            if "OVERLAPS" in error_types:
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Overlapping faces"), 'OVERLAPS'))
+                op.problem_type = 'OVERLAPS'
+            
+            row = box.row()
+            if "DEGENERATE" in error_types:
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Degenerate geometry"), 'DEGENERATE'))
+                op.problem_type = 'DEGENERATE'
+            
+            if "SPLITS" in error_types:
+                op = row.operator("mesh.select_watertight_problems", text=self.problem_label(context, _("Export splits"), 'SPLITS'))
+                op.problem_type = 'SPLITS'
+            
+            # Список крупнейших отверстий активного объекта
+            active_result = get_object_result(context.active_object)
+            if "BOUNDARY" in error_types and active_result and len(active_result["loops"].get("offsets", ())) > 1:
+                holes_box = box.box()
+                holes_box.label(text=_("Largest holes:"))
+                perimeters = active_result["loops"]["perimeters"]
+                areas = active_result["loops"]["areas"]
+                planarity = active_result["loops"]["planarity"]
+                for i in range(min(HOLE_LIST_LIMIT, len(perimeters))):
+                    op = holes_box.operator(
+                        "mesh.focus_problem_element",
+                        text=f"#{i + 1}  P {perimeters[i]:.4g}  A {areas[i]:.4g}  Δ {planarity[i]:.3g}",
+                        icon='VIEWZOOM')
+                    op.problem_type = 'BOUNDARY'
+                    op.target_index = i
+                if len(perimeters) > HOLE_LIST_LIMIT:
+                    holes_box.label(text=_("...and {count} more").format(count=len(perimeters) - HOLE_LIST_LIMIT))
+            
             # Кнопки навигации по проблемным элементам
-            problem_type = scene.get(PREFIX + "current_problem_type", "")
+            state = result_store.scene_state(scene) if result_store.has_scene_state(scene) else {}
+            problem_type = state.get("problem_type", "")
             if problem_type and problem_type in error_types:
                 nav_box = box.box()
                 nav_box.label(text=_("Focus on elements:"))
@@ -768,7 +2048,8 @@ class VIEW3D_PT_watertight_panel(Panel):
                 op_prev.direction = 'PREV'
                 
                 # Отображение текущей позиции
-                row.label(text=_("Position:") + f" {scene.get(PREFIX + 'current_focus_index', -1) + 1}/{self.get_element_count(context, problem_type)}")
+                position_label = _("Island:") if get_problem_islands(context.active_object, problem_type) else _("Position:")
+                row.label(text=position_label + f" {state['focus_index'] + 1}/{self.get_element_count(context, problem_type)}")
                 
                 op_next = row.operator("mesh.focus_problem_element", text="", icon='TRIA_RIGHT')
                 op_next.direction = 'NEXT'
@@ -778,7 +2059,6 @@ class VIEW3D_PT_watertight_panel(Panel):
         warning_box.label(text=_("Normal check is only reliable for convex objects"))
         warning_box.label(text=_("For concave shapes use standard normal analysis tools"))
         
-        report = scene.get(PREFIX + "report", "")
         if report:
             box = layout.box()
             
@@ -830,165 +2110,229 @@ class VIEW3D_PT_watertight_panel(Panel):
                 if "INTERSECTIONS" in error_types:
                     row = col_solution.row()
                     row.operator("mesh.remove_doubles", text=_("Fix intersections"))
+                
+                if "WELD" in error_types or "TJUNCTION" in error_types:
+                    row = col_solution.row()
+                    op = row.operator("mesh.remove_doubles", text=_("Merge by Distance"))
+                    op.threshold = getattr(scene, PREFIX + "weld_tolerance", WELD_TOLERANCE_DEFAULT)
+                    if "TJUNCTION" in error_types:
+                        row.operator("mesh.subdivide", text=_("Subdivide"))
+                
+                if "DUPLICATES" in error_types:
+                    row = col_solution.row()
+                    row.operator("mesh.delete", text=_("Delete duplicates")).type = 'FACE'
+                
+                if "DEGENERATE" in error_types:
+                    row = col_solution.row()
+                    op = row.operator("mesh.dissolve_degenerate", text=_("Degenerate Dissolve"))
+                    op.threshold = getattr(scene, PREFIX + "weld_tolerance", WELD_TOLERANCE_DEFAULT)
+
+    def problem_label(self, context, text, problem_type):
+        """Подпись кнопки с числом островов (отверстий) у активного объекта"""
+        count = self.get_element_count(context, problem_type)
+        return f"{text} ({count})" if count else text
 
     def get_element_count(self, context, problem_type):
         """Возвращает количество элементов для текущей проблемы"""
         obj = context.active_object
-        if not obj or obj.type != 'MESH':
+        result = get_object_result(obj)
+        if result is None:
             return 0
         
-        if problem_type == 'BOUNDARY':
-            return len(obj.get(PREFIX + "boundary_edges", []))
-        elif problem_type == 'LOOSE':
-            return len(obj.get(PREFIX + "loose_verts", []))
-        elif problem_type == 'NORMALS':
-            return len(obj.get(PREFIX + "inverted_normals", []))
-        elif problem_type == 'MANIFOLD':
-            edges = len(obj.get(PREFIX + "non_manifold_edges", []))
-            verts = len(obj.get(PREFIX + "non_manifold_verts", []))
-            return edges + verts
-        elif problem_type == 'NGONS':
-            return len(obj.get(PREFIX + "ngon_faces", []))
-        elif problem_type == 'INTERSECTIONS':
-            return len(obj.get(PREFIX + "intersecting_faces", []))
-        
-        return 0
+        # Считаем без построения групп: панель перерисовывается часто
+        if problem_type == 'BOUNDARY' and len(result["loops"].get("offsets", ())) > 1:
+            return len(result["loops"]["offsets"]) - 1
+        island_data = get_problem_islands(obj, problem_type)
+        if island_data is not None:
+            return len(island_data["offsets"]) - 1
+        return sum(len(result["indices"].get(prop_name, ()))
+                   for prop_name, _kind in PROBLEM_ELEMENTS.get(problem_type, ()))
 
 # Определяем классы ПОСЛЕ их объявления
 classes = (
     MESH_OT_check_watertight,
     MESH_OT_recheck_watertight,
+    MESH_OT_check_watertight_instances,
     MESH_OT_select_watertight_problems,
     MESH_OT_focus_problem_element,
+    MESH_OT_export_watertight_results,
+    MESH_OT_persist_watertight_results,
     VIEW3D_PT_watertight_panel,
 )
 
-def register():
-    log_message("Начало регистрации плагина")
+@persistent
+def clear_results_on_load(_filepath):
+    """Сбрасывает сессионные результаты и кеш геометрии при загрузке другого файла"""
+    result_store.clear()
+    geometry_cache.clear()
+
+@persistent
+def invalidate_geometry_cache(_scene, depsgraph):
+    """Помечает в кеше меши, геометрия которых могла измениться"""
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        data = update.id.original
+        if isinstance(data, bpy.types.Object):
+            data = data.data if data.type == 'MESH' else None
+        if isinstance(data, bpy.types.Mesh):
+            geometry_cache.mark_dirty(data.session_uid)
+
+def scene_settings():
+    """Свойства сцены с настройками панели: нужны сразу для отрисовки"""
+    return {
+        "weld_tolerance": FloatProperty(
+            name="Weld Tolerance",
+            description=_("Расстояние, при котором вершины считаются совпадающими"),
+            default=WELD_TOLERANCE_DEFAULT,
+            min=0.0,
+            precision=6,
+            subtype='DISTANCE'
+        ),
+        "check_winding": BoolProperty(
+            name="Winding Number Leak Test",
+            description=_("Оценивать протекание оболочек по обобщенному числу оборотов (медленнее)"),
+            default=False
+        ),
+        "check_export_split": BoolProperty(
+            name="Simulate Export Vertex Splits",
+            description=_("Моделировать разделение вершин экспортером по UV-швам и жестким нормалям"),
+            default=False
+        ),
+        "preview_fraction": FloatProperty(
+            name="Preview Sample",
+            description=_("Доля граней, ребер и вершин, проверяемых в режиме быстрой оценки"),
+            default=PREVIEW_FRACTION_DEFAULT,
+            min=0.0001,
+            max=1.0,
+            subtype='FACTOR'
+        ),
+        "intersection_workers": IntProperty(
+            name="Intersection Processes",
+            description=_("Число процессов для поиска самопересечений (0 - по числу ядер, 1 - без дочерних процессов)"),
+            default=0,
+            min=0,
+            max=256
+        ),
+    }
+
+def ensure_result_properties():
+    """Регистрирует описания сохраняемых результатов при первом сохранении.
     
-    # Удаляем старые свойства, если они существуют
-    safe_unregister()
+    Результаты читаются и пишутся через ID-свойства, поэтому при запуске
+    Blender эти свойства не нужны.
+    """
+    global _result_properties_registered
+    if _result_properties_registered:
+        return
     
-    # Регистрируем классы
-    for cls in classes:
+    # Отчет сцены хранится строками (error_types - через запятую)
+    for prop_name, label in (("report", "Watertight Report"), ("error_types", "Error Types")):
+        full_name = PREFIX + prop_name
         try:
-            bpy.utils.register_class(cls)
-            log_message(f"Класс зарегистрирован: {cls.__name__}")
+            if not hasattr(bpy.types.Scene, full_name):
+                setattr(bpy.types.Scene, full_name, StringProperty(name=label, default=""))
+                debug_message(f"Свойство сцены {full_name} создано")
         except Exception as e:
-            log_message(f"Ошибка регистрации класса {cls.__name__}: {str(e)}")
+            log_message(f"Ошибка создания {full_name}: {str(e)}")
             log_message(traceback.format_exc())
     
-    # Свойства сцены
-    try:
-        if not hasattr(bpy.types.Scene, PREFIX + "report"):
-            bpy.types.Scene.wtc_report = StringProperty(
-                name="Watertight Report",
-                default=""
-            )
-            log_message("Свойство сцены wtc_report создано")
-    except Exception as e:
-        log_message(f"Ошибка создания wtc_report: {str(e)}")
-        log_message(traceback.format_exc())
+    for prop_name, description in OBJECT_PROPERTIES:
+        full_name = PREFIX + prop_name
+        try:
+            if not hasattr(bpy.types.Object, full_name):
+                setattr(bpy.types.Object, full_name, IntVectorProperty(
+                    name=prop_name.capitalize().replace("_", " "),
+                    default=(),
+                    description=description
+                ))
+                debug_message(f"Свойство объекта {full_name} создано")
+        except Exception as e:
+            log_message(f"Ошибка создания свойства {full_name}: {str(e)}")
+            log_message(traceback.format_exc())
     
-    try:
-        if not hasattr(bpy.types.Scene, PREFIX + "error_types"):
-            # Изменено на StringProperty для хранения множества
-            bpy.types.Scene.wtc_error_types = StringProperty(
-                name="Error Types",
-                default=""
-            )
-            log_message("Свойство сцены wtc_error_types создано")
-    except Exception as e:
-        log_message(f"Ошибка создания wtc_error_types: {str(e)}")
-        log_message(traceback.format_exc())
+    _result_properties_registered = True
+
+def ensure_translations():
+    """Регистрирует переводы при первой отрисовке интерфейса.
     
+    Вызывается таймером после запуска и из панели; в фоновом режиме
+    (blender -b) таймеры не срабатывают, и словари переводов не строятся.
+    """
+    global _translations_registered
+    if _translations_registered:
+        return None
+    _translations_registered = True
     try:
-        if not hasattr(bpy.types.Scene, PREFIX + "current_problem_type"):
-            bpy.types.Scene.wtc_current_problem_type = StringProperty(
-                name="Current Problem Type",
-                default=""
-            )
-            log_message("Свойство сцены wtc_current_problem_type создано")
+        register_translations()
+        debug_message("Переводы зарегистрированы")
     except Exception as e:
-        log_message(f"Ошибка создания wtc_current_problem_type: {str(e)}")
-        log_message(traceback.format_exc())
+        log_message(f"Ошибка регистрации переводов: {str(e)}")
+    # Для bpy.app.timers: таймер не повторяется
+    return None
+
+def is_registered():
+    """Остались ли классы или свойства от предыдущей регистрации"""
+    return (any(getattr(cls, "is_registered", False) for cls in classes)
+            or any(hasattr(bpy.types.Scene, PREFIX + prop_name) for prop_name in scene_settings()))
+
+def register():
+    started = time.perf_counter()
+    debug_message("Начало регистрации плагина")
     
-    try:
-        if not hasattr(bpy.types.Scene, PREFIX + "current_focus_index"):
-            bpy.types.Scene.wtc_current_focus_index = IntProperty(
-                name="Current Focus Index",
-                default=-1,
-                min=-1
-            )
-            log_message("Свойство сцены wtc_current_focus_index создано")
-    except Exception as e:
-        log_message(f"Ошибка создания wtc_current_focus_index: {str(e)}")
-        log_message(traceback.format_exc())
-    
-    # Свойства объектов
-    obj_properties = [
-        ("boundary_edges", "Индексы граничных ребер"),
-        ("loose_verts", "Индексы вершин с недостаточным количеством соединений"),
-        ("inverted_normals", "Индексы полигонов с перевернутыми нормалями"),
-        ("non_manifold_edges", "Индексы не manifold ребер"),
-        ("non_manifold_verts", "Индексы не manifold вершин"),
-        ("ngon_faces", "Индексы N-gon граней (более 4 вершин)"),
-        ("intersecting_faces", "Индексы самопересекающихся граней")
-    ]
+    # Удаляем старые свойства, если плагин перезагружается без удаления
+    if is_registered():
+        safe_unregister()
+    
+    # Регистрируем классы
+    for cls in classes:
+        try:
+            bpy.utils.register_class(cls)
+            debug_message(f"Класс зарегистрирован: {cls.__name__}")
+        except Exception as e:
+            log_message(f"Ошибка регистрации класса {cls.__name__}: {str(e)}")
+            log_message(traceback.format_exc())
     
-    for prop_name, description in obj_properties:
+    # Свойства сцены с настройками панели
+    for prop_name, prop in scene_settings().items():
         full_name = PREFIX + prop_name
         try:
-            if hasattr(bpy.types.Object, full_name):
-                log_message(f"Свойство {full_name} уже существует перед регистрацией")
-            else:
-                # Создаем свойство динамически
-                prop = IntVectorProperty(
-                    name=prop_name.capitalize().replace("_", " "),
-                    default=(),
-                    description=description
-                )
-                setattr(bpy.types.Object, full_name, prop)
-                log_message(f"Свойство объекта {full_name} создано")
-                
-                # Проверяем, действительно ли создалось
-                if hasattr(bpy.types.Object, full_name):
-                    log_message(f"Подтверждение: свойство {full_name} существует после создания")
-                else:
-                    log_message(f"ОШИБКА: свойство {full_name} не создалось!")
+            if not hasattr(bpy.types.Scene, full_name):
+                setattr(bpy.types.Scene, full_name, prop)
+                debug_message(f"Свойство сцены {full_name} создано")
         except Exception as e:
-            log_message(f"Ошибка создания свойства {full_name}: {str(e)}")
+            log_message(f"Ошибка создания {full_name}: {str(e)}")
             log_message(traceback.format_exc())
     
-    # Регистрируем переводы
-    register_translations()
+    # Сессионные результаты не переживают загрузку другого файла
+    if clear_results_on_load not in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.append(clear_results_on_load)
+    # Кеш геометрии сверяется с мешем после его изменений
+    if invalidate_geometry_cache not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(invalidate_geometry_cache)
+    
+    # Переводы и свойства сохраняемых результатов - при первом использовании
+    if not bpy.app.background and not bpy.app.timers.is_registered(ensure_translations):
+        bpy.app.timers.register(ensure_translations, first_interval=0.0)
     
-    log_message("Регистрация плагина завершена")
+    debug_message(f"Регистрация плагина завершена за {(time.perf_counter() - started) * 1000:.1f} мс")
 
 def safe_unregister():
     """Безопасное удаление свойств и классов"""
-    log_message("Начало безопасного удаления")
+    global _result_properties_registered, _translations_registered
+    debug_message("Начало безопасного удаления")
     
     # Список свойств для удаления
-    obj_props = [
-        "wtc_boundary_edges", 
-        "wtc_loose_verts", 
-        "wtc_inverted_normals", 
-        "wtc_non_manifold_edges", 
-        "wtc_non_manifold_verts",
-        "wtc_ngon_faces",
-        "wtc_intersecting_faces"
-    ]
+    obj_props = [PREFIX + prop_name for prop_name, _description in OBJECT_PROPERTIES]
     scene_props = ["wtc_report", "wtc_error_types", "wtc_current_problem_type", "wtc_current_focus_index"]
+    scene_props += [PREFIX + prop_name for prop_name in scene_settings()]
     
     # Удаляем свойства объектов
     for prop in obj_props:
         try:
             if hasattr(bpy.types.Object, prop):
-                log_message(f"Удаление свойства объекта: {prop}")
+                debug_message(f"Удаление свойства объекта: {prop}")
                 delattr(bpy.types.Object, prop)
-            else:
-                log_message(f"Свойство объекта {prop} не существует, пропускаем удаление")
         except Exception as e:
             log_message(f"Ошибка удаления свойства объекта {prop}: {str(e)}")
             log_message(traceback.format_exc())
@@ -997,30 +2341,42 @@ def safe_unregister():
     for prop in scene_props:
         try:
             if hasattr(bpy.types.Scene, prop):
-                log_message(f"Удаление свойства сцены: {prop}")
+                debug_message(f"Удаление свойства сцены: {prop}")
                 delattr(bpy.types.Scene, prop)
-            else:
-                log_message(f"Свойство сцены {prop} не существует, пропускаем удаление")
         except Exception as e:
             log_message(f"Ошибка удаления свойства сцены {prop}: {str(e)}")
             log_message(traceback.format_exc())
+    _result_properties_registered = False
     
     # Удаляем классы
     for cls in classes:
+        if not getattr(cls, "is_registered", False):
+            continue
         try:
-            log_message(f"Попытка удаления класса: {cls.__name__}")
             bpy.utils.unregister_class(cls)
-            log_message(f"Класс {cls.__name__} успешно удален")
+            debug_message(f"Класс {cls.__name__} успешно удален")
         except Exception as e:
             log_message(f"Ошибка удаления класса {cls.__name__}: {str(e)}")
             log_message(traceback.format_exc())
     
-    # Удаляем переводы
-    unregister_translations()
+    # Удаляем обработчики, сессионные результаты и кеш геометрии
+    if clear_results_on_load in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(clear_results_on_load)
+    if invalidate_geometry_cache in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(invalidate_geometry_cache)
+    result_store.clear()
+    geometry_cache.clear()
+    
+    # Удаляем переводы (или отложенную регистрацию)
+    if bpy.app.timers.is_registered(ensure_translations):
+        bpy.app.timers.unregister(ensure_translations)
+    if _translations_registered:
+        unregister_translations()
+        _translations_registered = False
     
-    log_message("Безопасное удаление завершено")
+    debug_message("Безопасное удаление завершено")
 
 def unregister():
-    log_message("Начало удаления плагина")
+    debug_message("Начало удаления плагина")
     safe_unregister()
-    log_message("Плагин полностью удален")
\ No newline at end of file
+    debug_message("Плагин полностью удален")